@@ -1,17 +1,19 @@
 import os
 import re
 import warnings
-import json
 import streamlit as st
-from transformers import logging as hf_logging
 
-# suppress transformer logs
+# suppress transformer logs (without importing transformers)
 os.environ["TRANSFORMERS_NO_ADVISORY_WARNINGS"] = "1"
-hf_logging.set_verbosity_error()
+os.environ.setdefault("TRANSFORMERS_VERBOSITY", "error")
 warnings.filterwarnings("ignore")
 
-from verify import build_agent, extract_urls
+from verify import build_agent
+from pipeline import build_pipeline
+from jobs import JobQueue
 from graph.graph_manager import GraphManager
+from graph.sqlite_graph import open_graph
+from graph.similarity import EvidenceReuse
 
 st.set_page_config(page_title="Agentic Fact-Checker", layout="wide")
 st.title("🕵️ Autonomous Fact-Checking Agent")
@@ -28,6 +30,32 @@ Examples:
 # Initialize session state
 if "results" not in st.session_state:
     st.session_state.results = {}
+if "job_id" not in st.session_state:
+    # ?job=<id> picks a job up again after a reload (results are kept for JOB_TTL)
+    st.session_state.job_id = st.query_params.get("job")
+
+@st.cache_resource
+def get_graph():
+    # one evidence graph for every session / rerun of this process
+    # (durable + shared between workers when FACTCHECK_GRAPH_DB is set)
+    return open_graph()
+
+@st.cache_resource
+def get_agent(direct: bool):
+    # built once per process and kept warm across reruns / sessions
+    # (the agent and the pipeline are stateless between claims; the job queue shares them between threads)
+    return build_pipeline() if direct else build_agent()
+
+@st.cache_resource
+def get_jobs():
+    # claims are verified here in the background, never inside a script run;
+    # one queue per process, shared by every session
+    return JobQueue()
+
+@st.cache_resource
+def get_reuse():
+    # near-duplicate lookup over the claims already in get_graph()
+    return EvidenceReuse(get_graph())
 
 def parse_claims(text: str) -> list[str]:
     quotes = re.findall(r'"([^"]+)"', text)
@@ -35,107 +63,109 @@ def parse_claims(text: str) -> list[str]:
         return [q.strip() for q in quotes if q.strip()]
     return [seg.strip() for seg in text.split(",") if seg.strip()]
 
+def app_record(gm, res):
+    # what the page keeps per claim: verdict + graph + readable trace
+    logs: list[str] = ["=== Agent Trace ==="]
+    for action, observation in res["steps"]:
+        logs.append(f"→ Tool: {action.tool}")
+        logs.append(f"   Input: {action.tool_input}")
+        logs.append(f"   Obs:   {observation or ''}")
+    logs.append("=== Ingestion ===")
+    logs.extend(res["logs"])
+    return {
+        "claim": res["claim"],
+        "claim_id": res["claim_id"],
+        "final_answer": res["final_answer"],
+        "verdict": res["verdict"],
+        "confidence": res["confidence"],
+        "graph_manager": gm,
+        "reused_from": res.get("reused_from"),
+        "logs": logs
+    }
+
 # --- Input Form ---
 with st.form("verify_form", clear_on_submit=False):
     user_input = st.text_area("Your claims here:", height=100)
+    direct = st.checkbox("Direct pipeline (faster: parallel search → fetch → summarize, no ReAct agent)")
+    reuse_evidence = st.checkbox("Reuse evidence of already verified similar claims", value=True)
+    workers = st.slider("Claims verified in parallel", min_value=1, max_value=8, value=4)
     submitted = st.form_submit_button("🔍 Verify Claims")
     if submitted and user_input.strip():
         claims = parse_claims(user_input)
-        agent = build_agent()
+        job_id = get_jobs().submit(
+            get_agent(direct), claims, get_graph(), workers=workers, record=app_record,
+            reuse=get_reuse() if reuse_evidence else None,
+        )
+        st.session_state.job_id = job_id
+        st.query_params["job"] = job_id
         st.session_state.results = {}  # reset previous results
 
-        for claim in claims:
-            gm = GraphManager()
-            logs: list[str] = []
-            support_scores, refute_scores = [], []
-
-            # Run agent
-            result = agent({"input": claim})
-            final_answer = result["output"]
-            steps = result["intermediate_steps"]
-
-            logs.append("=== Agent Trace ===")
-            for action, observation in steps:
-                tool = action.tool
-                inp = action.tool_input
-                obs = observation or ""
-                logs.append(f"→ Tool: {tool}")
-                logs.append(f"   Input: {inp}")
-                logs.append(f"   Obs:   {obs}")
-
-                if tool == "web_search":
-                    urls = extract_urls(obs)
-                    logs.append(f"   Parsed URLs ({len(urls)}):")
-                    for u in urls:
-                        logs.append(f"     • {u}")
-
-                elif tool == "document_fetcher":
-                    url = inp
-                    if obs.strip():
-                        doc_id = gm.add_document(url, obs)
-                        gm.add_edge(claim, doc_id, "cites")
-                        logs.append(f"   Ingested document: {url}")
-                    else:
-                        logs.append(f"   Skipped empty fetch for {url}")
-
-                elif tool == "summarize_and_classify":
-                    data = json.loads(obs)
-                    snippet_id = gm.add_snippet(
-                        summary=data["summary"],
-                        label=data["label"],
-                        score=data["score"]
-                    )
-                    rel = data["label"]
-                    if rel in ("supports", "refutes"):
-                        gm.add_edge(claim, snippet_id, rel)
-                        if rel == "supports":
-                            support_scores.append(data["score"])
-                        else:
-                            refute_scores.append(data["score"])
-                        logs.append(f"   → snippet {rel} ({data['score']:.2f})")
-                    else:
-                        logs.append("   → snippet neutral")
-
-            # Verdict
-            avg_sup = sum(support_scores)/len(support_scores) if support_scores else 0.0
-            avg_ref = sum(refute_scores)/len(refute_scores) if refute_scores else 0.0
-            if avg_sup > avg_ref:
-                verdict, conf = "Supported", avg_sup
-            elif avg_ref > avg_sup:
-                verdict, conf = "Refuted", avg_ref
-            else:
-                verdict, conf = "Inconclusive", max(avg_sup, avg_ref)
-
-            # Save results in session_state
-            st.session_state.results[claim] = {
-                "final_answer": final_answer,
-                "verdict": verdict,
-                "confidence": conf,
-                "graph_manager": gm,
-                "logs": logs
-            }
+_STEP_ICONS = {"running": "⏳", "done": "✓", "error": "✗"}
+_CLAIM_ICONS = {"queued": "…", "running": "⏳", "done": "✅", "error": "❌", "cancelled": "⛔"}
+
+@st.fragment(run_every=1.0)
+def job_progress(job_id):
+    # live view of a running job; reruns on its own every second without touching the rest of the page
+    job = get_jobs().get(job_id)
+    if job is None:
+        return
+    snap = job.snapshot()
+    if snap["done"]:
+        # show them in the order they were typed
+        st.session_state.results = {c.text: c.record for c in job.claims if c.record is not None}
+        st.session_state.job_id = None     # still in ?job= for a reload
+        st.rerun()
+
+    finished = sum(c["status"] not in ("queued", "running") for c in snap["claims"])
+    st.progress(snap["progress"], text=f"Job {job_id}: {finished}/{len(snap['claims'])} claim(s) done")
+    if st.button("Cancel", key=f"cancel_{job_id}", disabled=snap["cancelled"]):
+        get_jobs().cancel(job_id)
+
+    for c in snap["claims"]:
+        with st.expander(f"{_CLAIM_ICONS[c['status']]} {c['claim']} — {c['status']}", expanded=c["status"] == "running"):
+            for step in c["steps"]:
+                st.text(f"{_STEP_ICONS.get(step['state'], '?')} {step['tool']}: {str(step['input'])[:100]}")
+            for ev in c["evidence"]:
+                color = "darkgreen" if ev["label"] == "supports" else "darkred"
+                st.markdown(f"<span style='color:{color}'>• {ev['label']} ({ev['score']:.2f}) {ev['summary']}</span>", unsafe_allow_html=True)
+
+# --- Job Progress ---
+if st.session_state.job_id and not st.session_state.results:
+    job = get_jobs().get(st.session_state.job_id)
+    if job is None:
+        st.warning(f"Job {st.session_state.job_id} not found (finished jobs are kept for a limited time).")
+        st.session_state.job_id = None
+    else:
+        job_progress(job.id)
 
 # --- Display Results ---
 if st.session_state.results:
     for claim, data in st.session_state.results.items():
-        gm: GraphManager = data["graph_manager"]
-
         st.markdown("---")
         st.header(f"Claim: {claim}")
 
+        if "error" in data:
+            st.error(f"Verification failed: {data['error']}")
+            continue
+
+        gm: GraphManager = data["graph_manager"]
+        claim_id = data["claim_id"]
+
         # Colored headings
         st.markdown(f"<h3 style='color:blue'>Final Answer:</h3>", unsafe_allow_html=True)
         st.write(data["final_answer"])
 
+        if data.get("reused_from"):
+            st.info(f"Answered from an already verified claim: \"{data['reused_from']}\"")
         st.markdown(f"<h3 style='color:green'>Verdict:</h3> {data['verdict']} (confidence {data['confidence']:.2f})", unsafe_allow_html=True)
         st.markdown(f"<h4>Graph stats:</h4> {gm.stats()}", unsafe_allow_html=True)
 
         st.subheader("Top Supporting Snippets")
-        for summ, sc in gm.get_top_snippets(claim, "supports"):
+        for summ, sc in gm.get_top_snippets(claim_id, "supports"):
             st.markdown(f"<span style='color:darkgreen'>• ({sc:.2f}) {summ}</span>", unsafe_allow_html=True)
 
         st.subheader("Top Refuting Snippets")
-        for summ, sc in gm.get_top_snippets(claim, "refutes"):
+        for summ, sc in gm.get_top_snippets(claim_id, "refutes"):
             st.markdown(f"<span style='color:darkred'>• ({sc:.2f}) {summ}</span>", unsafe_allow_html=True)
 
         # Interactive graph commands
@@ -146,15 +176,15 @@ if st.session_state.results:
             key=f"cmd_{claim}"
         )
         if cmd in ("docs", "documents"):
-            doc_ids = [tgt for src, tgt, rel in gm.edges if src == claim and rel == "cites"]
-            if not doc_ids:
+            docs = gm.neighbors(claim_id, "cites")
+            if not docs:
                 st.info("No documents ingested.")
             else:
-                for did in doc_ids:
-                    st.write(f"• {gm.nodes[did]['properties']['url']}")
+                for doc in docs:
+                    st.write(f"• {doc.properties['url']}")
 
         elif cmd in ("supports", "support"):
-            snippets = gm.get_top_snippets(claim, "supports", k=len(gm.nodes))
+            snippets = gm.get_top_snippets(claim_id, "supports", k=None)
             if not snippets:
                 st.info("No supporting snippets.")
             else:
@@ -162,7 +192,7 @@ if st.session_state.results:
                     st.write(f"• ({sc:.2f}) {summ}")
 
         elif cmd in ("refutes", "refute"):
-            snippets = gm.get_top_snippets(claim, "refutes", k=len(gm.nodes))
+            snippets = gm.get_top_snippets(claim_id, "refutes", k=None)
             if not snippets:
                 st.info("No refuting snippets.")
             else:
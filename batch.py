@@ -0,0 +1,109 @@
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ingest import verify_claim, averify_claim
+from tools import http_client
+
+# Batch verification: many claims at once on a bounded worker pool.
+#   mode="thread" → ThreadPoolExecutor with `workers` threads (agent or pipeline)
+#   mode="async"  → one event loop, at most `workers` claims in flight (needs .acall)
+# Results are yielded as (index, record) as soon as each claim finishes,
+# or in input order with ordered=True. Provider quotas are enforced by the
+# rate limiters in tools/rate_limit.py, not here.
+
+_DONE = object()
+
+
+def batch_record(gm, res, k = 3):
+    # JSON-friendly summary of one verify_claim() result
+    claim_id = res["claim_id"]
+    return {
+        "claim": res["claim"],
+        "verdict": res["verdict"],
+        "confidence": round(res["confidence"], 4),
+        "final_answer": res["final_answer"],
+        "supports": [{"summary": s, "score": sc} for s, sc in gm.get_top_snippets(claim_id, "supports", k)],
+        "refutes":  [{"summary": s, "score": sc} for s, sc in gm.get_top_snippets(claim_id, "refutes", k)],
+        **({"reused_from": res["reused_from"]} if "reused_from" in res else {}),
+    }
+
+
+def _error_record(claim, exc):
+    return {"claim": claim, "verdict": "Error", "confidence": 0.0, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def _run_threads(agent, claims, gm, workers, record, reuse):
+    def one(claim):
+        lines = []
+        try:
+            res = verify_claim(agent, claim, gm, log=lines.append, reuse=reuse)
+            res["logs"] = lines
+            return record(gm, res)
+        except Exception as e:
+            return _error_record(claim, e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futs = {pool.submit(one, c): i for i, c in enumerate(claims)}
+        for fut in as_completed(futs):
+            yield futs[fut], fut.result()
+
+
+def _run_async(agent, claims, gm, workers, record, reuse):
+    # the event loop lives in a background thread; results come back through a queue
+    # so callers can keep consuming a plain generator.
+    out = queue.Queue()
+
+    async def one(i, claim, sem):
+        async with sem:
+            lines = []
+            try:
+                res = await averify_claim(agent, claim, gm, log=lines.append, reuse=reuse)
+                res["logs"] = lines
+                rec = record(gm, res)
+            except Exception as e:
+                rec = _error_record(claim, e)
+        out.put((i, rec))
+
+    async def main():
+        sem = asyncio.Semaphore(workers)
+        try:
+            await asyncio.gather(*(one(i, c, sem) for i, c in enumerate(claims)))
+        finally:
+            await http_client.aclose()
+
+    def runner():
+        try:
+            asyncio.run(main())
+        finally:
+            out.put(_DONE)
+
+    threading.Thread(target=runner, daemon=True).start()
+    while True:
+        item = out.get()
+        if item is _DONE:
+            break
+        yield item
+
+
+def _in_order(results):
+    # holds back finished results until everything before them is done
+    pending = {}
+    nxt = 0
+    for i, rec in results:
+        pending[i] = rec
+        while nxt in pending:
+            yield nxt, pending.pop(nxt)
+            nxt += 1
+
+
+def run_batch(agent, claims, gm, workers = 4, mode = "thread", ordered = False, record = batch_record, reuse = None):
+    # record(gm, res) turns a verify_claim() result (+ res["logs"]) into what gets yielded
+    # reuse = EvidenceReuse(gm) answers near-duplicates of stored claims from the graph
+    if mode not in ("thread", "async"):
+        raise ValueError(f"unknown batch mode: {mode!r}")
+    workers = max(1, workers)
+    runner = _run_async if mode == "async" else _run_threads
+    results = runner(agent, list(claims), gm, workers, record, reuse)
+    return _in_order(results) if ordered else results
@@ -0,0 +1,244 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, parse_qs, quote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-ins for every remote the fact-checker talks to, so benchmarks run offline.
+#   GET  /search                          SerpAPI google_news JSON (fixtures/search.json)
+#   GET  /pages/<i>.html?q=<claim>        a news article about the claim (fixtures/article.html)
+#   POST /openai/v1/chat/completions      Groq (OpenAI-compatible): summarize_and_classify, single + batched
+#   POST /v1/completions                  OpenAI completions for the ReAct agent (scripted ReAct turns)
+# Every route sleeps for its injected latency (+ jitter) first. Answers are deterministic:
+# the same claim / passage always gets the same pages, labels and scores.
+#
+# Point the tools at it with SERPAPI_URL=<base>/search, GROQ_BASE_URL=<base>,
+# OPENAI_API_BASE=<base>/v1 (bench/run.py does this).
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_FILLER = (
+    "Researchers who looked at the question say the evidence has to be read with care.",
+    "Several experts interviewed for this story gave different accounts of the history.",
+    "Records from the period are incomplete, which is part of why the idea keeps spreading.",
+    "Social media posts repeating the statement have been shared thousands of times this year.",
+    "Independent fact-checkers have examined similar statements in the past.",
+    "Officials did not respond to a request for comment before publication.",
+)
+_OFF_TOPIC = (
+    "Stocks closed higher on Tuesday as investors weighed new inflation figures.",
+    "Energy shares led the gains while technology companies lagged behind the wider index.",
+    "Analysts expect the central bank to keep interest rates unchanged at its next meeting.",
+)
+
+
+def _digest(*parts):
+    return int(hashlib.sha256("\0".join(map(str, parts)).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def parse_latency(spec):
+    # "search=0.3,page=0.2,llm=0.5,agent=0.8" -> {route: seconds}
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            out[name.strip()] = float(value)
+    return out
+
+
+class FakeProviders(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, host = "127.0.0.1", port = 0, latency = None, jitter = 0.2, bad_rate = 0.15, seed = 0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency or {}
+        self.jitter = jitter
+        self.bad_rate = bad_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.server_time = defaultdict(float)
+        with open(os.path.join(FIXTURES, "search.json"), encoding="utf-8") as f:
+            self.search_fixture = f.read()
+        with open(os.path.join(FIXTURES, "article.html"), encoding="utf-8") as f:
+            self.article_fixture = f.read()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # hedged / cancelled requests hang up mid-answer; that is expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def pause(self, route):
+        base = self.latency.get(route, 0.0)
+        if base <= 0:
+            return
+        with self.lock:
+            factor = 1 + self.rng.uniform(-self.jitter, self.jitter)
+        time.sleep(base * factor)
+
+    def count(self, route, seconds):
+        with self.lock:
+            self.requests[route] += 1
+            self.server_time[route] += seconds
+
+    def stats(self):
+        with self.lock:
+            return {r: {"requests": n, "avg_ms": round(1000 * self.server_time[r] / n, 1)} for r, n in self.requests.items()}
+
+    # ---- content -------------------------------------------------------------------
+
+    def search(self, query):
+        text = self.search_fixture.replace("{query}", query.replace('"', "'"))
+        data = json.loads(text)
+        for i, item in enumerate(data.get("news_results", [])):
+            item["link"] = f"{self.base_url}/pages/{i}.html?q={quote(query)}"
+        return data
+
+    def page(self, claim, i, last):
+        # -> (status, html). the last result is off topic, some pages are broken
+        if _digest("bad", claim, i) % 1000 < self.bad_rate * 1000:
+            if _digest("kind", claim, i) % 2:
+                return 404, "<html><body><p>Page not found</p></body></html>"
+            return 200, "<html><body><p>Please enable JavaScript.</p></body></html>"
+        if last:
+            title, sentences = "Markets today", list(_OFF_TOPIC) * 2
+        else:
+            title = f"Report {i}: {claim}"
+            sentences = []
+            for j in range(8):
+                pick = _digest(claim, i, j)
+                sentences.append(_FILLER[pick % len(_FILLER)])
+                if pick % 3 == 0:
+                    sentences.append(f"The claim that {claim.lower()} has been examined by reporters.")
+        paras = []
+        for j in range(0, len(sentences), 2):
+            paras.append(f"      <p>{' '.join(sentences[j:j + 2])} {sentences[0]}</p>")
+        paras.insert(1, f"      <p>Many readers asked us whether {claim.lower()}. Here is what the record shows about it.</p>")
+        return 200, self.article_fixture.replace("{title}", title).replace("{paragraphs}", "\n".join(paras))
+
+    def classify(self, passage):
+        pick = _digest("label", passage)
+        label = "supports" if pick % 5 < 2 else "refutes"
+        score = round(0.55 + (pick % 40) / 100, 2)
+        first = " ".join(passage.split()[:30])
+        return {"summary": f"The article says: {first}...", "label": label, "score": score}
+
+    def chat(self, messages):
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+        passages = re.findall(r'Passage(?: \d+)?:\n"""\n(.*?)\n"""', user, re.S)
+        if "numbered passages" in system:
+            results = [{"index": i, **self.classify(p)} for i, p in enumerate(passages)]
+            return json.dumps({"results": results})
+        return json.dumps(self.classify(passages[0] if passages else user))
+
+    def react(self, prompt):
+        # next turn of a zero-shot ReAct agent, read off the scratchpad in the prompt
+        question = prompt.rsplit("Question:", 1)[-1]
+        claim = question.split("\n", 1)[0].strip()
+        turns = re.findall(r"Action: (\w+)\nAction Input: (.*?)\nObservation: (.*?)(?=\nThought:|\Z)", question, re.S)
+        urls, fetched, summaries = [], [], 0
+        last_text = None
+        for tool, inp, obs in turns:
+            if tool == "web_search":
+                urls = [u.strip() for u in obs.strip().splitlines() if u.strip().startswith("http")]
+            elif tool == "document_fetcher":
+                fetched.append(inp.strip())
+                last_text = obs.strip() if len(obs.strip()) >= 100 else None
+            elif tool == "summarize_and_classify":
+                summaries += 1
+                last_text = None
+        if not turns:
+            return f" I should search for news about the claim.\nAction: web_search\nAction Input: {claim}"
+        if last_text and turns[-1][0] == "document_fetcher":
+            text = " ".join(last_text.split())
+            return f" The article is usable, I will summarize it.\nAction: summarize_and_classify\nAction Input: {text}"
+        remaining = [u for u in urls if u not in fetched]
+        if summaries >= 3 or not remaining:
+            return f" I now know the final answer.\nFinal Answer: Checked {summaries} article(s) about the claim."
+        return f" I should fetch the next article.\nAction: document_fetcher\nAction Input: {remaining[0]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status, body, ctype = "application/json"):
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        srv = self.server
+        if parts.path == "/search":
+            srv.pause("search")
+            self._send(200, srv.search(query.get("q", [""])[0]))
+            srv.count("search", time.perf_counter() - start)
+            return
+        m = re.fullmatch(r"/pages/(\d+)\.html", parts.path)
+        if m:
+            srv.pause("page")
+            i = int(m.group(1))
+            n = len(json.loads(srv.search_fixture).get("news_results", []))
+            status, html = srv.page(query.get("q", [""])[0], i, last=i == n - 1)
+            self._send(status, html, "text/html; charset=utf-8")
+            srv.count("page", time.perf_counter() - start)
+            return
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        srv = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        now = int(time.time())
+        if self.path.endswith("/chat/completions"):
+            srv.pause("llm")
+            content = srv.chat(body.get("messages", []))
+            self._send(200, {
+                "id": f"chatcmpl-{_digest(content)}", "object": "chat.completion", "created": now,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": length // 4, "completion_tokens": len(content) // 4, "total_tokens": (length + len(content)) // 4},
+            })
+            srv.count("llm", time.perf_counter() - start)
+            return
+        if self.path.endswith("/completions"):
+            srv.pause("agent")
+            prompts = body.get("prompt", "")
+            prompts = prompts if isinstance(prompts, list) else [prompts]
+            choices = [
+                {"index": i, "text": srv.react(p), "finish_reason": "stop", "logprobs": None}
+                for i, p in enumerate(prompts)
+            ]
+            self._send(200, {
+                "id": f"cmpl-{now}", "object": "text_completion", "created": now, "model": body.get("model", "fake"),
+                "choices": choices,
+                "usage": {"prompt_tokens": length // 4, "completion_tokens": 50, "total_tokens": length // 4 + 50},
+            })
+            srv.count("agent", time.perf_counter() - start)
+            return
+        self._send(404, {"error": "not found"})
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import statistics
+import tracemalloc
+from collections import defaultdict
+
+# Offline throughput benchmark: every provider is replaced by bench/fakes.py on localhost
+# (recorded-style SerpAPI JSON, article HTML, Groq / OpenAI answers) with injected latency,
+# so it runs with no network and no API keys, and the numbers are comparable between runs.
+#
+#   python bench/run.py                                        # direct pipeline, 1/4/8 claims at once
+#   python bench/run.py --concurrency 1,8,16 --mode async --latency search=0.5,page=0.3,llm=0.8
+#   python bench/run.py --agent --concurrency 1,4              # ReAct agent against a scripted fake OpenAI
+#   python bench/run.py --claims requests.jsonl --json out.json
+#
+# Reports per stage (search / fetch / summarize, + agent LLM turns) latency, claims/sec per
+# concurrency level and peak memory. Caches start empty for every level.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import FakeProviders, parse_latency   # noqa: E402  (bench/ is on sys.path when run as a script)
+
+DEFAULT_LATENCY = "search=0.3,page=0.2,llm=0.6,agent=0.4"
+
+
+def read_claims(path, limit):
+    # .jsonl → the "claim" (or "title") field of every line, anything else → one claim per line
+    claims = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                row = json.loads(line)
+                line = row.get("claim") or row.get("title") or ""
+            if line:
+                claims.append(line)
+    return claims[:limit] if limit else claims
+
+
+def offline_env(base_url, cache_dir):
+    # has to be in place before the tools are imported (they read it at import time)
+    os.environ.update({
+        "SERPAPI_URL": f"{base_url}/search",
+        "GROQ_BASE_URL": base_url,
+        "OPENAI_API_BASE": f"{base_url}/v1",
+        "SERPAPI_API_KEY": "offline", "GROQ_API_KEY": "offline", "OPENAI_API_KEY": "offline",
+        "FACTCHECK_CACHE_DIR": cache_dir,
+        "FACTCHECK_GRAPH_DB": "",
+        "SERPAPI_RPM": "0", "OPENAI_RPM": "0", "GROQ_RPM": "0",
+        # every fake site lives on 127.0.0.1, so the per-host caps would serialize them
+        "HTTP_MAX_PER_HOST": "64", "HTTP_MAX_CONNECTIONS": "128", "HTTP_MAX_IN_FLIGHT": "128",
+    })
+
+
+class StageTimer:
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+        return timed
+
+    def awrap(self, stage, fn):
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+        return timed
+
+    def report(self):
+        out = {}
+        for stage, xs in sorted(self.samples.items()):
+            xs = sorted(xs)
+            out[stage] = {
+                "calls": len(xs),
+                "p50_ms": round(1000 * statistics.median(xs), 1),
+                "p95_ms": round(1000 * xs[min(len(xs) - 1, int(0.95 * len(xs)))], 1),
+                "total_s": round(sum(xs), 2),
+            }
+        self.samples.clear()
+        return out
+
+
+def instrument(timer):
+    # time the tool calls where the pipeline / agent make them
+    import pipeline
+    from tools import web_search, document_fetcher, summarizer
+
+    for name, stage in (("search_news", "search"), ("fetch", "fetch"),
+                        ("summarize_and_classify", "summarize"), ("summarize_and_classify_batch", "summarize_batch")):
+        setattr(pipeline, name, timer.wrap(stage, getattr(pipeline, name)))
+    for name, stage in (("asearch_news", "search"), ("afetch", "fetch"),
+                        ("asummarize_and_classify", "summarize"), ("asummarize_and_classify_batch", "summarize_batch")):
+        setattr(pipeline, name, timer.awrap(stage, getattr(pipeline, name)))
+    for tool, stage in ((web_search.web_search_tool, "search"), (document_fetcher.document_fetcher_tool, "fetch"),
+                        (summarizer.summarizer_tool, "summarize")):
+        tool.func = timer.wrap(stage, tool.func)
+
+
+def reset_caches():
+    from tools import web_search, document_fetcher, summarizer
+    web_search._search_cache.purge()
+    document_fetcher._doc_cache.purge()
+    summarizer._memo.purge()
+
+
+def run_level(agent, claims, workers, mode):
+    from batch import run_batch
+    from graph.graph_manager import GraphManager
+
+    gm = GraphManager()
+    verdicts = defaultdict(int)
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    for _i, rec in run_batch(agent, claims, gm, workers=workers, mode=mode):
+        verdicts[rec["verdict"]] += 1
+    elapsed = time.perf_counter() - start
+    _cur, peak = tracemalloc.get_traced_memory()
+    return {
+        "claims": len(claims),
+        "seconds": round(elapsed, 2),
+        "claims_per_sec": round(len(claims) / elapsed, 3),
+        "verdicts": dict(verdicts),
+        "peak_traced_mb": round(peak / 1024 / 1024, 1),
+        "graph": gm.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline fact-checker benchmark (fake providers on localhost)")
+    parser.add_argument("--claims", default=os.path.join(ROOT, "bench", "fixtures", "claims.txt"),
+                        help="claim corpus: text file (one per line) or .jsonl with a claim/title field")
+    parser.add_argument("--limit", type=int, default=0, help="use only the first N claims")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma separated worker counts")
+    parser.add_argument("--mode", choices=("thread", "async"), default="thread")
+    parser.add_argument("--agent", action="store_true", help="ReAct agent (thread mode) instead of the direct pipeline")
+    parser.add_argument("--hedge", type=int, default=0, help="direct pipeline hedge (extra candidate urls)")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help="injected latency per route in seconds: search,page,llm,agent")
+    parser.add_argument("--jitter", type=float, default=0.2, help="± fraction of random jitter on the latency")
+    parser.add_argument("--bad-rate", type=float, default=0.15, help="share of broken article pages (404 / empty)")
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    args = parser.parse_args()
+    if args.agent and args.mode == "async":
+        parser.error("--agent runs in thread mode only")
+
+    claims = read_claims(args.claims, args.limit)
+    if not claims:
+        parser.error("no claims to run")
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+
+    fakes = FakeProviders(latency=parse_latency(args.latency), jitter=args.jitter, bad_rate=args.bad_rate).start()
+    cache_dir = tempfile.mkdtemp(prefix="factcheck-bench-")
+    offline_env(fakes.base_url, cache_dir)
+    tracemalloc.start()
+
+    try:
+        timer = StageTimer()
+        instrument(timer)
+        if args.agent:
+            from verify import build_agent
+            agent = build_agent(verbose=False)
+        else:
+            from pipeline import build_pipeline
+            agent = build_pipeline(hedge=args.hedge)
+
+        # one untimed claim first: lazy imports (newspaper, groq, ...) and connection set-up
+        run_level(agent, claims[:1], 1, "thread" if args.agent else args.mode)
+        timer.report()
+
+        report = {
+            "claims": len(claims), "mode": "agent" if args.agent else f"direct/{args.mode}",
+            "latency": parse_latency(args.latency), "levels": {},
+        }
+        for workers in levels:
+            reset_caches()
+            level = run_level(agent, claims, workers, "thread" if args.agent else args.mode)
+            level["stages"] = timer.report()
+            level["fake_providers"] = fakes.stats()
+            fakes.requests.clear()
+            fakes.server_time.clear()
+            report["levels"][workers] = level
+            print(f"workers={workers:<3} {level['claims_per_sec']:>7.3f} claims/s  {level['seconds']:>7.2f}s  "
+                  f"peak {level['peak_traced_mb']} MB  {level['verdicts']}", flush=True)
+            for stage, s in level["stages"].items():
+                print(f"    {stage:<16} calls={s['calls']:<5} p50={s['p50_ms']:>8.1f}ms  p95={s['p95_ms']:>8.1f}ms", flush=True)
+        # ru_maxrss is in KiB on Linux
+        report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        print(f"peak RSS {report['peak_rss_mb']} MB")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        fakes.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
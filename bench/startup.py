@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Startup-time benchmark: every run is a fresh interpreter, so imports are really cold
+# (apart from the OS file cache).
+#   import  → time to `import verify` / `import app` (streamlit runs the page in bare mode)
+#   first   → building the agent + verifying one claim right after the import
+#             (calls the real providers with the keys in .env; --direct skips OpenAI)
+#
+#   python bench/startup.py --runs 5
+#   python bench/startup.py --runs 3 --first-request --direct --claim "Area 51 has active UFO research"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import sys, json, time
+sys.argv = [sys.argv[0]]
+t0 = time.perf_counter()
+import {module} as m
+out = {{"import": time.perf_counter() - t0}}
+if {first}:
+    from ingest import verify_claim
+    t1 = time.perf_counter()
+    if "{module}" == "app":
+        agent, gm = m.get_agent({direct}), m.get_graph()
+    else:
+        from graph.graph_manager import GraphManager
+        agent = m.build_pipeline() if {direct} else m.build_agent(verbose=False)
+        gm = GraphManager()
+    out["build"] = time.perf_counter() - t1
+    try:
+        verify_claim(agent, {claim!r}, gm, log=lambda *a: None)
+        out["ok"] = True
+    except Exception as e:
+        out["ok"] = False
+        out["error"] = repr(e)[:200]
+    out["first"] = time.perf_counter() - t1
+print("BENCH " + json.dumps(out))
+"""
+
+
+def run_once(module, first, direct, claim):
+    code = _CHILD.format(module=module, first=first, direct=direct, claim=claim)
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            return json.loads(line[6:])
+    raise RuntimeError(f"{module}: {proc.stderr.strip().splitlines()[-1:] or proc.returncode}")
+
+
+def summarize(values):
+    values = sorted(values)
+    return {"min": round(values[0], 3), "median": round(statistics.median(values), 3), "max": round(values[-1], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark of verify.py and app.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", default="verify,app", help="comma separated: verify, app")
+    parser.add_argument("--first-request", action="store_true", help="Also time building the agent + one claim")
+    parser.add_argument("--direct", action="store_true", help="Use the direct pipeline for the first request")
+    parser.add_argument("--claim", default="The Eiffel Tower is painted every 7 years")
+    args = parser.parse_args()
+
+    report = {}
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        try:
+            runs = [run_once(module, args.first_request, args.direct, args.claim) for _ in range(args.runs)]
+        except RuntimeError as e:
+            report[module] = {"error": str(e)}
+            continue
+        rep = {"import_s": summarize([r["import"] for r in runs])}
+        if args.first_request:
+            rep["build_s"] = summarize([r["build"] for r in runs])
+            rep["first_request_s"] = summarize([r["first"] for r in runs])
+            errors = [r["error"] for r in runs if not r["ok"]]
+            if errors:
+                rep["errors"] = errors[:1]
+        report[module] = rep
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+# graph/columnar.py
+
+import os
+import json
+import time
+import shutil
+import argparse
+
+import numpy as np
+
+# Bulk export / import of an evidence graph (GraphManager or SQLiteGraphManager) as
+# plain NumPy columns, for offline analytics (nightly accuracy reports) and for loading
+# the evidence into another process. One directory:
+#   meta.json           counts, format version, the code tables below
+#   node_id.npy         int64   original node id
+#   node_label.npy      int8    code into meta["labels"]            (Claim / Document / Snippet)
+#   node_tag.npy        int8    code into meta["tags"], -1 = none   (claim verdict / snippet label)
+#   node_score.npy      float32 claim confidence / snippet score / document relevance, NaN = none
+#   node_time.npy       float64 claim verified_at, NaN = none
+#   node_text.npy       int32   string: claim text / document url / snippet summary
+#   node_extra.npy      int32   string: JSON of the remaining properties, -1 = none
+#   node_body.npy       int32   string: document text (only with include_text), -1 = none
+#   edge_src.npy, edge_tgt.npy   int32/int64 row numbers into the node columns
+#   edge_rel.npy        int8    code into meta["relations"]
+#   strings.bin + string_offsets.npy   UTF-8 string table (string i = bytes[off[i]:off[i+1]])
+# Everything loads memory-mapped (no copy, no parsing), and the queries below work on
+# whole columns at once instead of walking nodes.
+#
+#   python -m graph.columnar export out/ --graph-db cache/factcheck/graph.sqlite
+#   python -m graph.columnar report out/ --k 3
+
+FORMAT_VERSION = 1
+LABELS = ("Claim", "Document", "Snippet")
+TAGS = ("Supported", "Refuted", "Inconclusive", "supports", "refutes")
+RELATIONS = ("cites", "supports", "refutes")
+
+# the property that goes into node_text, per label
+_TEXT = {"Claim": "text", "Document": "url", "Snippet": "summary"}
+# properties that have their own column; everything else goes into node_extra
+_COLUMNS = {"text", "url", "summary", "verdict", "label", "confidence", "score", "relevance", "verified_at"}
+
+
+class _Strings:
+
+    def __init__(self):
+        self._index = {}
+        self._blobs = []
+
+    def add(self, s):
+        # -> index of s in the table (equal strings are stored once)
+        if s is None:
+            return -1
+        i = self._index.get(s)
+        if i is None:
+            i = self._index[s] = len(self._blobs)
+            self._blobs.append(s.encode("utf-8"))
+        return i
+
+    def save(self, path):
+        offsets = np.zeros(len(self._blobs) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, self._blobs), dtype=np.int64, count=len(self._blobs)), out=offsets[1:])
+        np.save(os.path.join(path, "string_offsets.npy"), offsets)
+        with open(os.path.join(path, "strings.bin"), "wb") as f:
+            for b in self._blobs:
+                f.write(b)
+
+
+def _code(table, value):
+    try:
+        return table.index(value)
+    except ValueError:
+        return -1
+
+
+def export_graph(gm, path, include_text = False):
+    # write gm to the directory path (replaced as a whole); -> meta dict
+    strings = _Strings()
+    labels, relations, tags = list(LABELS), list(RELATIONS), list(TAGS)
+    ids, label, tag, score, when, text, extra, body = [], [], [], [], [], [], [], []
+
+    for node in gm.iter_nodes():
+        p = node.properties
+        if node.label not in labels:
+            labels.append(node.label)
+        ids.append(node.id)
+        label.append(labels.index(node.label))
+        value = p.get("verdict") if node.label == "Claim" else p.get("label")
+        if value is not None and value not in tags:
+            tags.append(value)
+        tag.append(_code(tags, value))
+        s = p.get("confidence", p.get("score", p.get("relevance")))
+        score.append(np.nan if s is None else s)
+        when.append(p.get("verified_at", np.nan))
+        text.append(strings.add(p.get(_TEXT.get(node.label, "text"))))
+        rest = {k: v for k, v in p.items() if k not in _COLUMNS}
+        extra.append(strings.add(json.dumps(rest)) if rest else -1)
+        body.append(strings.add(gm.get_text(node.id)) if include_text and node.label == "Document" else -1)
+
+    row = {node_id: i for i, node_id in enumerate(ids)}
+    src, tgt, rel = [], [], []
+    for s_id, t_id, r in gm.iter_edges():
+        if s_id not in row or t_id not in row:
+            continue    # dangling edge
+        if r not in relations:
+            relations.append(r)
+        src.append(row[s_id])
+        tgt.append(row[t_id])
+        rel.append(relations.index(r))
+
+    tmp = path.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    index_type = np.int32 if len(ids) < 2 ** 31 else np.int64
+    columns = {
+        "node_id": np.asarray(ids, dtype=np.int64),
+        "node_label": np.asarray(label, dtype=np.int8),
+        "node_tag": np.asarray(tag, dtype=np.int8),
+        "node_score": np.asarray(score, dtype=np.float32),
+        "node_time": np.asarray(when, dtype=np.float64),
+        "node_text": np.asarray(text, dtype=np.int32),
+        "node_extra": np.asarray(extra, dtype=np.int32),
+        "node_body": np.asarray(body, dtype=np.int32),
+        "edge_src": np.asarray(src, dtype=index_type),
+        "edge_tgt": np.asarray(tgt, dtype=index_type),
+        "edge_rel": np.asarray(rel, dtype=np.int8),
+    }
+    for name, arr in columns.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+    strings.save(tmp)
+    meta = {
+        "version": FORMAT_VERSION,
+        "exported_at": time.time(),
+        "nodes": len(ids),
+        "edges": len(src),
+        "labels": labels,
+        "tags": tags,
+        "relations": relations,
+        "include_text": include_text,
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # swap the finished export in, so readers never see half of one
+    old = path.rstrip("/") + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+class ColumnarGraph:
+
+    # read side of an export: every column as a (memory-mapped) array attribute,
+    # e.g. g.node_score, g.edge_src; strings are decoded on access with g.string(i)
+
+    def __init__(self, path, mmap = True):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported export version {self.meta.get('version')} in {path}")
+        mode = "r" if mmap else None
+        for name in ("node_id", "node_label", "node_tag", "node_score", "node_time", "node_text",
+                     "node_extra", "node_body", "edge_src", "edge_tgt", "edge_rel", "string_offsets"):
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode))
+        blob = os.path.join(path, "strings.bin")
+        if os.path.getsize(blob) == 0:
+            self._strings = np.zeros(0, dtype=np.uint8)
+        elif mmap:
+            self._strings = np.memmap(blob, dtype=np.uint8, mode="r")
+        else:
+            self._strings = np.fromfile(blob, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.node_id)
+
+    def string(self, i):
+        if i < 0:
+            return None
+        start, end = self.string_offsets[i], self.string_offsets[i + 1]
+        return self._strings[start:end].tobytes().decode("utf-8")
+
+    def label_code(self, name):
+        return _code(self.meta["labels"], name)
+
+    def tag_code(self, name):
+        return _code(self.meta["tags"], name)
+
+    def relation_code(self, name):
+        return _code(self.meta["relations"], name)
+
+    def properties(self, row):
+        # the node's properties dict, as it was in the graph (document text excluded)
+        label = self.meta["labels"][self.node_label[row]]
+        tag = self.node_tag[row]
+        score = float(self.node_score[row])
+        p = json.loads(self.string(self.node_extra[row]) or "{}")
+        text = self.string(self.node_text[row])
+        if label == "Claim":
+            p["text"] = text
+            if tag >= 0:
+                p["verdict"] = self.meta["tags"][tag]
+            if not np.isnan(score):
+                p["confidence"] = score
+            if not np.isnan(self.node_time[row]):
+                p["verified_at"] = float(self.node_time[row])
+        elif label == "Document":
+            p["url"] = text
+            if not np.isnan(score):
+                p["relevance"] = score
+        elif label == "Snippet":
+            p.update(summary=text, label=self.meta["tags"][tag] if tag >= 0 else None, score=score)
+        return p
+
+    # ---- vectorized queries ------------------------------------------------------------
+
+    def top_snippets(self, relation = "supports", k = 3):
+        # top-k snippets per claim by score, for every claim at once.
+        # -> (claim rows, snippet rows, scores), grouped by claim, best first within a claim
+        mask = self.edge_rel == self.relation_code(relation)
+        src = np.asarray(self.edge_src[mask])
+        tgt = np.asarray(self.edge_tgt[mask])
+        keep = self.node_label[tgt] == self.label_code("Snippet")
+        src, tgt = src[keep], tgt[keep]
+        scores = np.asarray(self.node_score)[tgt]
+        order = np.lexsort((-scores, src))
+        src, tgt, scores = src[order], tgt[order], scores[order]
+        if not len(src):
+            return src, tgt, scores
+        # rank inside each claim's run of edges
+        starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+        rank = np.arange(len(src)) - np.repeat(starts, np.diff(np.r_[starts, len(src)]))
+        top = rank < k
+        return src[top], tgt[top], scores[top]
+
+    def verdicts(self):
+        # {verdict: number of claims}
+        claims = self.node_label == self.label_code("Claim")
+        codes, counts = np.unique(self.node_tag[claims], return_counts=True)
+        return {(self.meta["tags"][c] if c >= 0 else None): int(n) for c, n in zip(codes, counts)}
+
+    def evidence_counts(self, relation):
+        # number of snippets linked by relation, per node row (0 for non-claims)
+        mask = self.edge_rel == self.relation_code(relation)
+        return np.bincount(np.asarray(self.edge_src[mask]), minlength=len(self))
+
+    def report(self, k = 3):
+        # summary numbers for the nightly accuracy report
+        claims = np.flatnonzero(self.node_label == self.label_code("Claim"))
+        sup = self.evidence_counts("supports")[claims]
+        ref = self.evidence_counts("refutes")[claims]
+        conf = np.asarray(self.node_score)[claims]
+        out = {
+            "claims": int(len(claims)),
+            "documents": int(np.count_nonzero(self.node_label == self.label_code("Document"))),
+            "snippets": int(np.count_nonzero(self.node_label == self.label_code("Snippet"))),
+            "verdicts": self.verdicts(),
+            "mean_confidence": float(np.nanmean(conf)) if np.any(~np.isnan(conf)) else None,
+            "claims_without_evidence": int(np.count_nonzero(sup + ref == 0)),
+            "claims_with_conflicting_evidence": int(np.count_nonzero((sup > 0) & (ref > 0))),
+        }
+        for relation in ("supports", "refutes"):
+            _c, _s, scores = self.top_snippets(relation, k)
+            out[f"top{k}_{relation}_mean_score"] = float(scores.mean()) if len(scores) else None
+        return out
+
+
+def load_graph(path, mmap = True):
+    return ColumnarGraph(path, mmap=mmap)
+
+
+def import_graph(path, gm):
+    # add an export to gm (any graph manager); node ids are re-assigned. -> {old id: new id}
+    # Safe to repeat: documents without exported text keep their stored text, and snippets
+    # and edges gm already has (same parent, summary, label and score) are not added again.
+    g = ColumnarGraph(path)
+    labels, relations = g.meta["labels"], g.meta["relations"]
+    with_text = g.meta.get("include_text", False)
+    ids = np.asarray(g.node_id)
+    edges = list(zip(g.edge_src.tolist(), g.edge_tgt.tolist(), g.edge_rel.tolist()))
+    parents = {}    # snippet row → [(parent row, relation)]
+    for s, t, r in edges:
+        parents.setdefault(t, []).append((s, relations[r]))
+    new_ids = {}
+    # claims and documents first, so that snippets can be matched against their parents
+    rows = sorted(range(len(g)), key=lambda row: labels[g.node_label[row]] == "Snippet")
+    for row in rows:
+        label = labels[g.node_label[row]]
+        p = g.properties(row)
+        if label == "Claim":
+            nid = gm.add_claim(p.pop("text"))
+        elif label == "Document":
+            if with_text:
+                nid = gm.add_document(p.pop("url"), g.string(g.node_body[row]) or "")
+                p.pop("chars", None)
+            else:
+                nid = gm.add_document(p.pop("url"))
+                if "chars" in gm.get_node(nid).properties:
+                    p.pop("chars", None)    # a stored document: its text and length stay
+        elif label == "Snippet":
+            nid = _existing_snippet(gm, p, [(new_ids.get(int(ids[s])), rel) for s, rel in parents.get(row, ())])
+            if nid is None:
+                nid = gm.add_snippet(p["summary"], p["label"], p["score"])
+            for key in ("summary", "label", "score"):
+                p.pop(key)
+        else:
+            continue
+        if p:
+            gm.set_properties(nid, **p)
+        new_ids[int(ids[row])] = nid
+    for s, t, r in edges:
+        src, tgt = new_ids.get(int(ids[s])), new_ids.get(int(ids[t]))
+        if src is None or tgt is None:
+            continue
+        if any(str(n.id) == str(tgt) for n in gm.neighbors(src, relations[r])):
+            continue
+        gm.add_edge(src, tgt, relations[r])
+    return new_ids
+
+
+def _existing_snippet(gm, p, parents):
+    # id of a snippet gm already links from one of the (new parent id, relation) pairs, or None
+    # (scores went through float32, so they are compared with a tolerance)
+    for parent, rel in parents:
+        if parent is None:
+            continue
+        for n in gm.neighbors(parent, rel):
+            q = n.properties
+            if (n.label == "Snippet" and q.get("summary") == p["summary"] and q.get("label") == p["label"]
+                    and abs(float(q.get("score") or 0.0) - p["score"]) < 1e-6):
+                return str(n.id)
+    return None
+
+
+def main():
+    from graph.sqlite_graph import open_graph
+
+    parser = argparse.ArgumentParser(description="Columnar export / import of the evidence graph")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    exp = sub.add_parser("export", help="write the graph to a directory of NumPy columns")
+    exp.add_argument("out")
+    exp.add_argument("--graph-db", metavar="PATH", help="SQLite graph to export (default: $FACTCHECK_GRAPH_DB)")
+    exp.add_argument("--text", action="store_true", help="include the article text of every document")
+    imp = sub.add_parser("import", help="add an export to a SQLite graph")
+    imp.add_argument("src")
+    imp.add_argument("--graph-db", metavar="PATH", required=True)
+    rep = sub.add_parser("report", help="print summary numbers of an export as JSON")
+    rep.add_argument("src")
+    rep.add_argument("--k", type=int, default=3, help="top-k snippets per claim (default 3)")
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        print(json.dumps(export_graph(open_graph(args.graph_db), args.out, include_text=args.text), indent=2))
+    elif args.cmd == "import":
+        print(f"imported {len(import_graph(args.src, open_graph(args.graph_db)))} nodes")
+    else:
+        print(json.dumps(ColumnarGraph(args.src).report(k=args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,272 @@
+# graph/graph_manager.py
+
 import os
-from dotenv import load_dotenv
+import sys
+import time
+import heapq
+import threading
+from collections import Counter, deque
 
-load_dotenv()                           # reads .env into process-env
-SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+from graph.text_store import TextStore
 
+# Node ids are handed out as strings ("1", "2", ...) like before, but stored as ints.
+# Edges live in adjacency lists keyed by (src, relation), so looking up a claim's
+# documents / snippets only touches that claim's edges instead of scanning all of them.
+#
+# Long-running processes (the app, service.py): the graph stays within a memory budget.
+#   - article text is not kept in the Document properties but in a TextStore
+#     (compressed, spilled to disk past GRAPH_TEXT_RAM_MB) → get_text(doc_id)
+#   - Document / Snippet nodes older than GRAPH_TTL_HOURS are dropped, and once the
+#     graph holds more than GRAPH_MAX_MB the oldest of them go first, together with
+#     their edges. Claims (text + verdict) are small and always kept.
+#   - compact() rebuilds the node / edge indexes and the spill file after evictions
+#   - stats()["bytes"] estimates the RAM taken per node label
+
+GRAPH_MAX_MB = float(os.getenv("GRAPH_MAX_MB", "256"))        # 0 = no budget
+GRAPH_TTL_HOURS = float(os.getenv("GRAPH_TTL_HOURS", "0"))     # 0 = no expiry
+LOW_WATER = 0.9         # evict down to 90% of the budget, so it doesnt run on every add
+SWEEP_EVERY = 60.0      # seconds between TTL sweeps
+EVICTABLE = ("Document", "Snippet")
+NODE_OVERHEAD = 120     # the Node object (3 slots) and its entry in the id → node dict
+
+
+def _node_bytes(properties):
+    # rough RAM estimate of a Node: the object, its property dict, keys and values
+    n = NODE_OVERHEAD + sys.getsizeof(properties)
+    for k, v in properties.items():
+        n += sys.getsizeof(k) + sys.getsizeof(v)
+    return n
+
+
+class Node:
+    __slots__ = ("id", "label", "properties")
+
+    def __init__(self, node_id: int, label: str, properties: dict):
+        self.id = node_id
+        self.label = label
+        self.properties = properties
+
+    def __getitem__(self, key):
+        # old dict-style access: node["label"], node["properties"]
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"Node({self.id}, {self.label!r})"
 
-# graph/graph_manager.py
 
 class GraphManager:
-    def __init__(self):
+    def __init__(self, max_bytes = None, ttl = None, texts = None):
         self._next_id = 1
-        self.nodes = {}   # node_id → {"label": ..., "properties": {...}}
-        self.edges = []   # list of (src_id, tgt_id, relation)
+        self._lock = threading.Lock()   # batch mode shares one graph between worker threads
+        self._nodes = {}                # int id → Node
+        self._out = {}                  # (src int id, relation) → [tgt int id, ...]
+        self._n_edges = 0
+        self.max_bytes = int(1024 * 1024 * GRAPH_MAX_MB) if max_bytes is None else max_bytes
+        self.ttl = 3600 * GRAPH_TTL_HOURS if ttl is None else ttl
+        self._texts = texts if texts is not None else TextStore()
+        self._sizes = {}                # int id → estimated bytes (node + text kept in RAM)
+        self._bytes = Counter()         # label → estimated bytes
+        self._aging = deque()           # (created, int id) of Document / Snippet nodes, oldest first
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
 
-    def _gen_id(self) -> str:
-        nid = str(self._next_id)
-        self._next_id += 1
+    def _gen_id(self) -> int:
+        with self._lock:
+            nid = self._next_id
+            self._next_id += 1
         return nid
 
+    def _add_node(self, label: str, properties: dict, text: str = None) -> str:
+        nid = self._gen_id()
+        size = _node_bytes(properties)
+        if text is not None:
+            size += self._texts.put(nid, text)
+        with self._lock:
+            self._nodes[nid] = Node(nid, label, properties)
+            self._sizes[nid] = size
+            self._bytes[label] += size
+            if label in EVICTABLE:
+                self._aging.append((time.time(), nid))
+        self._maybe_evict()
+        return str(nid)
+
     def add_claim(self, claim: str) -> str:
-        node_id = self._gen_id()
-        self.nodes[node_id] = {
-            "label": "Claim",
-            "properties": {"text": claim}
-        }
-        return node_id
-
-    def add_document(self, url: str, text: str) -> str:
-        node_id = self._gen_id()
-        self.nodes[node_id] = {
-            "label": "Document",
-            "properties": {"url": url, "text": text}
-        }
-        return node_id
+        return self._add_node("Claim", {"text": claim})
+
+    def add_document(self, url: str, text: str = None) -> str:
+        # the text itself is kept compressed (or on disk) → get_text(doc_id); None = no text
+        if text is None:
+            return self._add_node("Document", {"url": url})
+        return self._add_node("Document", {"url": url, "chars": len(text)}, text)
 
     def add_snippet(self, summary: str, label: str, score: float) -> str:
-        node_id = self._gen_id()
-        self.nodes[node_id] = {
-            "label": "Snippet",
-            "properties": {"summary": summary, "label": label, "score": score}
-        }
-        return node_id
+        return self._add_node("Snippet", {"summary": summary, "label": label, "score": score})
 
     def add_edge(self, src_id: str, tgt_id: str, relation: str):
-        self.edges.append((src_id, tgt_id, relation))
+        key = (int(src_id), relation)
+        with self._lock:
+            targets = self._out.get(key)
+            if targets is None:
+                targets = self._out[key] = []
+            targets.append(int(tgt_id))
+            self._n_edges += 1
+
+    def drop_edges(self, src_id: str, relations, keep = ()):
+        # delete src --relation--> edges of the given relations, except those to the keep ids
+        keep = {int(k) for k in keep}
+        with self._lock:
+            for relation in relations:
+                key = (int(src_id), relation)
+                targets = self._out.get(key)
+                if targets is None:
+                    continue
+                kept = [t for t in targets if t in keep]
+                self._n_edges -= len(targets) - len(kept)
+                if kept:
+                    self._out[key] = kept
+                else:
+                    del self._out[key]
+
+    def set_properties(self, node_id: str, **props):
+        # merge props into an existing node (e.g. the verdict of a claim)
+        nid = int(node_id)
+        with self._lock:
+            node = self._nodes.get(nid)
+            if node is None:
+                return
+            node.properties = {**node.properties, **props}
+            size = _node_bytes(node.properties) + self._texts.ram_size(nid)
+            self._bytes[node.label] += size - self._sizes.get(nid, 0)
+            self._sizes[nid] = size
+
+    def get_node(self, node_id: str):
+        return self._nodes.get(int(node_id))
+
+    def get_text(self, node_id: str):
+        # full article text of a Document node (None if unknown or evicted)
+        return self._texts.get(int(node_id))
+
+    def iter_claims(self):
+        # (claim id, properties) of every Claim node
+        for n in list(self._nodes.values()):
+            if n.label == "Claim":
+                yield str(n.id), n.properties
+
+    def neighbors(self, src_id: str, relation: str) -> list:
+        # target nodes of src --relation-->, in insertion order
+        nodes = (self._nodes.get(t) for t in self._out.get((int(src_id), relation), ()))
+        return [n for n in nodes if n is not None]
+
+    def iter_nodes(self):
+        # every Node, oldest first (bulk export)
+        yield from list(self._nodes.values())
+
+    def iter_edges(self):
+        # (src int id, tgt int id, relation) of every edge (bulk export)
+        with self._lock:
+            out = list(self._out.items())
+        for (src, rel), tgts in out:
+            for t in tgts:
+                yield src, t, rel
+
+    @property
+    def edges(self) -> list:
+        # flat (src, tgt, relation) list, for debugging / export only
+        return [(str(src), str(t), rel) for src, t, rel in self.iter_edges()]
+
+    def __len__(self):
+        return len(self._nodes)
 
     def stats(self) -> dict:
-        return {"nodes": len(self.nodes), "edges": len(self.edges)}
+        with self._lock:
+            return {
+                "nodes": len(self._nodes),
+                "edges": self._n_edges,
+                "bytes": dict(self._bytes),
+                "evicted": self.evicted,
+                "text": self._texts.stats(),
+            }
+
+    # ---- memory budget ---------------------------------------------------------------
+
+    def _maybe_evict(self):
+        with self._lock:
+            over = self.max_bytes and sum(self._bytes.values()) > self.max_bytes
+        due = self.ttl and time.monotonic() - self._last_sweep >= SWEEP_EVERY
+        if over or due:
+            self.evict()
+
+    def evict(self, now = None) -> int:
+        # drop expired Document / Snippet nodes, then the oldest ones while over budget;
+        # returns the number of nodes removed
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            drop = set()
+            while self._aging and self.ttl and now - self._aging[0][0] > self.ttl:
+                drop.add(self._aging.popleft()[1])
+            if self.max_bytes:
+                total = sum(self._bytes.values()) - sum(self._sizes.get(nid, 0) for nid in drop)
+                target = self.max_bytes * LOW_WATER
+                while self._aging and total > target:
+                    nid = self._aging.popleft()[1]
+                    drop.add(nid)
+                    total -= self._sizes.get(nid, 0)
+            if drop:
+                self._remove(drop)
+        return len(drop)
+
+    def _remove(self, ids):
+        # caller holds self._lock: the nodes, their texts and every edge from / to them
+        for nid in ids:
+            node = self._nodes.pop(nid, None)
+            if node is None:
+                continue
+            self._bytes[node.label] -= self._sizes.pop(nid, 0)
+            self._texts.drop(nid)
+            self.evicted += 1
+        for key in list(self._out):
+            targets = self._out[key]
+            if key[0] in ids:
+                kept = []
+            else:
+                kept = [t for t in targets if t not in ids]
+            if len(kept) != len(targets):
+                self._n_edges -= len(targets) - len(kept)
+                if kept:
+                    self._out[key] = kept
+                else:
+                    del self._out[key]
+
+    def compact(self) -> dict:
+        # rebuild the indexes after evictions: fresh dicts (they never shrink on delete),
+        # no edges to missing nodes, a spill file without holes; sizes are recounted
+        with self._lock:
+            self._nodes = dict(self._nodes)
+            out = {}
+            for key, targets in self._out.items():
+                if key[0] not in self._nodes:
+                    continue
+                kept = [t for t in targets if t in self._nodes]
+                if kept:
+                    out[key] = kept
+            self._out = out
+            self._n_edges = sum(len(t) for t in out.values())
+            self._aging = deque(item for item in self._aging if item[1] in self._nodes)
+            self._texts.compact()
+            self._sizes, self._bytes = {}, Counter()
+            for nid, node in self._nodes.items():
+                size = _node_bytes(node.properties) + self._texts.ram_size(nid)
+                self._sizes[nid] = size
+                self._bytes[node.label] += size
+        return self.stats()
 
     def get_top_snippets(self, claim_id: str, relation: str, k: int = 3):
-        # find all snippet-IDs linked by the given relation
-        snippet_ids = [
-            tgt for src, tgt, rel in self.edges
-            if src == claim_id and rel == relation
-        ]
-        # collect (summary, score)
-        snippets = []
-        for sid in snippet_ids:
-            node = self.nodes.get(sid)
-            if node and node["label"] == "Snippet":
-                props = node["properties"]
-                snippets.append((props["summary"], props["score"]))
-        snippets.sort(key=lambda x: x[1], reverse=True)
-        return snippets[:k]
+        # (summary, score) of the k best snippets linked by the given relation; k=None → all
+        snippets = (
+            (n.properties["summary"], n.properties["score"])
+            for n in self.neighbors(claim_id, relation) if n.label == "Snippet"
+        )
+        if k is None:
+            return sorted(snippets, key=lambda x: x[1], reverse=True)
+        return heapq.nlargest(k, snippets, key=lambda x: x[1])
@@ -0,0 +1,136 @@
+# graph/similarity.py
+
+import os
+import math
+import time
+import threading
+from collections import Counter
+
+from tools.text import tokenize, content_words, NEGATIONS, DIRECTIONS
+
+# Evidence reuse: many incoming claims are paraphrases of claims we already checked.
+# ClaimIndex is a small offline TF-IDF index (word unigrams + bigrams) over the text of
+# the graph's Claim nodes; EvidenceReuse answers a new claim from the best stored match
+# when it is similar enough and its verdict is fresh enough. Only misses go to the agent.
+# The index is built from the graph on first use and kept up to date by add(); claims other
+# processes store in the same SQLite graph are picked up by a rescan every REUSE_RESYNC seconds.
+
+REUSE_THRESHOLD = float(os.getenv("REUSE_THRESHOLD", "0.8"))          # cosine similarity
+REUSE_MAX_AGE_HOURS = float(os.getenv("REUSE_MAX_AGE_HOURS", "24"))
+REUSE_RESYNC = float(os.getenv("REUSE_RESYNC", "60"))     # seconds, 0 = never rescan
+
+
+def _features(text):
+    words = content_words(text)
+    return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+def _guard_terms(text):
+    # negations, direction / quantity words and numbers must match exactly: "X rose 2%" is
+    # not "X rose 0.7%", "X is not Y" is not "X is Y", "X went up" is not "X went down",
+    # however similar the rest of the words are.
+    return frozenset(
+        w for w in tokenize(text)
+        if w in NEGATIONS or w in DIRECTIONS or any(ch.isdigit() for ch in w)
+    )
+
+
+class ClaimIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs = {}        # claim id → (term counts, guard terms)
+        self._postings = {}    # term → set of claim ids
+        self._df = Counter()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, claim_id):
+        return claim_id in self._docs
+
+    def add(self, claim_id, text):
+        feats = _features(text)
+        with self._lock:
+            if claim_id in self._docs:
+                return
+            self._docs[claim_id] = (feats, _guard_terms(text))
+            for term in feats:
+                self._postings.setdefault(term, set()).add(claim_id)
+                self._df[term] += 1
+
+    def _weights(self, counts):
+        n = len(self._docs)
+        return {
+            t: (1 + math.log(c)) * (math.log((n + 1) / (self._df.get(t, 0) + 1)) + 1)
+            for t, c in counts.items()
+        }
+
+    def search(self, text, k = 5):
+        # -> [(claim id, cosine similarity)], best first
+        query = _features(text)
+        guard = _guard_terms(text)
+        with self._lock:
+            candidates = set()
+            for term in query:
+                candidates |= self._postings.get(term, set())
+            qw = self._weights(query)
+            qnorm = math.sqrt(sum(w * w for w in qw.values())) or 1.0
+            scored = []
+            for cid in candidates:
+                feats, cguard = self._docs[cid]
+                if cguard != guard:
+                    continue
+                dw = self._weights(feats)
+                dot = sum(w * dw[t] for t, w in qw.items() if t in dw)
+                dnorm = math.sqrt(sum(w * w for w in dw.values())) or 1.0
+                scored.append((cid, dot / (qnorm * dnorm)))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:k]
+
+
+class EvidenceReuse:
+
+    def __init__(self, gm, threshold = None, max_age_hours = None, resync = REUSE_RESYNC):
+        self.gm = gm
+        self.threshold = REUSE_THRESHOLD if threshold is None else threshold
+        self.max_age = 3600 * (REUSE_MAX_AGE_HOURS if max_age_hours is None else max_age_hours)
+        self.resync = resync
+        self._index = None
+        self._synced = 0.0      # monotonic time of the last scan of the graph
+        self._lock = threading.Lock()
+
+    def _ensure_index(self):
+        # built from the graph on first use, then kept up to date by add() and by a rescan
+        # for verified claims it has not seen (stored by another process) every resync seconds
+        due = self._index is None or (self.resync > 0 and time.monotonic() - self._synced > self.resync)
+        if due:
+            with self._lock:
+                if self._index is None or time.monotonic() - self._synced > self.resync:
+                    index = self._index or ClaimIndex()
+                    for claim_id, props in self.gm.iter_claims():
+                        if props.get("verdict") and claim_id not in index:
+                            index.add(claim_id, props["text"])
+                    self._index, self._synced = index, time.monotonic()
+        return self._index
+
+    def add(self, claim_id, text):
+        self._ensure_index().add(claim_id, text)
+
+    def lookup(self, claim):
+        # -> (claim id, properties, similarity) of a reusable stored claim, or None
+        now = time.time()
+        for claim_id, sim in self._ensure_index().search(claim):
+            if sim < self.threshold:
+                break
+            node = self.gm.get_node(claim_id)
+            if node is None:
+                continue
+            props = node.properties
+            # only decided, recent verdicts are worth reusing
+            if props.get("verdict") not in ("Supported", "Refuted"):
+                continue
+            if now - props.get("verified_at", 0) > self.max_age:
+                continue
+            return claim_id, props, sim
+        return None
@@ -0,0 +1,306 @@
+# graph/sqlite_graph.py
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+from graph.graph_manager import Node, GraphManager, GRAPH_TTL_HOURS, EVICTABLE, LOW_WATER
+from tools.text import tokenize
+from tools.urls import normalize_url
+
+# Durable evidence graph with the same API as GraphManager, in one SQLite file (WAL).
+#   - Claim nodes are deduplicated by normalized text, Document nodes by normalized url,
+#     so a url cited by 100 claims is stored once (and edges are unique too); a re-verified
+#     claim keeps its node, and ingest.py replaces its cites / supports / refutes edges
+#   - nothing is loaded at startup; every lookup is an indexed query
+#   - any number of readers (threads / processes); writes are serialized by SQLite
+#     plus a per-process lock
+#   - article text is stored zlib-compressed in its own column → get_text(doc_id)
+#   - optional retention: Document / Snippet nodes older than GRAPH_TTL_HOURS, and the
+#     oldest ones once the node data passes GRAPH_DB_MAX_MB, are deleted with their edges
+#     (checked every EVICT_EVERY writes); compact() reclaims the space and rebuilds indexes
+
+GRAPH_DB_MAX_MB = float(os.getenv("GRAPH_DB_MAX_MB", "0"))     # 0 = no limit
+EVICT_EVERY = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id      INTEGER PRIMARY KEY,
+    label   TEXT NOT NULL,
+    key     TEXT UNIQUE,
+    score   REAL,
+    props   TEXT NOT NULL,
+    created REAL NOT NULL,
+    body    BLOB
+);
+CREATE INDEX IF NOT EXISTS nodes_label ON nodes(label, created);
+CREATE TABLE IF NOT EXISTS edges (
+    id  INTEGER PRIMARY KEY,
+    src INTEGER NOT NULL,
+    rel TEXT NOT NULL,
+    tgt INTEGER NOT NULL,
+    UNIQUE (src, rel, tgt)
+);
+CREATE INDEX IF NOT EXISTS edges_tgt ON edges(tgt);
+"""
+
+
+def claim_key(text):
+    return "claim:" + " ".join(tokenize(text))
+
+
+def document_key(url):
+    return "doc:" + normalize_url(url)
+
+
+class SQLiteGraphManager:
+
+    def __init__(self, path, max_bytes = None, ttl = None):
+        self.path = path
+        self.max_bytes = int(1024 * 1024 * GRAPH_DB_MAX_MB) if max_bytes is None else max_bytes
+        self.ttl = 3600 * GRAPH_TTL_HOURS if ttl is None else ttl
+        self.evicted = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._conn()    # create the schema up front
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(nodes)")}
+            if columns and "body" not in columns:
+                # graph files from before the text column; their texts stay in props until compact()
+                conn.execute("ALTER TABLE nodes ADD COLUMN body BLOB")
+                conn.execute("DROP INDEX IF EXISTS nodes_label")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _upsert(self, label, key, props, score = None, body = None, refresh = True):
+        # insert, or (for deduplicated nodes) refresh the existing row: props are merged into
+        # the stored ones (a claim being re-verified keeps its last verdict until the new one
+        # is set); refresh=False leaves an existing row as it is
+        update = (
+            "props = json_patch(nodes.props, excluded.props), score = excluded.score, "
+            "body = excluded.body, created = excluded.created"
+            if refresh else "key = excluded.key"
+        )
+        with self._write_lock:
+            row = self._conn().execute(
+                "INSERT INTO nodes (label, key, score, props, created, body) VALUES (?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT(key) DO UPDATE SET {update} "
+                "RETURNING id",
+                (label, key, score, json.dumps(props), time.time(), body),
+            ).fetchone()
+            self._writes += 1
+            due = label in EVICTABLE and (self.ttl or self.max_bytes) and self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+        return str(row[0])
+
+    def add_claim(self, claim: str) -> str:
+        return self._upsert("Claim", claim_key(claim), {"text": claim})
+
+    def add_document(self, url: str, text: str = None) -> str:
+        # text=None (e.g. an export without text): a stored document keeps its text
+        if text is None:
+            return self._upsert("Document", document_key(url), {"url": url}, refresh=False)
+        body = zlib.compress(text.encode("utf-8"))
+        return self._upsert("Document", document_key(url), {"url": url, "chars": len(text)}, body=body)
+
+    def add_snippet(self, summary: str, label: str, score: float) -> str:
+        return self._upsert("Snippet", None, {"summary": summary, "label": label, "score": score}, score)
+
+    def add_edge(self, src_id: str, tgt_id: str, relation: str):
+        with self._write_lock:
+            self._conn().execute(
+                "INSERT OR IGNORE INTO edges (src, rel, tgt) VALUES (?, ?, ?)",
+                (int(src_id), relation, int(tgt_id)),
+            )
+
+    def drop_edges(self, src_id: str, relations, keep = ()):
+        # delete src --relation--> edges of the given relations, except those to the keep ids
+        keep = [int(k) for k in keep]
+        with self._write_lock:
+            self._conn().execute(
+                f"DELETE FROM edges WHERE src = ? AND rel IN ({','.join('?' * len(relations))}) "
+                f"AND tgt NOT IN ({','.join('?' * len(keep))})",
+                (int(src_id), *relations, *keep),
+            )
+
+    def set_properties(self, node_id: str, **props):
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT props FROM nodes WHERE id = ?", (int(node_id),)).fetchone()
+                if row is not None:
+                    merged = {**json.loads(row[0]), **props}
+                    conn.execute("UPDATE nodes SET props = ? WHERE id = ?", (json.dumps(merged), int(node_id)))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def iter_claims(self):
+        rows = self._conn().execute("SELECT id, props FROM nodes WHERE label = 'Claim' ORDER BY id")
+        for node_id, props in rows.fetchall():
+            yield str(node_id), json.loads(props)
+
+    def get_node(self, node_id: str):
+        row = self._conn().execute(
+            "SELECT id, label, props FROM nodes WHERE id = ?", (int(node_id),)
+        ).fetchone()
+        return Node(row[0], row[1], json.loads(row[2])) if row else None
+
+    def get_text(self, node_id: str):
+        row = self._conn().execute("SELECT body, props FROM nodes WHERE id = ?", (int(node_id),)).fetchone()
+        if row is None:
+            return None
+        if row[0] is not None:
+            return zlib.decompress(row[0]).decode("utf-8")
+        return json.loads(row[1]).get("text")
+
+    def find_claim(self, claim: str):
+        # id of an already stored claim with the same normalized text, or None
+        row = self._conn().execute("SELECT id FROM nodes WHERE key = ?", (claim_key(claim),)).fetchone()
+        return str(row[0]) if row else None
+
+    def neighbors(self, src_id: str, relation: str) -> list:
+        rows = self._conn().execute(
+            "SELECT n.id, n.label, n.props FROM edges e JOIN nodes n ON n.id = e.tgt "
+            "WHERE e.src = ? AND e.rel = ? ORDER BY e.id",
+            (int(src_id), relation),
+        )
+        return [Node(i, label, json.loads(props)) for i, label, props in rows]
+
+    def iter_nodes(self):
+        rows = self._conn().execute("SELECT id, label, props FROM nodes ORDER BY id")
+        for node_id, label, props in rows:
+            yield Node(node_id, label, json.loads(props))
+
+    def iter_edges(self):
+        yield from self._conn().execute("SELECT src, tgt, rel FROM edges ORDER BY id")
+
+    @property
+    def edges(self) -> list:
+        return [(str(s), str(t), r) for s, t, r in self.iter_edges()]
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT label, COUNT(*), SUM(LENGTH(props) + COALESCE(LENGTH(body), 0)) FROM nodes GROUP BY label"
+        ).fetchall()
+        return {
+            "nodes": sum(r[1] for r in rows),
+            "edges": conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0],
+            "bytes": {label: size for label, _n, size in rows},
+            "evicted": self.evicted,
+        }
+
+    # ---- retention -------------------------------------------------------------------
+
+    def evict(self, now = None) -> int:
+        # delete expired Document / Snippet nodes, then the oldest ones while the node data
+        # is over max_bytes; their edges go with them. Returns the number of nodes deleted.
+        now = time.time() if now is None else now
+        marks = ",".join("?" * len(EVICTABLE))
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                drop = []
+                if self.ttl:
+                    drop += [r[0] for r in conn.execute(
+                        f"SELECT id FROM nodes WHERE label IN ({marks}) AND created < ?",
+                        (*EVICTABLE, now - self.ttl),
+                    )]
+                if self.max_bytes:
+                    size = "LENGTH(props) + COALESCE(LENGTH(body), 0)"
+                    total = conn.execute(f"SELECT COALESCE(SUM({size}), 0) FROM nodes").fetchone()[0]
+                    if total > self.max_bytes:
+                        expired = set(drop)
+                        rows = conn.execute(
+                            f"SELECT id, {size} FROM nodes WHERE label IN ({marks}) ORDER BY created, id", EVICTABLE
+                        )
+                        for node_id, n in rows:
+                            if total <= self.max_bytes * LOW_WATER:
+                                break
+                            total -= n
+                            if node_id not in expired:
+                                drop.append(node_id)
+                for i in range(0, len(drop), 500):
+                    chunk = drop[i:i + 500]
+                    q = ",".join("?" * len(chunk))
+                    conn.execute(f"DELETE FROM edges WHERE src IN ({q}) OR tgt IN ({q})", chunk + chunk)
+                    conn.execute(f"DELETE FROM nodes WHERE id IN ({q})", chunk)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self.evicted += len(drop)
+        return len(drop)
+
+    def compact(self) -> dict:
+        # move texts of old graph files into the compressed column, drop dangling edges,
+        # rebuild the indexes and give the freed pages back to the file system
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, props FROM nodes WHERE label = 'Document' AND body IS NULL"
+                ).fetchall()
+                for node_id, props in rows:
+                    p = json.loads(props)
+                    text = p.pop("text", "")
+                    p.setdefault("chars", len(text))
+                    conn.execute(
+                        "UPDATE nodes SET props = ?, body = ? WHERE id = ?",
+                        (json.dumps(p), zlib.compress(text.encode("utf-8")), node_id),
+                    )
+                conn.execute(
+                    "DELETE FROM edges WHERE src NOT IN (SELECT id FROM nodes) OR tgt NOT IN (SELECT id FROM nodes)"
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("REINDEX")
+            conn.execute("ANALYZE")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return self.stats()
+
+    def get_top_snippets(self, claim_id: str, relation: str, k: int = 3):
+        rows = self._conn().execute(
+            "SELECT n.props FROM edges e JOIN nodes n ON n.id = e.tgt "
+            "WHERE e.src = ? AND e.rel = ? AND n.label = 'Snippet' "
+            "ORDER BY n.score DESC, e.id LIMIT ?",
+            (int(claim_id), relation, -1 if k is None else k),
+        )
+        out = []
+        for (props,) in rows:
+            p = json.loads(props)
+            out.append((p["summary"], p["score"]))
+        return out
+
+
+def open_graph(path = None):
+    # FACTCHECK_GRAPH_DB=/path/graph.sqlite → durable store; unset / ":memory:" → in-memory GraphManager
+    path = path or os.getenv("FACTCHECK_GRAPH_DB", "")
+    if not path or path == ":memory:":
+        return GraphManager()
+    return SQLiteGraphManager(path)
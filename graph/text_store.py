@@ -0,0 +1,111 @@
+# graph/text_store.py
+
+import os
+import zlib
+import tempfile
+import threading
+
+# Article text of the in-memory graph's Document nodes, kept out of the node properties.
+# Texts are zlib-compressed; once ram_bytes of compressed text are held in RAM, new texts
+# are appended to an anonymous spill file on disk instead and read back on demand.
+# Dropped texts leave holes in the spill file until compact() rewrites it (which also
+# moves spilled texts back into RAM while there is room).
+
+GRAPH_TEXT_RAM_MB = float(os.getenv("GRAPH_TEXT_RAM_MB", "32"))
+GRAPH_SPILL_DIR = os.getenv("GRAPH_SPILL_DIR", "")     # unset = the system temp dir
+LEVEL = 6
+
+
+class TextStore:
+
+    def __init__(self, ram_bytes = None, spill_dir = None):
+        self.ram_bytes = int(1024 * 1024 * GRAPH_TEXT_RAM_MB) if ram_bytes is None else ram_bytes
+        self.spill_dir = (GRAPH_SPILL_DIR if spill_dir is None else spill_dir) or None
+        self._lock = threading.Lock()
+        self._ram = {}          # key → compressed bytes
+        self._disk = {}         # key → (offset, length) in the spill file
+        self._file = None
+        self.ram_used = 0
+        self.disk_live = 0      # bytes of the spill file still referenced
+        self.disk_size = 0
+
+    def __len__(self):
+        return len(self._ram) + len(self._disk)
+
+    def put(self, key, text):
+        # -> bytes of RAM the text takes (0 if it went to disk)
+        blob = zlib.compress(text.encode("utf-8"), LEVEL)
+        with self._lock:
+            self._drop(key)
+            if self.ram_used + len(blob) <= self.ram_bytes:
+                self._ram[key] = blob
+                self.ram_used += len(blob)
+                return len(blob)
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix="factcheck-graph-", dir=self.spill_dir)
+            self._file.seek(self.disk_size)
+            self._file.write(blob)
+            self._disk[key] = (self.disk_size, len(blob))
+            self.disk_size += len(blob)
+            self.disk_live += len(blob)
+            return 0
+
+    def get(self, key):
+        with self._lock:
+            blob = self._ram.get(key)
+            if blob is None:
+                loc = self._disk.get(key)
+                if loc is None:
+                    return None
+                self._file.seek(loc[0])
+                blob = self._file.read(loc[1])
+        return zlib.decompress(blob).decode("utf-8")
+
+    def ram_size(self, key):
+        blob = self._ram.get(key)
+        return len(blob) if blob is not None else 0
+
+    def drop(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def _drop(self, key):
+        blob = self._ram.pop(key, None)
+        if blob is not None:
+            self.ram_used -= len(blob)
+        loc = self._disk.pop(key, None)
+        if loc is not None:
+            self.disk_live -= loc[1]
+
+    def compact(self):
+        # rewrite the spill file without the dropped texts; spilled texts go back to RAM if they fit
+        with self._lock:
+            if self._file is None:
+                return
+            old, disk = self._file, self._disk
+            self._file, self._disk = None, {}
+            self.disk_size = self.disk_live = 0
+            for key, (offset, length) in sorted(disk.items(), key=lambda kv: kv[1][0]):
+                old.seek(offset)
+                blob = old.read(length)
+                if self.ram_used + length <= self.ram_bytes:
+                    self._ram[key] = blob
+                    self.ram_used += length
+                    continue
+                if self._file is None:
+                    self._file = tempfile.TemporaryFile(prefix="factcheck-graph-", dir=self.spill_dir)
+                self._file.write(blob)
+                self._disk[key] = (self.disk_size, length)
+                self.disk_size += length
+                self.disk_live += length
+            old.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ram_texts": len(self._ram),
+                "ram_bytes": self.ram_used,
+                "spilled_texts": len(self._disk),
+                "spilled_bytes": self.disk_live,
+                "spill_file_bytes": self.disk_size,
+            }
@@ -0,0 +1,212 @@
+import json
+import time
+
+from tools.web_search import extract_urls
+from tools.relevance import relevance, RELEVANCE_THRESHOLD
+from tools.reliability import reliability
+from tools.text import content_words
+from tools.tracing import span
+from tools.urls import domain_of
+
+# Turning an agent / pipeline run into graph nodes and a verdict.
+# Shared by the CLI (verify.py), the batch runner (batch.py) and the Streamlit app.
+#
+# Every snippet is linked to the document it summarizes (Document --summarized_as--> Snippet),
+# so the per-domain reliability index (tools/reliability.py) can learn from the outcome,
+# and its score is weighted by how reliable that domain has been so far.
+
+SOURCE_MIN_OVERLAP = 0.5    # share of a retyped passage's words that must come from the document
+EVIDENCE = ("cites", "supports", "refutes")     # claim edges that belong to one verification run
+
+
+def _source_of(passage, fetched):
+    # the fetched (doc id, url, text) a summarize step ran on: the same text (direct
+    # pipeline), or the document the agent copied the passage from (it may retype or cut it)
+    passage = str(passage).strip()
+    if not passage:
+        return None
+    for doc in reversed(fetched):
+        if doc[2].strip() == passage or passage[:200] in doc[2]:
+            return doc
+    words = set(content_words(passage))
+    best, best_overlap = None, SOURCE_MIN_OVERLAP
+    for doc in fetched:
+        overlap = len(words & set(content_words(doc[2]))) / len(words) if words else 0.0
+        if overlap >= best_overlap:
+            best, best_overlap = doc, overlap
+    return best
+
+
+def ingest_steps(gm, claim_id, steps, log=print):
+
+    # each step is provided by my agent. Iterating over it.
+    # keeping a list to track agent's findings.
+    # -> supporting and refuting evidence as [(score, source weight)], the
+    #    [(url, [snippet labels])] of this run's documents (for tools/reliability.py)
+    #    and the ids of the nodes this run linked the claim to
+    support_scores, refute_scores = [], []
+    linked = []
+    fetched = []    # (doc id, url, text) of this run's documents
+    sources = {}    # doc id → (url, [supports / refutes labels of its snippets])
+    claim_node = gm.get_node(claim_id)
+    claim = claim_node.properties["text"] if claim_node is not None else ""
+
+    for action, observation in steps:
+        tool = action.tool
+        inp  = action.tool_input
+        obs  = observation or ""
+
+        if tool == "web_search":
+            urls = extract_urls(obs)
+            log(f"Agent found {len(urls)} URLs:")
+            for u in urls:
+                log(f"   {u}")
+
+        elif tool == "document_fetcher":
+            url  = inp
+            text = obs
+            if not text.strip():
+                log(f"  → skipped {url} (empty or error)")
+                continue
+            doc_id = gm.add_document(url, text)
+            gm.add_edge(claim_id, doc_id, "cites")
+            linked.append(doc_id)
+            fetched.append((doc_id, url, text))
+            sources.setdefault(doc_id, (url, []))
+            # offline relevance to the claim (the direct pipeline skips summarizing off-topic ones)
+            score = relevance(claim, text)
+            gm.set_properties(doc_id, relevance=score)
+            log(f"Fetched & ingested document: {url} (relevance {score:.2f})")
+            if score < RELEVANCE_THRESHOLD:
+                log("  → off-topic for this claim")
+
+        elif tool == "summarize_and_classify":
+            data = json.loads(obs)
+            snippet_id = gm.add_snippet(
+                summary=data["summary"],
+                label=data["label"],
+                score=data["score"]
+            )
+            source = _source_of(inp, fetched)
+            weight = 1.0
+            if source is not None:
+                gm.add_edge(source[0], snippet_id, "summarized_as")
+                weight = reliability.weight(domain_of(source[1]))
+            rel = data["label"]
+            if rel in ("supports", "refutes"):
+                gm.add_edge(claim_id, snippet_id, rel)
+                linked.append(snippet_id)
+                if source is not None:
+                    sources[source[0]][1].append(rel)
+                if rel == "supports":
+                    support_scores.append((data["score"], weight))
+                else:
+                    refute_scores.append((data["score"], weight))
+                note = f", source weight {weight:.2f}" if weight != 1.0 else ""
+                log(f"  → snippet {rel} ({data['score']:.2f}{note})")
+            else:
+                log("  → snippet neutral; no edge added")
+
+    return support_scores, refute_scores, list(sources.values()), linked
+
+
+def _mass(evidence):
+    # -> (Σ score·weight, Σ weight) of plain scores or (score, source weight) pairs from ingest_steps
+    pairs = [e if isinstance(e, tuple) else (e, 1.0) for e in evidence]
+    return sum(s * w for s, w in pairs), sum(w for _s, w in pairs)
+
+
+def compute_verdict(support_scores, refute_scores):
+    # both sides are weighed against the weight of all the evidence, so a snippet from a
+    # trusted source outweighs one from a weak source on the other side, and evidence
+    # against the winning side lowers its confidence
+    sup, w_sup = _mass(support_scores)
+    ref, w_ref = _mass(refute_scores)
+    total = w_sup + w_ref
+    if not total:
+        return "Inconclusive", 0.0
+    sup, ref = sup / total, ref / total
+    if sup > ref:
+        return "Supported", sup
+    elif ref > sup:
+        return "Refuted", ref
+    return "Inconclusive", max(sup, ref)
+
+
+def _reused(reuse, claim, log):
+    # answer from a stored near-duplicate claim (graph/similarity.py), or None
+    if reuse is None:
+        return None
+    hit = reuse.lookup(claim)
+    if hit is None:
+        return None
+    claim_id, props, sim = hit
+    log(f"Reusing evidence of a stored claim (similarity {sim:.2f}): {props['text']}")
+    return {
+        "claim": claim,
+        "claim_id": claim_id,
+        "final_answer": props.get("final_answer", ""),
+        "verdict": props["verdict"],
+        "confidence": props.get("confidence", 0.0),
+        "steps": [],
+        "reused_from": props["text"],
+        "similarity": sim,
+    }
+
+
+def _finish(gm, claim_id, claim, result, log, reuse):
+    steps = result["intermediate_steps"]
+    with span("graph_ingest", steps=len(steps)):
+        support_scores, refute_scores, sources, linked = ingest_steps(gm, claim_id, steps, log)
+        # a re-verified claim (the SQLite graph keeps one node per claim) keeps only the
+        # evidence of this run, so the stored snippets always match the verdict
+        gm.drop_edges(claim_id, EVIDENCE, keep=linked)
+    with span("verdict", supports=len(support_scores), refutes=len(refute_scores)):
+        verdict, confidence = compute_verdict(support_scores, refute_scores)
+
+        # keep the outcome on the claim node so later paraphrases can reuse it
+        gm.set_properties(
+            claim_id,
+            verdict=verdict,
+            confidence=confidence,
+            final_answer=result["output"],
+            verified_at=time.time(),
+        )
+        if reuse is not None:
+            reuse.add(claim_id, claim)
+        reliability.record_run(sources, verdict)
+
+    return {
+        "claim": claim,
+        "claim_id": claim_id,
+        "final_answer": result["output"],
+        "verdict": verdict,
+        "confidence": confidence,
+        "steps": steps,
+    }
+
+
+def verify_claim(agent, claim, gm, log=print, reuse=None, callbacks=None):
+    # agent = build_agent() or build_pipeline(); both take {"input": claim}
+    # reuse = EvidenceReuse(gm) to answer near-duplicates of stored claims without the agent
+    # callbacks = LangChain callback handlers that see every tool call (e.g. jobs.StepFeed)
+    # the whole run is one "claim" span (tools/tracing.py), its stages are child spans
+    with span("claim") as sp:
+        res = _reused(reuse, claim, log)
+        if res is None:
+            claim_id = gm.add_claim(claim)
+            result = agent({"input": claim}, callbacks=callbacks) if callbacks else agent({"input": claim})
+            res = _finish(gm, claim_id, claim, result, log, reuse)
+        sp.set(verdict=res["verdict"], reused="reused_from" in res)
+        return res
+
+
+async def averify_claim(agent, claim, gm, log=print, reuse=None, callbacks=None):
+    with span("claim") as sp:
+        res = _reused(reuse, claim, log)
+        if res is None:
+            claim_id = gm.add_claim(claim)
+            result = await agent.acall({"input": claim}, callbacks=callbacks) if callbacks else await agent.acall({"input": claim})
+            res = _finish(gm, claim_id, claim, result, log, reuse)
+        sp.set(verdict=res["verdict"], reused="reused_from" in res)
+        return res
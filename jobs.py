@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ingest import verify_claim
+from batch import batch_record, _error_record
+
+# Background verification jobs, so a UI (app.py) never runs claims inside its request.
+#   queue = JobQueue()                       one per process, shared by every session
+#   job_id = queue.submit(agent, claims, gm) returns at once
+#   queue.get(job_id).snapshot()             progress, per-claim steps, partial evidence, results
+#   queue.cancel(job_id)                     queued claims are dropped, running ones stop at their next tool step
+# All jobs share one thread pool (JOB_WORKERS); a job runs at most `workers` of its
+# claims at a time, so one big job does not starve the others. Finished jobs are kept
+# for JOB_TTL seconds and can be fetched again by id (e.g. after a page reload).
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+MAX_OBS_CHARS = 300     # tool inputs / observations are kept short in the progress feed
+
+
+class Cancelled(Exception):
+    pass
+
+
+class StepFeed(BaseCallbackHandler):
+
+    # LangChain callback that reports every tool call of one claim to its job.
+    # The ReAct agent calls it through LangChain, DirectPipeline calls it by hand.
+    # raise_error: a Cancelled raised here has to stop the agent, not be logged.
+
+    raise_error = True
+
+    def __init__(self, job, index):
+        self.job = job
+        self.index = index
+        self._inputs = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id = None, **kwargs):
+        self.job._check()
+        name = (serialized or {}).get("name") or kwargs.get("name") or "?"
+        input_str = str(input_str)[:MAX_OBS_CHARS]
+        self._inputs[run_id] = (name, input_str)
+        self.job._event(self.index, {"tool": name, "input": input_str, "state": "running"})
+
+    def on_tool_end(self, output, *, run_id = None, **kwargs):
+        name, input_str = self._inputs.pop(run_id, (kwargs.get("name", "?"), ""))
+        self.job._event(self.index, {"tool": name, "input": input_str, "state": "done", "output": str(output)})
+        self.job._check()
+
+    def on_tool_error(self, error, *, run_id = None, **kwargs):
+        name, input_str = self._inputs.pop(run_id, (kwargs.get("name", "?"), ""))
+        self.job._event(self.index, {"tool": name, "input": input_str, "state": "error", "output": repr(error)})
+
+
+class _Claim:
+    __slots__ = ("text", "status", "steps", "evidence", "documents", "record", "started", "finished")
+
+    def __init__(self, text):
+        self.text = text
+        self.status = "queued"      # queued → running → done | error | cancelled
+        self.steps = []
+        self.evidence = []          # {"label", "score", "summary"} as the summaries come in
+        self.documents = []         # urls fetched with text
+        self.record = None
+        self.started = None
+        self.finished = None
+
+
+class Job:
+
+    def __init__(self, job_id, claims, workers):
+        self.id = job_id
+        self.claims = [_Claim(c) for c in claims]
+        self.workers = max(1, workers)
+        self.created = time.time()
+        self.finished = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._next = 0
+
+    # ---- called from the worker threads -----------------------------------------
+
+    def _check(self):
+        if self.cancelled:
+            raise Cancelled(f"job {self.id} cancelled")
+
+    def _event(self, index, step):
+        c = self.claims[index]
+        with self._lock:
+            if step["state"] == "running":
+                c.steps.append(step)
+                return
+            # complete the matching running step, or add a finished one
+            for s in reversed(c.steps):
+                if s["state"] == "running" and s["tool"] == step["tool"] and s["input"] == step["input"]:
+                    s.update(state=step["state"], output=step.get("output", "")[:MAX_OBS_CHARS])
+                    break
+            else:
+                c.steps.append({**step, "output": step.get("output", "")[:MAX_OBS_CHARS]})
+            if step["state"] != "done":
+                return
+            if step["tool"] == "document_fetcher" and step.get("output", "").strip():
+                c.documents.append(step["input"])
+            elif step["tool"] == "summarize_and_classify":
+                try:
+                    data = json.loads(step["output"])
+                    c.evidence.append({"label": data["label"], "score": data["score"], "summary": data["summary"]})
+                except (ValueError, KeyError, TypeError):
+                    pass
+
+    # ---- read side ----------------------------------------------------------------
+
+    @property
+    def done(self):
+        return all(c.status in ("done", "error", "cancelled") for c in self.claims)
+
+    def results(self):
+        # finished records in input order
+        return [c.record for c in self.claims if c.record is not None]
+
+    def snapshot(self):
+        # a JSON-friendly copy of the current state (safe to read while workers write)
+        with self._lock:
+            return {
+                "id": self.id,
+                "created": self.created,
+                "done": self.done,
+                "cancelled": self.cancelled,
+                "progress": sum(c.status != "queued" and c.status != "running" for c in self.claims) / len(self.claims),
+                "claims": [
+                    {
+                        "claim": c.text,
+                        "status": c.status,
+                        "steps": [dict(s) for s in c.steps],
+                        "evidence": list(c.evidence),
+                        "documents": list(c.documents),
+                        "started": c.started,
+                        "finished": c.finished,
+                    }
+                    for c in self.claims
+                ],
+            }
+
+
+class JobQueue:
+
+    def __init__(self, max_workers = JOB_WORKERS, ttl = JOB_TTL):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.ttl = ttl
+
+    def submit(self, agent, claims, gm, workers = 4, record = batch_record, reuse = None):
+        claims = list(claims)
+        if not claims:
+            raise ValueError("no claims to verify")
+        job = Job(uuid.uuid4().hex[:12], claims, workers)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        for _ in range(min(job.workers, len(claims))):
+            self._start_next(job, agent, gm, record, reuse)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        with job._lock:
+            for c in job.claims:
+                if c.status == "queued":
+                    c.status = "cancelled"
+            if job.done and job.finished is None:
+                job.finished = time.time()
+        return True
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self):
+        # caller holds self._lock
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values() if j.finished and now - j.finished > self.ttl]:
+            del self._jobs[job_id]
+
+    def _start_next(self, job, agent, gm, record, reuse):
+        with job._lock:
+            while job._next < len(job.claims) and job.claims[job._next].status != "queued":
+                job._next += 1
+            if job._next >= len(job.claims):
+                return
+            index = job._next
+            job._next += 1
+        fut = self._pool.submit(self._run, job, index, agent, gm, record, reuse)
+        # a claim slot of this job frees up → the job's next claim goes in
+        fut.add_done_callback(lambda _f: self._start_next(job, agent, gm, record, reuse))
+
+    def _run(self, job, index, agent, gm, record, reuse):
+        c = job.claims[index]
+        with job._lock:
+            # running from here: the claim may have waited in the pool's queue until now
+            # (and been cancelled there)
+            if c.status != "queued":
+                return
+            c.status, c.started = "running", time.time()
+        lines = []
+        try:
+            job._check()
+            res = verify_claim(agent, c.text, gm, log=lines.append, reuse=reuse, callbacks=[StepFeed(job, index)])
+            res["logs"] = lines
+            rec, status = record(gm, res), "done"
+        except Cancelled:
+            rec, status = None, "cancelled"
+        except Exception as e:
+            rec, status = _error_record(c.text, e), "error"
+        with job._lock:
+            c.record, c.status, c.finished = rec, status, time.time()
+            if job.done:
+                job.finished = time.time()
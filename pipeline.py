@@ -0,0 +1,387 @@
+import json
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, CancelledError
+from langchain_core.agents import AgentAction
+
+from tools.web_search import search_news, asearch_news, extract_urls
+from tools.document_fetcher import fetch, afetch
+from tools.relevance import relevance, RELEVANCE_THRESHOLD
+from tools.tracing import bind
+from tools.summarizer import (
+    summarize_and_classify, asummarize_and_classify,
+    summarize_and_classify_batch, asummarize_and_classify_batch,
+)
+
+# Direct pipeline: the agent prompt already fixes the order of the steps
+# (search -> fetch every url -> summarize the good ones -> stop at 3), so there is
+# no need to pay an OpenAI round-trip for every tool decision.
+# We call the tools ourselves: one search, one parallel fetch wave and one parallel
+# summarize wave (by default a single batched Groq request for all picked articles).
+# The result has the same shape as the AgentExecutor output
+# ({"output": ..., "intermediate_steps": [(action, observation), ...]}) so the
+# graph ingestion / verdict code does not care which one produced it.
+#
+# Hedged mode (hedge=N > 0): search asks for N extra urls and N extra fetches are
+# kept in flight. Articles are taken in the order they finish instead of search
+# order; a failed / short fetch (or a classification that doesnt parse) starts the
+# next candidate right away, and everything still running is cancelled as soon as
+# max_articles have cleared the bar. Costs a few wasted downloads, saves waiting
+# on the slowest site and the claims that end "Inconclusive" for lack of sources.
+#
+# In both modes an article only takes one of the max_articles slots if it is long
+# enough and on topic: tools/relevance.py scores it against the claim offline
+# (min_relevance=0 turns that off). Off-topic hits never reach the summarizer.
+
+MIN_TEXT_CHARS = 100    # same cutoff the agent prompt uses for "too short"
+
+
+def _step(tool, tool_input, observation):
+    return (AgentAction(tool=tool, tool_input=tool_input, log=""), observation)
+
+
+class _Steps(list):
+
+    # the step list, plus the LangChain callback handlers passed in: every tool run is
+    # reported like AgentExecutor tool runs are, on_tool_start when it is submitted and
+    # on_tool_end (on_tool_error) when it completes.
+    # Runs submitted to the pool / event loop end in a done callback; an exception a
+    # handler raises there (e.g. jobs.Cancelled) is re-raised in the pipeline's own thread.
+
+    def __init__(self, callbacks = None):
+        super().__init__()
+        self.callbacks = callbacks or []
+        self._raised = None
+
+    def check(self):
+        if self._raised is not None:
+            raise self._raised
+
+    def append(self, step):
+        self.check()
+        super().append(step)
+
+    def start(self, tool, tool_input):
+        # -> run id
+        self.check()
+        run_id = uuid.uuid4()
+        for cb in self.callbacks:
+            cb.on_tool_start({"name": tool}, str(tool_input), run_id=run_id)
+        return run_id
+
+    def end(self, run_id, tool, observation = None, error = None):
+        for cb in self.callbacks:
+            if error is None:
+                cb.on_tool_end(observation, name=tool, run_id=run_id)
+            else:
+                cb.on_tool_error(error, name=tool, run_id=run_id)
+
+    def call(self, tool, tool_input, fn, *args, **kwargs):
+        # fn(*args, **kwargs) run and reported as one tool run
+        run_id = self.start(tool, tool_input)
+        try:
+            out = fn(*args, **kwargs)
+        except Exception as e:
+            self.end(run_id, tool, error=e)
+            raise
+        self.end(run_id, tool, out)
+        return out
+
+    async def acall(self, tool, tool_input, fn, *args, **kwargs):
+        run_id = self.start(tool, tool_input)
+        try:
+            out = await fn(*args, **kwargs)
+        except Exception as e:
+            self.end(run_id, tool, error=e)
+            raise
+        self.end(run_id, tool, out)
+        return out
+
+    def track(self, tool, tool_input, fut):
+        # a submitted pool future / asyncio task as one tool run: starts now, ends with fut
+        if not self.callbacks:
+            return fut
+        run_id = self.start(tool, tool_input)
+
+        def done(f):
+            try:
+                if f.cancelled():
+                    self.end(run_id, tool, error=CancelledError())
+                elif f.exception() is not None:
+                    self.end(run_id, tool, error=f.exception())
+                else:
+                    self.end(run_id, tool, f.result())
+            except Exception as e:
+                self._raised = self._raised or e
+
+        fut.add_done_callback(done)
+        return fut
+
+    def batch(self, claim, texts):
+        # summarize_and_classify_batch, reported as one run per text -> [(text, obs)], [] on failure
+        runs = [self.start("summarize_and_classify", t) for t in texts]
+        try:
+            results = summarize_and_classify_batch(claim, texts) if texts else []
+        except Exception as e:
+            return self._failed(runs, e)
+        return self._ended(texts, runs, results)
+
+    async def abatch(self, claim, texts):
+        runs = [self.start("summarize_and_classify", t) for t in texts]
+        try:
+            results = await asummarize_and_classify_batch(claim, texts) if texts else []
+        except Exception as e:
+            return self._failed(runs, e)
+        return self._ended(texts, runs, results)
+
+    def _failed(self, runs, error):
+        for run_id in runs:
+            self.end(run_id, "summarize_and_classify", error=error)
+        return []
+
+    def _ended(self, texts, runs, results):
+        for run_id, obs in zip(runs, results):
+            self.end(run_id, "summarize_and_classify", obs)
+        return list(zip(texts, results))
+
+
+def _safe_fetch(url):
+    try:
+        return fetch(url) or ""
+    except Exception:
+        return ""
+
+
+async def _safe_afetch(url):
+    try:
+        return await afetch(url) or ""
+    except Exception:
+        return ""
+
+
+def _valid_summary(raw):
+    # the ingestion code does json.loads(obs) and reads summary/label/score,
+    # so anything that doesnt look like that is dropped here.
+    try:
+        data = json.loads(raw)
+        return isinstance(data, dict) and {"summary", "label", "score"} <= data.keys()
+    except (TypeError, ValueError):
+        return False
+
+
+class DirectPipeline:
+
+    def __init__(self, max_articles = 3, num_results = 4, max_workers = 8, batch_summaries = True, hedge = 0,
+                 min_relevance = RELEVANCE_THRESHOLD):
+        self.max_articles = max_articles
+        self.min_relevance = min_relevance
+        self.hedge = hedge
+        self.num_results = num_results + hedge
+        self.max_workers = max_workers
+        # True: one summarize_and_classify_batch call for the picked articles (claim-aware labels)
+        # False: one summarize_and_classify call per article, started as soon as it is fetched
+        self.batch_summaries = batch_summaries
+
+    def _good(self, claim, text):
+        if len(text.strip()) < MIN_TEXT_CHARS:
+            return False
+        return self.min_relevance <= 0 or relevance(claim, text) >= self.min_relevance
+
+    def _race(self, claim, pool, urls, steps):
+        # hedged fetch (+ classify when not batching) -> [(text, obs)], obs=None when batching
+        candidates = iter(urls)
+        pending = {}    # future -> ("fetch", url) | ("classify", text)
+
+        def launch():
+            for url in candidates:
+                pending[steps.track("document_fetcher", url, pool.submit(bind(_safe_fetch), url))] = ("fetch", url)
+                return
+
+        for _ in range(self.max_articles + self.hedge):
+            launch()
+
+        picked = []
+        while pending and len(picked) < self.max_articles:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                kind, item = pending.pop(fut)
+                if kind == "fetch":
+                    text = fut.result()
+                    steps.append(_step("document_fetcher", item, text))
+                    if not self._good(claim, text):
+                        launch()
+                    elif self.batch_summaries:
+                        picked.append((text, None))
+                    else:
+                        classify = pool.submit(bind(summarize_and_classify), text)
+                        pending[steps.track("summarize_and_classify", text, classify)] = ("classify", text)
+                else:
+                    try:
+                        obs = fut.result()
+                    except Exception:
+                        obs = None
+                    if _valid_summary(obs):
+                        picked.append((item, obs))
+                    else:
+                        launch()
+
+        for fut in pending:
+            fut.cancel()
+        return picked[:self.max_articles]
+
+    async def _arace(self, claim, urls, steps):
+        # asyncio version of _race; the losers are really cancelled here
+        candidates = iter(urls)
+        pending = {}
+
+        def launch():
+            for url in candidates:
+                pending[steps.track("document_fetcher", url, asyncio.create_task(_safe_afetch(url)))] = ("fetch", url)
+                return
+
+        for _ in range(self.max_articles + self.hedge):
+            launch()
+
+        picked = []
+        try:
+            while pending and len(picked) < self.max_articles:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    kind, item = pending.pop(task)
+                    if kind == "fetch":
+                        text = task.result()
+                        steps.append(_step("document_fetcher", item, text))
+                        if not self._good(claim, text):
+                            launch()
+                        elif self.batch_summaries:
+                            picked.append((text, None))
+                        else:
+                            classify = asyncio.create_task(asummarize_and_classify(text))
+                            pending[steps.track("summarize_and_classify", text, classify)] = ("classify", text)
+                    else:
+                        obs = None if task.exception() else task.result()
+                        if _valid_summary(obs):
+                            picked.append((item, obs))
+                        else:
+                            launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        return picked[:self.max_articles]
+
+    def __call__(self, inputs, callbacks = None):
+        claim = inputs["input"]
+        steps = _Steps(callbacks)
+
+        # 1) search
+        raw = steps.call("web_search", claim, search_news, claim, num_results=self.num_results)
+        steps.append(_step("web_search", claim, raw))
+        urls = extract_urls(raw, max_urls=self.num_results)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(urls) * 2)))
+        try:
+            if self.hedge:
+                picked = self._race(claim, pool, urls, steps)
+                if not self.batch_summaries:
+                    return self._finish(steps, picked)
+                return self._finish(steps, steps.batch(claim, [text for text, _ in picked]))
+
+            # 2) fetch wave: every url at once
+            fetch_futs = [steps.track("document_fetcher", u, pool.submit(bind(_safe_fetch), u)) for u in urls]
+
+            # 3) summarize wave: results are consumed in search order (most reliable
+            # domains first, see tools/reliability.py; so the picked articles are
+            # deterministic), and each good fetch is handed to the summarizer
+            # straight away while the later fetches are still running.
+            picked = []
+            for url, fut in zip(urls, fetch_futs):
+                text = fut.result()
+                steps.append(_step("document_fetcher", url, text))
+                if not self._good(claim, text):
+                    continue
+                fut = None if self.batch_summaries else steps.track(
+                    "summarize_and_classify", text, pool.submit(bind(summarize_and_classify), text))
+                picked.append((text, fut))
+                if len(picked) >= self.max_articles:
+                    break
+
+            # we have enough articles; dont wait for the remaining fetches
+            for fut in fetch_futs:
+                fut.cancel()
+
+            if self.batch_summaries:
+                summaries = steps.batch(claim, [text for text, _ in picked])
+            else:
+                summaries = []
+                for text, fut in picked:
+                    try:
+                        summaries.append((text, fut.result()))
+                    except Exception:
+                        continue
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return self._finish(steps, summaries)
+
+    async def acall(self, inputs, callbacks = None):
+        # same as __call__ but on the async tools, so many claims can share one event loop
+        claim = inputs["input"]
+        steps = _Steps(callbacks)
+
+        raw = await steps.acall("web_search", claim, asearch_news, claim, num_results=self.num_results)
+        steps.append(_step("web_search", claim, raw))
+        urls = extract_urls(raw, max_urls=self.num_results)
+
+        if self.hedge:
+            picked = await self._arace(claim, urls, steps)
+            if not self.batch_summaries:
+                return self._finish(steps, picked)
+            return self._finish(steps, await steps.abatch(claim, [text for text, _ in picked]))
+
+        fetch_tasks = [steps.track("document_fetcher", u, asyncio.create_task(_safe_afetch(u))) for u in urls]
+        picked = []
+        try:
+            for url, task in zip(urls, fetch_tasks):
+                text = await task
+                steps.append(_step("document_fetcher", url, text))
+                if not self._good(claim, text):
+                    continue
+                task = None if self.batch_summaries else steps.track(
+                    "summarize_and_classify", text, asyncio.create_task(asummarize_and_classify(text)))
+                picked.append((text, task))
+                if len(picked) >= self.max_articles:
+                    break
+        finally:
+            for task in fetch_tasks:
+                task.cancel()
+
+        texts = [text for text, _ in picked]
+        if self.batch_summaries:
+            return self._finish(steps, await steps.abatch(claim, texts))
+        results = await asyncio.gather(*(t for _, t in picked), return_exceptions=True)
+        summaries = [
+            (text, obs) for text, obs in zip(texts, results)
+            if not isinstance(obs, BaseException)
+        ]
+        return self._finish(steps, summaries)
+
+    def _finish(self, steps, summaries):
+        labels = []
+        for text, obs in summaries:
+            if not _valid_summary(obs):
+                continue
+            steps.append(_step("summarize_and_classify", text, obs))
+            labels.append(json.loads(obs)["label"])
+
+        output = (
+            f"Checked {len(labels)} article(s): "
+            f"{labels.count('supports')} supporting, {labels.count('refutes')} refuting."
+        )
+        return {"output": output, "intermediate_steps": list(steps)}
+
+
+def build_pipeline(max_articles = 3, num_results = 4, batch_summaries = True, hedge = 0):
+    # drop-in replacement for build_agent(): pipeline({"input": claim})
+    return DirectPipeline(
+        max_articles=max_articles, num_results=num_results, batch_summaries=batch_summaries, hedge=hedge,
+    )
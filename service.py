@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+from ingest import verify_claim
+from batch import batch_record, _error_record
+from graph.sqlite_graph import open_graph
+from graph.similarity import EvidenceReuse
+from tools.tracing import metrics_text
+
+load_dotenv()
+
+# Headless HTTP/JSON service around the same flow as verify.py (stdlib only).
+#   GET  /health          → {"ok": true, "running": .., "pending": ..}
+#   GET  /metrics         → span durations, errors, bytes, tokens and cache hits (Prometheus text format)
+#   POST /verify          {"claim": "..."}                     → one result (JSON)
+#   POST /verify/batch    {"claims": [...], "workers": 4}      → one JSON line per claim as it finishes
+#                                                                (application/x-ndjson, with "index")
+# Identical claims (same words, any case / spacing) that are in flight together share one
+# run. At most SERVICE_MAX_RUNNING claims run at once; a request that would push the
+# number of admitted claims over SERVICE_MAX_PENDING is turned away with 429 + Retry-After
+# instead of queuing without bound. A batch larger than that could never be admitted, so
+# batches are capped at min(SERVICE_MAX_BATCH, SERVICE_MAX_PENDING) claims (400 above it).
+#
+#   python service.py --port 8080                # direct pipeline
+#   python service.py --port 8080 --agent        # ReAct agent
+#   curl -s localhost:8080/verify -d '{"claim": "Area 51 has active UFO research"}'
+
+SERVICE_MAX_RUNNING = int(os.getenv("SERVICE_MAX_RUNNING", "8"))
+SERVICE_MAX_PENDING = int(os.getenv("SERVICE_MAX_PENDING", "64"))
+SERVICE_MAX_BATCH = int(os.getenv("SERVICE_MAX_BATCH", "100"))
+MAX_BODY_BYTES = 1024 * 1024
+RETRY_AFTER_SECS = 5
+
+
+def claim_key(claim):
+    return " ".join(claim.split()).casefold()
+
+
+class Verifier:
+
+    def __init__(self, agent, gm, reuse = None, max_running = SERVICE_MAX_RUNNING, max_pending = SERVICE_MAX_PENDING):
+        self.agent = agent
+        self.gm = gm
+        self.reuse = reuse
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_running)
+        self._lock = threading.Lock()
+        self._inflight = {}     # claim key → Future of the record
+        self.pending = 0        # admitted claims not answered yet
+        self.running = 0
+        self.coalesced = 0
+
+    # ---- admission ---------------------------------------------------------------
+
+    def admit(self, n):
+        # reserve room for n claims; False = over capacity (answer 429)
+        with self._lock:
+            if self.pending + n > self.max_pending:
+                return False
+            self.pending += n
+            return True
+
+    def release(self, n = 1):
+        with self._lock:
+            self.pending -= n
+
+    # ---- verification ---------------------------------------------------------------
+
+    def verify(self, claim):
+        # -> batch_record of the claim; waits on an identical claim already in flight
+        key = claim_key(claim)
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            # same key, but not necessarily the same text (case / spacing): answer with our own
+            return {**fut.result(), "claim": claim}
+
+        try:
+            rec = self._run(claim)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        fut.set_result(rec)
+        return rec
+
+    def _run(self, claim):
+        with self._slots:
+            with self._lock:
+                self.running += 1
+            try:
+                res = verify_claim(self.agent, claim, self.gm, log=lambda *a: None, reuse=self.reuse)
+                return batch_record(self.gm, res)
+            except Exception as e:
+                return _error_record(claim, e)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"running": self.running, "pending": self.pending, "coalesced": self.coalesced}
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    server_version = "factcheck/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _json(self, status, body, headers = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _text(self, status, text, ctype):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _busy(self):
+        self._json(429, {"error": "too many claims in flight, retry later"}, {"Retry-After": str(RETRY_AFTER_SECS)})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length < 0:
+            raise ValueError("invalid Content-Length")     # rfile.read(-1) would wait for EOF
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ValueError("body must be JSON")
+        if not isinstance(data, dict):
+            raise ValueError("body must be a JSON object")
+        return data
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/health":
+            self._json(200, {"ok": True, **self.server.verifier.stats()})
+        elif path == "/metrics":
+            self._text(200, metrics_text(), "text/plain; version=0.0.4")
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path not in ("/verify", "/verify/batch"):
+            self._json(404, {"error": "not found"})
+            return
+        try:
+            body = self._body()
+            if path == "/verify":
+                self._verify_one(body)
+            else:
+                self._verify_batch(body)
+        except ValueError as e:
+            self._json(400, {"error": str(e)})
+
+    def _verify_one(self, body):
+        claim = body.get("claim")
+        if not isinstance(claim, str) or not claim.strip():
+            raise ValueError("'claim' must be a non-empty string")
+        verifier = self.server.verifier
+        if not verifier.admit(1):
+            self._busy()
+            return
+        try:
+            rec = verifier.verify(claim.strip())
+        finally:
+            verifier.release(1)
+        self._json(200, rec)
+
+    def _verify_batch(self, body):
+        claims = body.get("claims")
+        if not isinstance(claims, list) or not claims or not all(isinstance(c, str) and c.strip() for c in claims):
+            raise ValueError("'claims' must be a non-empty list of strings")
+        verifier = self.server.verifier
+        # 429 is for a busy server only: a batch over max_pending would never be admitted
+        limit = min(SERVICE_MAX_BATCH, verifier.max_pending)
+        if len(claims) > limit:
+            raise ValueError(f"at most {limit} claims per batch")
+        workers = body.get("workers", 4)
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("'workers' must be a positive integer")
+        if not verifier.admit(len(claims)):
+            self._busy()
+            return
+
+        # NDJSON: no Content-Length, the connection closes after the last line
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def one(claim):
+            try:
+                return verifier.verify(claim)
+            finally:
+                verifier.release(1)
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(claims))) as pool:
+            futs = {pool.submit(one, c.strip()): i for i, c in enumerate(claims)}
+            for fut in as_completed(futs):
+                line = json.dumps({"index": futs[fut], **fut.result()}) + "\n"
+                try:
+                    self.wfile.write(line.encode("utf-8"))
+                    self.wfile.flush()
+                except OSError:
+                    # client went away; the remaining claims still finish (and land in the graph)
+                    pass
+
+
+class Service(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, verifier, verbose = False):
+        super().__init__(address, Handler)
+        self.verifier = verifier
+        self.verbose = verbose
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fact-checking HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--agent", action="store_true", help="Use the ReAct agent instead of the direct pipeline")
+    parser.add_argument("--hedge", type=int, default=0, metavar="N", help="Direct pipeline: fetch N extra candidate urls at once")
+    parser.add_argument("--graph-db", metavar="PATH", help="Keep the evidence graph in this SQLite file (default: $FACTCHECK_GRAPH_DB, else in memory)")
+    parser.add_argument("--no-reuse", action="store_true", help="Always run the pipeline, even for near-duplicates of already verified claims")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if args.agent:
+        from verify import build_agent
+        agent = build_agent(verbose=False)
+    else:
+        from pipeline import build_pipeline
+        agent = build_pipeline(hedge=args.hedge)
+    gm = open_graph(args.graph_db)
+    reuse = None if args.no_reuse else EvidenceReuse(gm)
+
+    server = Service((args.host, args.port), Verifier(agent, gm, reuse), verbose=args.verbose)
+    print(f"Listening on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
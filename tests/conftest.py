@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# the modules are imported from the repo root, as the scripts do; the caches (and the
+# reliability counters) go to a throwaway dir instead of the real cache/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["FACTCHECK_CACHE_DIR"] = tempfile.mkdtemp(prefix="factcheck-tests-")
+os.environ["FACTCHECK_GRAPH_DB"] = ""
@@ -0,0 +1,54 @@
+import time
+import itertools
+
+import pytest
+
+from tools.cache import SQLiteCache
+
+_n = itertools.count()
+
+
+@pytest.fixture
+def cache():
+    return SQLiteCache(f"test-{next(_n)}", max_bytes=1000, default_ttl=60)
+
+
+def test_expired_entries_are_only_read_when_stale_is_allowed(cache):
+    cache.set("k", "v", ttl=-1)
+    assert cache.get("k") is None
+    entry = cache.get("k", allow_stale=True)
+    assert entry.value == "v" and entry.expired
+
+
+def test_touch_extends_an_expired_entry(cache):
+    cache.set("k", "v", ttl=-1, meta={"etag": "a"})
+    cache.touch("k", meta={"etag": "b"})
+    entry = cache.get("k")
+    assert entry.value == "v" and entry.meta == {"etag": "b"}
+
+
+def test_least_recently_used_entries_go_first(cache):
+    for i in range(5):
+        cache.set(f"k{i}", "x" * 180)
+        time.sleep(0.002)
+    cache.get("k0")                 # k0 is the most recently used now
+    cache.set("k5", "x" * 180)      # 1080 bytes > max_bytes
+    cache.evict()
+    assert cache.get("k0") is not None and cache.get("k5") is not None
+    assert cache.get("k1") is None
+    assert cache.stats()["bytes"] <= 900
+
+
+def test_purge_keeps_the_tagged_entries(cache):
+    cache.set("old", "v", tag="v1")
+    cache.set("new", "v", tag="v2")
+    assert cache.purge(keep_tag="v2") == 1
+    assert cache.get("new") is not None and cache.get("old") is None
+
+
+def test_counters_add_up_by_prefix(cache):
+    cache.incr("rel:a.com:docs")
+    cache.incr_many({"rel:a.com:docs": 2, "rel:b.com:docs": 1, "hit": 5})
+    assert cache.counters("rel:") == {"rel:a.com:docs": 3, "rel:b.com:docs": 1}
+    cache.reset_counters("rel:")
+    assert cache.counters() == {"hit": 5}
@@ -0,0 +1,73 @@
+import time
+import asyncio
+import contextlib
+
+import pytest
+
+from tools import document_fetcher
+from tools.cache import SQLiteCache
+from tools.domain_scheduler import DomainScheduler, BREAKER_FAILS
+
+
+@pytest.fixture
+def sched(tmp_path):
+    # a fresh state store per test (the caches live in the tests' throwaway cache dir)
+    return DomainScheduler(SQLiteCache(f"domains-{tmp_path.name}", max_bytes=1024 * 1024, default_ttl=0))
+
+
+def _trip(sched, domain):
+    for _ in range(BREAKER_FAILS):
+        sched.record(domain, 0.0, None)
+
+
+def _cool_down(sched, domain):
+    sched._domains[domain].open_until = time.time() - 1
+
+
+def test_breaker_opens_after_repeated_failures(sched):
+    assert sched.allow("slow.example")
+    _trip(sched, "slow.example")
+    assert not sched.allow("slow.example")
+    assert sched.stats("slow.example")["open"]
+
+
+def test_half_open_lets_one_trial_through(sched):
+    _trip(sched, "slow.example")
+    _cool_down(sched, "slow.example")
+    assert sched.allow("slow.example")
+    assert not sched.allow("slow.example")      # the trial is still running
+    sched.record("slow.example", 0.2, 200)
+    assert sched.allow("slow.example") and sched.allow("slow.example")
+
+
+def test_failed_trial_reopens_for_longer(sched):
+    _trip(sched, "slow.example")
+    first = sched._domains["slow.example"].open_until - time.time()
+    _cool_down(sched, "slow.example")
+    assert sched.allow("slow.example")
+    sched.record("slow.example", 0.0, 503)
+    assert not sched.allow("slow.example")
+    assert sched._domains["slow.example"].open_until - time.time() > first
+
+
+def test_cancelled_trial_gives_its_turn_back(sched, monkeypatch):
+    @contextlib.asynccontextmanager
+    async def hanging(url, **kwargs):
+        await asyncio.sleep(60)
+        yield None
+
+    monkeypatch.setattr(document_fetcher, "scheduler", sched)
+    monkeypatch.setattr(document_fetcher, "astream", hanging)
+    _trip(sched, "slow.example")
+    _cool_down(sched, "slow.example")
+
+    async def run():
+        task = asyncio.create_task(document_fetcher.afetch("https://slow.example/cancelled-probe"))
+        await asyncio.sleep(0.05)
+        assert not sched.allow("slow.example")      # the fetch holds the trial
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert sched.allow("slow.example")
@@ -0,0 +1,94 @@
+import json
+import time
+import asyncio
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+
+import pipeline
+from pipeline import DirectPipeline
+
+URLS = [f"https://site{i}.example/story" for i in range(6)]
+ARTICLE = "The bridge opened to traffic in 1998 after six years of construction work. " * 4
+
+
+class Recorder(BaseCallbackHandler):
+
+    def __init__(self):
+        self.events = []
+
+    def on_tool_start(self, serialized, input_str, *, run_id = None, **kwargs):
+        self.events.append(("start", serialized["name"], run_id))
+
+    def on_tool_end(self, output, *, run_id = None, **kwargs):
+        self.events.append(("end", kwargs["name"], run_id))
+
+    def on_tool_error(self, error, *, run_id = None, **kwargs):
+        self.events.append(("error", kwargs["name"], run_id))
+
+
+@pytest.fixture(autouse=True)
+def tools(monkeypatch):
+    # offline tools: site0 and site3 give nothing usable, every fetch takes a little while
+    def fetch(url):
+        time.sleep(0.01 * (1 + URLS.index(url) % 3))
+        return "" if url in (URLS[0], URLS[3]) else ARTICLE
+
+    async def afetch(url):
+        await asyncio.sleep(0.01 * (1 + URLS.index(url) % 3))
+        return "" if url in (URLS[0], URLS[3]) else ARTICLE
+
+    def classify(text):
+        return json.dumps({"summary": "opened in 1998", "label": "supports", "score": 0.8})
+
+    async def aclassify(text):
+        return classify(text)
+
+    monkeypatch.setattr(pipeline, "search_news", lambda claim, num_results: "\n".join(URLS[:num_results]))
+    monkeypatch.setattr(pipeline, "asearch_news", lambda claim, num_results: asyncio.sleep(0, "\n".join(URLS[:num_results])))
+    monkeypatch.setattr(pipeline, "_safe_fetch", fetch)
+    monkeypatch.setattr(pipeline, "_safe_afetch", afetch)
+    monkeypatch.setattr(pipeline, "summarize_and_classify", classify)
+    monkeypatch.setattr(pipeline, "asummarize_and_classify", aclassify)
+    monkeypatch.setattr(pipeline, "summarize_and_classify_batch", lambda claim, texts: [classify(t) for t in texts])
+    monkeypatch.setattr(pipeline, "asummarize_and_classify_batch", lambda claim, texts: asyncio.sleep(0, [classify(t) for t in texts]))
+
+
+MODES = [
+    {"hedge": 0, "batch_summaries": True},
+    {"hedge": 0, "batch_summaries": False},
+    {"hedge": 2, "batch_summaries": True},
+    {"hedge": 2, "batch_summaries": False},
+]
+
+
+def _run(mode, use_async, callbacks):
+    p = DirectPipeline(max_articles=2, num_results=4, min_relevance=0, **mode)
+    inputs = {"input": "The bridge opened in 1998"}
+    if use_async:
+        return asyncio.run(p.acall(inputs, callbacks=callbacks))
+    return p(inputs, callbacks=callbacks)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("mode", MODES)
+def test_picks_max_articles_of_usable_text(mode, use_async):
+    out = _run(mode, use_async, None)
+    summaries = [obs for action, obs in out["intermediate_steps"] if action.tool == "summarize_and_classify"]
+    assert len(summaries) == 2
+    assert out["output"] == "Checked 2 article(s): 2 supporting, 0 refuting."
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize("mode", MODES)
+def test_every_tool_run_starts_before_it_ends_exactly_once(mode, use_async):
+    rec = Recorder()
+    _run(mode, use_async, [rec])
+    time.sleep(0.1)     # fetches cancelled / left running finish in the background
+    starts = [run for kind, _, run in rec.events if kind == "start"]
+    ends = [run for kind, _, run in rec.events if kind != "start"]
+    assert sorted(map(str, starts)) == sorted(map(str, ends))
+    for run in starts:
+        kinds = [kind for kind, _, r in rec.events if r == run]
+        assert kinds[0] == "start" and len(kinds) == 2
+    assert rec.events[0][:2] == ("start", "web_search") and rec.events[1][:2] == ("end", "web_search")
@@ -0,0 +1,107 @@
+import json
+import time
+import socket
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import service
+from service import Service, Verifier
+from graph.graph_manager import GraphManager
+
+
+class BlockingAgent:
+
+    # stands in for the pipeline: counts the runs, and holds each one until released
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.go = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, inputs, callbacks = None):
+        with self._lock:
+            self.calls += 1
+        self.started.set()
+        self.go.wait(5)
+        return {"output": "Checked 0 article(s)", "intermediate_steps": []}
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(agent, **kwargs):
+        server = Service(("127.0.0.1", 0), Verifier(agent, GraphManager(), **kwargs))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _post(server, path, body, timeout = 5):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=timeout)
+    conn.request("POST", path, json.dumps(body))
+    resp = conn.getresponse()
+    data = resp.read().decode("utf-8")
+    conn.close()
+    return resp.status, dict(resp.getheaders()), data
+
+
+def test_identical_claims_in_flight_share_one_run():
+    agent = BlockingAgent()
+    verifier = Verifier(agent, GraphManager())
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(verifier.verify, "The sky is blue")
+        agent.started.wait(5)
+        second = pool.submit(verifier.verify, "the  sky is BLUE")
+        while verifier.coalesced == 0:
+            time.sleep(0.001)
+        agent.go.set()
+        a, b = first.result(5), second.result(5)
+    assert agent.calls == 1
+    assert a["verdict"] == b["verdict"]
+    assert (a["claim"], b["claim"]) == ("The sky is blue", "the  sky is BLUE")
+
+
+def test_over_capacity_gets_429_with_retry_after(serve):
+    agent = BlockingAgent()
+    server = serve(agent, max_pending=1)
+    with ThreadPoolExecutor(1) as pool:
+        held = pool.submit(_post, server, "/verify", {"claim": "first claim"})
+        agent.started.wait(5)
+        status, headers, _ = _post(server, "/verify", {"claim": "second claim"})
+        agent.go.set()
+        assert held.result(5)[0] == 200
+    assert status == 429
+    assert headers["Retry-After"] == str(service.RETRY_AFTER_SECS)
+    assert server.verifier.pending == 0
+
+
+def test_batch_larger_than_max_pending_is_rejected_not_throttled(serve):
+    agent = BlockingAgent()
+    agent.go.set()
+    server = serve(agent, max_pending=3)
+    status, headers, data = _post(server, "/verify/batch", {"claims": ["a", "b", "c", "d"]})
+    assert status == 400 and "Retry-After" not in headers
+    assert "at most 3" in json.loads(data)["error"]
+
+    status, _, data = _post(server, "/verify/batch", {"claims": ["one", "two", "three"]})
+    assert status == 200
+    lines = [json.loads(line) for line in data.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+
+
+def test_negative_content_length_is_rejected(serve):
+    server = serve(BlockingAgent())
+    with socket.create_connection(("127.0.0.1", server.server_port), timeout=5) as sock:
+        sock.sendall(b"POST /verify HTTP/1.1\r\nHost: x\r\nContent-Length: -1\r\n\r\n")
+        head = sock.recv(1024).decode("utf-8")      # a hang here is the bug
+    assert head.startswith("HTTP/1.0 400")
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from graph.graph_manager import GraphManager
+from graph.similarity import ClaimIndex, EvidenceReuse
+
+
+def _verified(gm, text, verdict = "Supported"):
+    cid = gm.add_claim(text)
+    gm.set_properties(cid, verdict=verdict, confidence=0.9, verified_at=time.time())
+    return cid
+
+
+@pytest.mark.parametrize("stored, incoming", [
+    ("Unemployment went up in 2023", "Unemployment went down in 2023"),
+    ("The vaccine was approved before the election", "The vaccine was approved after the election"),
+    ("Most scientists agree that coffee is healthy", "Few scientists agree that coffee is healthy"),
+    ("Prices are above the 2019 level", "Prices are below the 2019 level"),
+    ("The city spent over budget on the bridge", "The city spent under budget on the bridge"),
+    ("The Eiffel Tower is painted every 7 years", "The Eiffel Tower is not painted every 7 years"),
+    ("Inflation rose 2% last year", "Inflation rose 7% last year"),
+])
+def test_opposite_claims_are_not_reused(stored, incoming):
+    gm = GraphManager()
+    reuse = EvidenceReuse(gm, threshold=0.5)
+    reuse.add(_verified(gm, stored), stored)
+    assert reuse.lookup(incoming) is None
+
+
+def test_paraphrase_is_reused():
+    gm = GraphManager()
+    reuse = EvidenceReuse(gm)
+    cid = _verified(gm, "Unemployment went up in 2023")
+    reuse.add(cid, "Unemployment went up in 2023")
+    hit = reuse.lookup("unemployment went UP in 2023!")
+    assert hit is not None and hit[0] == cid and hit[2] == pytest.approx(1.0)
+
+
+def test_search_ranks_the_closest_claim_first():
+    index = ClaimIndex()
+    index.add("1", "The Great Wall of China is visible from space")
+    index.add("2", "The Great Wall of China was built in one century")
+    assert index.search("Great Wall of China visible from space")[0][0] == "1"
+
+
+def test_claims_stored_by_another_process_are_picked_up():
+    gm = GraphManager()
+    reuse = EvidenceReuse(gm, resync=0.01)
+    assert reuse.lookup("Coffee cures cancer") is None
+    cid = _verified(gm, "Coffee cures cancer", "Refuted")      # not through reuse.add
+    time.sleep(0.02)
+    assert reuse.lookup("Coffee cures cancer")[0] == cid
@@ -0,0 +1,83 @@
+import json
+import time
+
+import pytest
+from langchain_core.agents import AgentAction
+
+from ingest import verify_claim
+from graph.graph_manager import GraphManager
+from graph.sqlite_graph import SQLiteGraphManager
+from graph.similarity import EvidenceReuse
+
+
+class ScriptedAgent:
+
+    # returns one fetched article and one classified snippet per run
+
+    def __init__(self, label, score, url = "https://news.example/story"):
+        self.label, self.score, self.url = label, score, url
+        self.text = "The bridge opened to traffic in 1998 after six years of work. " * 5
+
+    def __call__(self, inputs, callbacks = None):
+        obs = json.dumps({"summary": f"{self.label} at {self.score}", "label": self.label, "score": self.score})
+        return {
+            "output": "done",
+            "intermediate_steps": [
+                (AgentAction(tool="document_fetcher", tool_input=self.url, log=""), self.text),
+                (AgentAction(tool="summarize_and_classify", tool_input=self.text, log=""), obs),
+            ],
+        }
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def gm(request, tmp_path):
+    return SQLiteGraphManager(str(tmp_path / "graph.sqlite")) if request.param == "sqlite" else GraphManager()
+
+
+def _verify(gm, agent, claim = "The bridge opened in 1998"):
+    return verify_claim(agent, claim, gm, log=lambda *a: None)
+
+
+def test_reverified_claim_keeps_only_the_new_evidence(gm):
+    first = _verify(gm, ScriptedAgent("supports", 0.9))
+    second = _verify(gm, ScriptedAgent("refutes", 0.7))
+    assert second["verdict"] == "Refuted"
+    cid = second["claim_id"]
+    assert gm.get_top_snippets(cid, "supports") == []
+    assert gm.get_top_snippets(cid, "refutes") == [("refutes at 0.7", 0.7)]
+    assert len(gm.neighbors(cid, "cites")) == 1
+    if isinstance(gm, SQLiteGraphManager):
+        assert cid == first["claim_id"]
+
+
+def test_same_evidence_again_is_kept(tmp_path):
+    gm = SQLiteGraphManager(str(tmp_path / "graph.sqlite"))
+    _verify(gm, ScriptedAgent("supports", 0.9))
+    res = _verify(gm, ScriptedAgent("supports", 0.8))
+    assert [s for s, _ in gm.get_top_snippets(res["claim_id"], "supports")] == ["supports at 0.8"]
+    assert [n.properties["url"] for n in gm.neighbors(res["claim_id"], "cites")] == ["https://news.example/story"]
+
+
+def test_claims_are_deduplicated_and_keep_their_verdict_until_reverified(tmp_path):
+    gm = SQLiteGraphManager(str(tmp_path / "graph.sqlite"))
+    res = _verify(gm, ScriptedAgent("supports", 0.9))
+    # a new run of the same claim starts: the stored verdict must stay readable meanwhile
+    cid = gm.add_claim("the bridge  opened in 1998")
+    assert cid == res["claim_id"]
+    props = gm.get_node(cid).properties
+    assert props["verdict"] == "Supported" and props["text"] == "the bridge  opened in 1998"
+    assert EvidenceReuse(gm).lookup("The bridge opened in 1998") is not None
+
+
+def test_documents_are_deduplicated_by_url(tmp_path):
+    gm = SQLiteGraphManager(str(tmp_path / "graph.sqlite"))
+    a = gm.add_document("https://news.example/story?utm_source=x", "text one")
+    b = gm.add_document("https://news.example/story", "text two")
+    assert a == b and gm.get_text(a) == "text two"
+
+
+def test_ttl_evicts_old_documents_and_snippets(tmp_path):
+    gm = SQLiteGraphManager(str(tmp_path / "graph.sqlite"), ttl=3600)
+    _verify(gm, ScriptedAgent("supports", 0.9))
+    assert gm.evict(now=time.time() + 7200) == 2
+    assert [label for label in (n.label for n in gm.iter_nodes())] == ["Claim"]
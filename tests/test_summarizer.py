@@ -0,0 +1,75 @@
+import json
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from tools import summarizer
+from tools.tokens import count_tokens
+
+_n = itertools.count()
+
+
+def _article(tokens):
+    # a fresh text (the summaries are memoized) of about that many tokens
+    article = next(_n)
+    paras = []
+    while count_tokens("\n\n".join(paras)) < tokens:
+        paras.append(f"Article {article}, part {len(paras)}: the bridge opened in 1998 after six years of work.")
+    return "\n\n".join(paras)
+
+
+def _answer():
+    content = json.dumps({"summary": "The bridge opened in 1998.", "label": "supports", "score": 0.8})
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    made = []
+
+    def create(**kwargs):
+        made.append(kwargs)
+        return _answer()
+
+    async def acreate(**kwargs):
+        return create(**kwargs)
+
+    monkeypatch.setattr(summarizer, "_create", create)
+    monkeypatch.setattr(summarizer, "_acreate", acreate)
+    return made
+
+
+def test_full_size_document_is_one_call(calls):
+    text = _article(summarizer.MAP_REDUCE_TOKENS - 100)
+    assert count_tokens(text) > summarizer.PASSAGE_MAX_TOKENS
+    summarizer.summarize_and_classify(text)
+    asyncio.run(summarizer.asummarize_and_classify(_article(summarizer.MAP_REDUCE_TOKENS - 100)))
+    assert len(calls) == 2
+
+
+def test_oversized_text_is_map_reduced(calls):
+    out = summarizer.summarize_and_classify(_article(2 * summarizer.MAP_REDUCE_TOKENS))
+    assert json.loads(out)["label"] == "supports"
+    assert len(calls) > 2       # the chunks, then their summaries together
+
+
+def test_same_passage_is_answered_from_the_memo(calls):
+    text = _article(300)
+    assert summarizer.summarize_and_classify(text) == summarizer.summarize_and_classify(text)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("raw", [None, 42, "", "not json", '{"results": []}'])
+def test_unusable_batch_answers_are_rejected(raw):
+    assert summarizer.parse_batch(raw, 2) is None
+
+
+def test_batch_answer_is_put_back_in_passage_order():
+    raw = json.dumps({"results": [
+        {"index": 1, "summary": "b", "label": "refutes", "score": 0.6},
+        {"index": 0, "summary": "a", "label": "supports", "score": 0.9},
+    ]})
+    records = summarizer.parse_batch(raw, 2)
+    assert [json.loads(r)["summary"] for r in records] == ["a", "b"]
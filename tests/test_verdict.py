@@ -0,0 +1,31 @@
+import pytest
+
+from ingest import compute_verdict
+
+
+def test_no_evidence_is_inconclusive():
+    assert compute_verdict([], []) == ("Inconclusive", 0.0)
+
+
+def test_one_sided_evidence_keeps_its_score():
+    assert compute_verdict([0.9, 0.7], []) == ("Supported", pytest.approx(0.8))
+    assert compute_verdict([], [(0.6, 1.5)]) == ("Refuted", pytest.approx(0.6))
+
+
+def test_trusted_source_outweighs_a_weak_one():
+    # unweighted the supporting snippet wins; with source weights the refuting one does
+    assert compute_verdict([0.9], [0.8])[0] == "Supported"
+    verdict, confidence = compute_verdict([(0.9, 0.6)], [(0.8, 1.4)])
+    assert verdict == "Refuted"
+    assert confidence == pytest.approx(0.8 * 1.4 / 2.0)
+
+
+def test_conflicting_evidence_lowers_confidence():
+    _, alone = compute_verdict([0.9], [])
+    _, contested = compute_verdict([0.9], [0.3])
+    assert contested < alone
+
+
+def test_confidence_stays_in_range():
+    for sup, ref in [([(1.0, 1.5)] * 3, []), ([(1.0, 1.5)], [(1.0, 0.5)]), ([(0.2, 0.5)], [(0.2, 0.5)])]:
+        assert 0.0 <= compute_verdict(sup, ref)[1] <= 1.0
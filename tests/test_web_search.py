@@ -0,0 +1,68 @@
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools import web_search
+
+_n = itertools.count()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # a slow SerpAPI stand-in that counts its calls
+    state = {"calls": 0, "error": None}
+
+    def search(query):
+        state["calls"] += 1
+        time.sleep(0.1)
+        if state["error"]:
+            raise state["error"]
+        return [f"https://site{i}.example/{query.replace(' ', '-')}" for i in range(3)]
+
+    monkeypatch.setattr(web_search, "_search_upstream", search)
+    return state
+
+
+def _query():
+    return f"claim number {next(_n)} about the moon"
+
+
+def test_concurrent_identical_searches_make_one_upstream_call(upstream):
+    query = _query()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda q: web_search.search_news(q, num_results=3), [query, query.upper()] * 2))
+    assert upstream["calls"] == 1
+    assert len(set(results)) == 1 and len(results[0].splitlines()) == 3
+    assert web_search.search_news(query, num_results=3) == results[0]      # from the cache now
+    assert upstream["calls"] == 1 and not web_search._inflight
+
+
+def test_upstream_failure_reaches_every_waiter(upstream):
+    upstream["error"] = RuntimeError("serpapi down")
+    query = _query()
+    with ThreadPoolExecutor(3) as pool:
+        futs = [pool.submit(web_search.search_news, query) for _ in range(3)]
+        errors = [f.exception(5) for f in futs]
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert upstream["calls"] == 1 and not web_search._inflight
+
+
+def test_failed_cache_write_does_not_strand_followers(upstream, monkeypatch):
+    def broken_set(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(web_search._search_cache, "set", broken_set)
+    query = _query()
+    fut, leader = web_search._join(web_search.query_key(query))
+    assert leader
+    coalesced = web_search._stats["coalesced"]
+    with ThreadPoolExecutor(1) as pool:
+        follower = pool.submit(web_search.search_news, query)
+        while web_search._stats["coalesced"] == coalesced:      # until it waits on our future
+            time.sleep(0.001)
+        with pytest.raises(OSError):
+            web_search._done(web_search.query_key(query), fut, ["https://a.example/x"])
+        assert isinstance(follower.exception(5), OSError)
+    assert not web_search._inflight
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Small on-disk key/value cache used by the tools (fetched documents, search
+# results, LLM outputs). One SQLite file per cache under FACTCHECK_CACHE_DIR.
+#   - every entry has its own expiry (TTL); expired entries can still be read
+#     with allow_stale=True, e.g. to revalidate them with an ETag
+#   - size bounded: least recently used entries are dropped once the file holds
+#     more than max_bytes of values
+#   - WAL mode + busy timeout, so several processes (Streamlit workers, the CLI)
+#     can share the same file; each thread gets its own connection
+
+CACHE_DIR = os.getenv(
+    "FACTCHECK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "factcheck"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key      TEXT PRIMARY KEY,
+    value    TEXT,
+    meta     TEXT,
+    tag      TEXT,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    expires  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+CREATE INDEX IF NOT EXISTS entries_tag ON entries(tag);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+EVICT_EVERY = 32    # check the size bound every N writes (per process)
+
+
+class Entry:
+    __slots__ = ("value", "meta", "created", "expires")
+
+    def __init__(self, value, meta, created, expires):
+        self.value = value
+        self.meta = meta
+        self.created = created
+        self.expires = expires
+
+    @property
+    def expired(self):
+        return time.time() >= self.expires
+
+
+class SQLiteCache:
+
+    def __init__(self, name, max_bytes, default_ttl):
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite")
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ---- entries -------------------------------------------------------------
+
+    def get(self, key, allow_stale = False):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, meta, created, expires FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = Entry(row[0], json.loads(row[1]) if row[1] else {}, row[2], row[3])
+        if entry.expired and not allow_stale:
+            return None
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return entry
+
+    def set(self, key, value, ttl = None, meta = None, tag = None):
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, value, meta, tag, size, created, expires, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, value, json.dumps(meta) if meta else None, tag,
+             len(value.encode("utf-8")) if value else 0, now, now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def touch(self, key, ttl = None, meta = None):
+        # extend an entry's life (e.g. after a 304 Not Modified)
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        if meta is None:
+            self._conn().execute(
+                "UPDATE entries SET expires = ?, accessed = ? WHERE key = ?", (now + ttl, now, key)
+            )
+        else:
+            self._conn().execute(
+                "UPDATE entries SET expires = ?, accessed = ?, meta = ? WHERE key = ?",
+                (now + ttl, now, json.dumps(meta), key),
+            )
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def purge(self, keep_tag = None):
+        # drop everything, or everything not tagged keep_tag; returns the number of rows removed
+        conn = self._conn()
+        if keep_tag is None:
+            cur = conn.execute("DELETE FROM entries")
+        else:
+            cur = conn.execute("DELETE FROM entries WHERE tag IS NULL OR tag != ?", (keep_tag,))
+        return cur.rowcount
+
+    def evict(self):
+        # LRU down to 90% of max_bytes. BEGIN IMMEDIATE takes the write lock up
+        # front so two processes dont evict the same rows at once.
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > self.max_bytes:
+                target = total - int(self.max_bytes * 0.9)
+                freed, victims = 0, []
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                    victims.append((key,))
+                    freed += size
+                    if freed >= target:
+                        break
+                conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---- counters / stats ----------------------------------------------------
+
+    def incr(self, name, n = 1):
+        self._conn().execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def incr_many(self, counts):
+        # several counters in one transaction
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                list(counts.items()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reset_counters(self, prefix = ""):
+        self._conn().execute("DELETE FROM counters WHERE name >= ? AND name < ?", (prefix, prefix + "\uffff"))
+
+    def counters(self, prefix = ""):
+        rows = self._conn().execute(
+            "SELECT name, value FROM counters WHERE name >= ? AND name < ?", (prefix, prefix + "\uffff")
+        )
+        return dict(rows)
+
+    def stats(self):
+        conn = self._conn()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        counters = dict(conn.execute("SELECT name, value FROM counters"))
+        return {"entries": entries, "bytes": size, **counters}
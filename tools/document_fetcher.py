@@ -1,11 +1,19 @@
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
 load_dotenv()
 
-import requests
-from newspaper import Article
-from bs4 import BeautifulSoup
-from langchain.tools import Tool
+from lxml import etree
+from langchain_core.tools import Tool
+
+from tools.http_client import get_session, astream
+from tools.cache import SQLiteCache
+from tools.urls import url_key, domain_of
+from tools.domain_scheduler import scheduler
+from tools.tracing import span
+from tools.extractors import extract, record, quality, MIN_PARA_CHARS
+from tools.tokens import count_tokens, fit
 
 # Browser header to avoid 403 error.
 HEADERS = {
@@ -15,48 +23,247 @@ HEADERS = {
     )
 }
 
-def _limit_paragraphs(text, max_paras = 6):
+# On-disk cache of extracted (already paragraph-limited) article text, keyed by normalized url.
+# Expired entries that came with an ETag / Last-Modified are revalidated with a
+# conditional GET instead of being downloaded and parsed again.
+# Failed fetches are cached too, but only briefly, so dead links arent retried on every claim.
+DOC_CACHE_TTL = float(os.getenv("DOC_CACHE_TTL", str(24 * 3600)))
+DOC_CACHE_NEGATIVE_TTL = float(os.getenv("DOC_CACHE_NEGATIVE_TTL", "900"))
+DOC_CACHE_MAX_MB = float(os.getenv("DOC_CACHE_MAX_MB", "200"))
+
+_doc_cache = SQLiteCache("documents", max_bytes=int(DOC_CACHE_MAX_MB * 1024 * 1024), default_ttl=DOC_CACHE_TTL)
+
+# Download limits. The body is streamed and never read past FETCH_MAX_BYTES, and
+# responses that arent HTML are dropped as soon as the headers arrive.
+# FETCH_STREAMING=1 switches to streaming extraction: <p> tags are collected with
+# lxml's incremental parser while the page downloads, and reading stops as soon as
+# DOC_MAX_TOKENS of paragraphs are in (no newspaper3k pass, which needs the whole page).
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+FETCH_STREAMING = os.getenv("FETCH_STREAMING", "0").lower() in ("1", "true", "yes")
+# size of the returned article text, in tokens (whole paragraphs, lead first).
+# The summarizer trims it again per claim and map-reduces what is still too long.
+DOC_MAX_TOKENS = int(os.getenv("DOC_MAX_TOKENS", "2400"))
+CHUNK_SIZE = 16 * 1024
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+def _limit_paragraphs(text, max_tokens = DOC_MAX_TOKENS):
 
-    # using only first paragraph from the link.
+    # using only the first paragraphs from the link, up to a token budget
+    # (a count of paragraphs let one huge paragraph through and cut short pages too early).
     # assumption: Paragraphs are assumed to be separated by blank lines.
 
-    paras = [p.strip() for p in text.split("\n\n") if p.strip()]
-    return "\n\n".join(paras[:max_paras])
+    return fit(text, max_tokens)
 
-def fetch(url):
+def _extract(url, html):
+
+    # the page is downloaded once (pooled session), then the extractor chain runs over
+    # the same html: newspaper3k → <p> heuristic → readability scorer (tools/extractors.py)
+
+    text, _report = extract(url, html)
+
+    # Limit to DOC_MAX_TOKENS for concise summaries
+    return _limit_paragraphs(text)
+
+class NotHTML(Exception):
+    pass
+
+def _charset(headers):
+    # charset from Content-Type, only if the server actually sent one
+    for part in headers.get("Content-Type", "").split(";")[1:]:
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip("\"' ")
+    return None
+
+def _check_html(headers):
+    ctype = headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if ctype and ctype not in _HTML_TYPES:
+        raise NotHTML(ctype)
+
+class _BodyReader:
+
+    # Consumes the body chunk by chunk; feed() returns True once there is no need to read more.
+    #  - default: buffers up to FETCH_MAX_BYTES, then runs _extract (newspaper3k → BS4) on it
+    #  - streaming: lxml pull parser, stops once the qualifying <p> paragraphs reach DOC_MAX_TOKENS
 
-    # using : 
-    # 1. newspaper3k 
-    # if newspaper3k doesnt work or returns an error or small paragraph or less then 1 para, we will do to option 2.
-    # 2. beautifulSoup
-    
-    text = ""
+    def __init__(self, headers, streaming = FETCH_STREAMING):
+        self.charset = _charset(headers)
+        self.streaming = streaming
+        self.size = 0
+        self.buf = bytearray()
+        self.paras = []
+        self.tokens = 0
+        self.parser = etree.HTMLPullParser(events=("end",), encoding=self.charset) if streaming else None
+        self.started = time.perf_counter()
 
-    # 1) Newspaper3k
+    def feed(self, chunk):
+        room = FETCH_MAX_BYTES - self.size
+        chunk = chunk[:room]
+        self.size += len(chunk)
+        if not self.streaming:
+            self.buf += chunk
+            return self.size >= FETCH_MAX_BYTES
+        self.parser.feed(chunk)
+        for _, el in self.parser.read_events():
+            if el.tag != "p":
+                continue
+            para = " ".join("".join(el.itertext()).split())
+            el.clear()
+            if len(para) > MIN_PARA_CHARS:
+                self.paras.append(para)
+                self.tokens += count_tokens(para) + 1
+                if self.tokens >= DOC_MAX_TOKENS:
+                    return True
+        return self.size >= FETCH_MAX_BYTES
+
+    def text(self, url):
+        if self.streaming:
+            text = _limit_paragraphs("\n\n".join(self.paras))
+            ms = round((time.perf_counter() - self.started) * 1000, 1)
+            record(url, [{"extractor": "stream", "ms": ms, "quality": quality(text), "chosen": True}])
+            return text
+        html = bytes(self.buf).decode(self.charset or "utf-8", errors="replace")
+        return _extract(url, html)
+
+def _cached(url):
+    # -> (key, entry or None). fresh entries can be returned as they are.
+    key = url_key(url)
+    return key, _doc_cache.get(key, allow_stale=True)
+
+def _request_headers(entry):
+    headers = dict(HEADERS)
+    if entry is not None and entry.value:
+        if entry.meta.get("etag"):
+            headers["If-None-Match"] = entry.meta["etag"]
+        if entry.meta.get("last_modified"):
+            headers["If-Modified-Since"] = entry.meta["last_modified"]
+    return headers
+
+def _store(key, url, text, resp_headers):
+    if not text:
+        _doc_cache.set(key, "", ttl=DOC_CACHE_NEGATIVE_TTL, meta={"url": url, "negative": True})
+        return
+    meta = {"url": url, "fetched_at": time.time()}
+    if resp_headers.get("ETag"):
+        meta["etag"] = resp_headers["ETag"]
+    if resp_headers.get("Last-Modified"):
+        meta["last_modified"] = resp_headers["Last-Modified"]
+    _doc_cache.set(key, text, meta=meta)
+
+def _revalidated(key, entry, status):
+    # 304 → keep the cached text and start a new TTL
+    if status == 304 and entry is not None and entry.value:
+        _doc_cache.touch(key, meta={**entry.meta, "fetched_at": time.time()})
+        return True
+    return False
+
+def _failed(key, url, entry):
+    # a stale copy beats nothing; otherwise remember the failure for a short while
+    if entry is not None and entry.value:
+        return entry.value
+    _store(key, url, "", {})
+    return ""
+
+def _skipped(entry):
+    # domain circuit is open: dont even try, and dont cache anything for this url
+    return entry.value if entry is not None and entry.value else ""
+
+def fetch(url):
+    with span("fetch", domain=domain_of(url)) as sp:
+        text = _fetch(url, sp)
+        sp.set(chars=len(text))
+        return text
+
+def _fetch(url, sp):
+    key, entry = _cached(url)
+    if entry is not None and not entry.expired:
+        sp.set(cache="hit")
+        return entry.value
+    domain = domain_of(url)
+    if not scheduler.allow(domain):
+        sp.set(cache="skipped")
+        return _skipped(entry)
+    sp.set(cache="miss")
+    status = None
     try:
-        art = Article(url)
-        art.download()
-        art.parse()
-        full = art.text.strip()
-        if full:
-            text = full
-    except Exception:
-        pass
-# fallback: 
-
-    # 2) BeautifulSoup 
-    if not text or len(text.split("\n\n")) < 2:
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=10)
+        with scheduler.slot(domain), get_session().get(
+            url, headers=_request_headers(entry), timeout=scheduler.timeout(domain), stream=True
+        ) as resp:
+            status = resp.status_code
+            sp.set(status=status)
+            scheduler.record(domain, resp.elapsed.total_seconds(), status)
+            if _revalidated(key, entry, resp.status_code):
+                sp.set(cache="revalidated")
+                return entry.value
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "html.parser")
-            paras = [p.get_text(strip=True)for p in soup.find_all("p") if len(p.get_text(strip=True)) > 30]
-            text = "\n\n".join(paras)
-        except Exception:
-            return ""
+            _check_html(resp.headers)
+            body = _BodyReader(resp.headers)
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                if body.feed(chunk):
+                    break
+            resp_headers = resp.headers
+            sp.set(bytes=body.size)
+    except Exception as e:
+        sp.fail(e)
+        if status is None:
+            scheduler.record(domain, 0.0, None)     # timeout / connection error
+        return _failed(key, url, entry)
+    except BaseException:
+        if status is None:
+            scheduler.release(domain)
+        raise
+    text = body.text(url)
+    _store(key, url, text, resp_headers)
+    return text
 
-    # 3) Limit to 6 paragraphs for concise summaries
-    return _limit_paragraphs(text, max_paras=6)
+async def afetch(url):
+    # async version of fetch: download on the shared async client,
+    # parsing the whole page is CPU work so it goes to a worker thread.
+    with span("fetch", domain=domain_of(url)) as sp:
+        text = await _afetch(url, sp)
+        sp.set(chars=len(text))
+        return text
+
+async def _afetch(url, sp):
+    key, entry = _cached(url)
+    if entry is not None and not entry.expired:
+        sp.set(cache="hit")
+        return entry.value
+    domain = domain_of(url)
+    if not scheduler.allow(domain):
+        sp.set(cache="skipped")
+        return _skipped(entry)
+    sp.set(cache="miss")
+    status = None
+    try:
+        async with astream(url, headers=_request_headers(entry), timeout=scheduler.timeout(domain)) as resp:
+            status = resp.status_code
+            sp.set(status=status)
+            scheduler.record(domain, resp.extensions["ttfb"], status)
+            if _revalidated(key, entry, resp.status_code):
+                sp.set(cache="revalidated")
+                return entry.value
+            resp.raise_for_status()
+            _check_html(resp.headers)
+            body = _BodyReader(resp.headers)
+            async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                if body.feed(chunk):
+                    break
+            resp_headers = resp.headers
+            sp.set(bytes=body.size)
+    except Exception as e:
+        sp.fail(e)
+        if status is None:
+            scheduler.record(domain, 0.0, None)
+        return _failed(key, url, entry)
+    except BaseException:
+        # cancelled (a hedged / losing fetch): no outcome, but a half-open trial must not stay taken
+        if status is None:
+            scheduler.release(domain)
+        raise
+    text = body.text(url) if body.streaming else await asyncio.to_thread(body.text, url)
+    _store(key, url, text, resp_headers)
+    return text
 
 
 # --------------------------------------------------------------------------------------
@@ -64,8 +271,9 @@ def fetch(url):
 document_fetcher_tool = Tool(
     name="document_fetcher",
     func=fetch,
+    coroutine=afetch,
     description=(
-        "Fetch the main article body from all URLs (newspaper3k → BS4 fallback), "
-        "then trim to the first 6 paragraphs only. Returns empty string on error."
+        "Fetch the main article body from all URLs (newspaper3k → <p> heuristic → readability fallback), "
+        "then trim it to the first paragraphs that fit the token budget. Returns empty string on error."
     )
 )
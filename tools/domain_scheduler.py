@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+from tools.cache import SQLiteCache
+from tools.http_client import MAX_PER_HOST
+
+load_dotenv()
+
+# Per-domain politeness + health for document fetches.
+#   - adaptive timeout: from the p95 of recent time-to-headers latencies of that domain
+#     (clamped to FETCH_MIN_TIMEOUT..FETCH_MAX_TIMEOUT; unknown domains get the max)
+#   - circuit breaker: after FETCH_BREAKER_FAILS failures in a row (timeouts, connection
+#     errors, 403/429/5xx) the domain is skipped at once for a cool-down that doubles on
+#     every re-trip. When it ends, one trial request is let through (half-open); a trial
+#     that ends without an answer (cancelled) gives its turn back with release().
+#   - at most HTTP_MAX_PER_HOST concurrent sync fetches per domain (async fetches are
+#     capped by tools/http_client.limited)
+# State is kept in the cache dir, so slow / blocking domains are remembered between runs.
+
+MIN_TIMEOUT = float(os.getenv("FETCH_MIN_TIMEOUT", "3"))
+MAX_TIMEOUT = float(os.getenv("FETCH_MAX_TIMEOUT", "10"))
+BREAKER_FAILS = int(os.getenv("FETCH_BREAKER_FAILS", "3"))
+BREAKER_COOLDOWN = float(os.getenv("FETCH_BREAKER_COOLDOWN", "300"))
+MAX_COOLDOWN = 3600.0
+WINDOW = 50           # latencies kept per domain
+MIN_SAMPLES = 5       # before that the timeout stays at MAX_TIMEOUT
+STATE_TTL = 30 * 24 * 3600
+
+_BAD_STATUS = {403, 429}   # the domain is blocking us, not just missing a page
+
+
+def is_failure(status):
+    # status=None means no response at all (timeout, connection error)
+    return status is None or status in _BAD_STATUS or status >= 500
+
+
+class _Domain:
+    __slots__ = ("latencies", "fails", "trips", "open_until", "probing", "ok", "errors")
+
+    def __init__(self, state = None):
+        state = state or {}
+        self.latencies = deque(state.get("latencies", []), maxlen=WINDOW)
+        self.fails = state.get("fails", 0)
+        self.trips = state.get("trips", 0)
+        self.open_until = state.get("open_until", 0.0)
+        self.ok = state.get("ok", 0)
+        self.errors = state.get("errors", 0)
+        self.probing = False
+
+    def state(self):
+        return {
+            "latencies": list(self.latencies), "fails": self.fails, "trips": self.trips,
+            "open_until": self.open_until, "ok": self.ok, "errors": self.errors,
+        }
+
+    def p95(self):
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+class DomainScheduler:
+
+    def __init__(self, store = None):
+        self._store = store or SQLiteCache("domains", max_bytes=8 * 1024 * 1024, default_ttl=STATE_TTL)
+        self._domains = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _get(self, domain):
+        # caller holds self._lock
+        d = self._domains.get(domain)
+        if d is None:
+            entry = self._store.get(domain)
+            d = self._domains[domain] = _Domain(json.loads(entry.value) if entry else None)
+        return d
+
+    def _save(self, domain, d):
+        try:
+            self._store.set(domain, json.dumps(d.state()))
+        except Exception:
+            pass    # losing a state update is fine, blocking a fetch is not
+
+    def timeout(self, domain):
+        with self._lock:
+            p95 = self._get(domain).p95()
+        if p95 is None:
+            return MAX_TIMEOUT
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, 2 * p95 + 1))
+
+    def allow(self, domain):
+        # False while the breaker is open; after the cool-down one trial request goes through
+        with self._lock:
+            d = self._get(domain)
+            if d.fails < BREAKER_FAILS:
+                return True
+            if time.time() < d.open_until or d.probing:
+                return False
+            d.probing = True
+            return True
+
+    def record(self, domain, latency, status):
+        with self._lock:
+            d = self._get(domain)
+            d.probing = False
+            if is_failure(status):
+                d.errors += 1
+                d.fails += 1
+                if d.fails >= BREAKER_FAILS:
+                    cooldown = min(MAX_COOLDOWN, BREAKER_COOLDOWN * (2 ** d.trips))
+                    d.open_until = time.time() + cooldown
+                    d.trips += 1
+            else:
+                d.ok += 1
+                d.fails = 0
+                d.trips = 0
+                d.latencies.append(round(latency, 3))
+            self._save(domain, d)
+
+    def release(self, domain):
+        # a request let through by allow() ended without an outcome (e.g. a cancelled fetch):
+        # the next one may be the half-open trial instead
+        with self._lock:
+            d = self._domains.get(domain)
+            if d is not None:
+                d.probing = False
+
+    @contextmanager
+    def slot(self, domain):
+        with self._lock:
+            sem = self._slots.get(domain)
+            if sem is None:
+                sem = self._slots[domain] = threading.BoundedSemaphore(MAX_PER_HOST)
+        with sem:
+            yield
+
+    def stats(self, domain):
+        with self._lock:
+            d = self._get(domain)
+            info = {
+                "p95": d.p95(), "ok": d.ok, "errors": d.errors,
+                "open": d.fails >= BREAKER_FAILS and time.time() < d.open_until,
+            }
+        info["timeout"] = self.timeout(domain)
+        return info
+
+
+scheduler = DomainScheduler()
@@ -0,0 +1,176 @@
+import os
+import time
+import threading
+
+import lxml.html
+
+from tools.cache import SQLiteCache
+from tools.urls import domain_of
+from tools.tracing import span
+
+# Extractor chain: the page is downloaded once and every extractor works on the same html.
+#   newspaper   → newspaper3k's article parser
+#   paragraphs  → every <p> with some text in it (the old BeautifulSoup fallback)
+#   readability → scores containers by the paragraphs inside them and keeps the best one
+# The chain stops at the first result that is good enough; otherwise the best one wins.
+# Each run is timed and scored, and counted per domain (runs / wins / time / quality),
+# so extractor_stats() shows which extractor wins on which sites.
+# newspaper3k and BeautifulSoup are imported on first use (newspaper alone adds seconds
+# to every process start, and the streaming fetch mode never needs it).
+# newspaper gets slow on big pages (tens of seconds for a 2 MiB one), so pages larger than
+# NEWSPAPER_MAX_CHARS skip it and go straight to the lighter extractors.
+
+QUALITY_PARAS = 6      # paragraphs for full marks in quality(); the text itself is trimmed by tools/tokens.fit
+MIN_PARA_CHARS = 30
+NEWSPAPER_MAX_CHARS = int(os.getenv("NEWSPAPER_MAX_CHARS", "300000"))
+EXTRACTORS = [e.strip() for e in os.getenv("EXTRACTORS", "newspaper,paragraphs,readability").split(",") if e.strip()]
+
+_stats = SQLiteCache("extractors", max_bytes=1024 * 1024, default_ttl=0)
+_stats_lock = threading.Lock()
+
+
+def _clean(text):
+    return " ".join(text.split())
+
+
+def newspaper_extract(url, html):
+    if len(html) > NEWSPAPER_MAX_CHARS:
+        return ""
+    from newspaper import Article
+    art = Article(url)
+    art.download(input_html=html)
+    art.parse()
+    return art.text.strip()
+
+
+def paragraph_extract(url, html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    paras = []
+    for p in soup.find_all("p"):
+        para = _clean(p.get_text(" "))
+        if len(para) > MIN_PARA_CHARS:
+            paras.append(para)
+    return "\n\n".join(paras)
+
+
+def _link_density(el):
+    text_len = len(el.text_content()) or 1
+    link_len = sum(len(a.text_content()) for a in el.iter("a"))
+    return link_len / text_len
+
+
+def readability_extract(url, html):
+    doc = lxml.html.fromstring(html)
+    for junk in doc.xpath("//script|//style|//noscript|//nav|//header|//footer|//aside|//form"):
+        junk.drop_tree()
+
+    # every paragraph votes for its parent (full score) and grandparent (half)
+    scores = {}
+    for p in doc.iter("p"):
+        text = _clean(p.text_content())
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = p.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + score
+        grand = parent.getparent()
+        if grand is not None:
+            scores[grand] = scores.get(grand, 0) + score / 2
+    if not scores:
+        return ""
+
+    best = max(scores, key=lambda el: scores[el] * (1 - _link_density(el)))
+    paras = [_clean(p.text_content()) for p in best.iter("p")]
+    return "\n\n".join(p for p in paras if len(p) > MIN_PARA_CHARS)
+
+
+_EXTRACTORS = {
+    "newspaper": newspaper_extract,
+    "paragraphs": paragraph_extract,
+    "readability": readability_extract,
+}
+
+
+def quality(text):
+    # 0..1: half for the number of paragraphs (up to QUALITY_PARAS), half for the amount of text
+    if not text:
+        return 0.0
+    paras = [p for p in text.split("\n\n") if p.strip()]
+    return round(0.5 * min(1.0, len(paras) / QUALITY_PARAS) + 0.5 * min(1.0, len(text) / 1200), 3)
+
+
+def good_enough(text):
+    # same bar the old newspaper → BS4 fallback used: at least 2 paragraphs
+    return len([p for p in text.split("\n\n") if p.strip()]) >= 2
+
+
+def extract(url, html):
+    # -> (text, report); report = [{extractor, ms, quality, chosen}, ...]
+    with span("extract", html_chars=len(html)) as sp:
+        text, report = _run_chain(url, html)
+        chosen = [r["extractor"] for r in report if r["chosen"]]
+        sp.set(extractor=chosen[0] if chosen else None, chars=len(text), tried=len(report))
+    return text, report
+
+
+def _run_chain(url, html):
+    report, best, best_q = [], "", -1.0
+    for name in EXTRACTORS:
+        fn = _EXTRACTORS.get(name)
+        if fn is None:
+            continue
+        start = time.perf_counter()
+        try:
+            text = fn(url, html) or ""
+        except Exception:
+            text = ""
+        q = quality(text)
+        report.append({"extractor": name, "ms": round((time.perf_counter() - start) * 1000, 1), "quality": q, "chosen": False})
+        if q > best_q:
+            best, best_q, chosen = text, q, len(report) - 1
+        if good_enough(text):
+            best, chosen = text, len(report) - 1
+            break
+    if report:
+        report[chosen]["chosen"] = True
+    record(url, report)
+    return best, report
+
+
+def record(url, report):
+    # adds one extraction report to the per-domain counters
+    domain = domain_of(url) or "?"
+    counts = {}
+    for r in report:
+        base = f"{domain}|{r['extractor']}|"
+        counts[base + "runs"] = 1
+        counts[base + "wins"] = int(r["chosen"])
+        counts[base + "us"] = int(r["ms"] * 1000)
+        counts[base + "quality_milli"] = int(r["quality"] * 1000)
+    if counts:
+        try:
+            with _stats_lock:
+                _stats.incr_many(counts)
+        except Exception:
+            pass    # stats must never break a fetch
+
+
+def extractor_stats(domain = None):
+    # {domain: {extractor: {runs, wins, avg_ms, avg_quality}}}
+    out = {}
+    for name, value in _stats.counters(f"{domain}|" if domain else "").items():
+        dom, ext, field = name.split("|")
+        out.setdefault(dom, {}).setdefault(ext, {})[field] = value
+    for exts in out.values():
+        for name, c in exts.items():
+            runs = c.get("runs", 0) or 1
+            exts[name] = {
+                "runs": c.get("runs", 0),
+                "wins": c.get("wins", 0),
+                "avg_ms": round(c.get("us", 0) / runs / 1000, 1),
+                "avg_quality": round(c.get("quality_milli", 0) / runs / 1000, 3),
+            }
+    return out
@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One pooled HTTP client for all the tools instead of a new connection per call.
+#   - sync code (the agent tools) shares a requests.Session
+#   - async code shares one httpx.AsyncClient per event loop
+# Both keep connections alive between calls. The async side also has a global
+# in-flight semaphore and a per-host semaphore so one claim batch cant open
+# hundreds of sockets to the same news site.
+
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))   # total pooled connections
+MAX_PER_HOST    = int(os.getenv("HTTP_MAX_PER_HOST", "4"))       # concurrent requests per host
+MAX_IN_FLIGHT   = int(os.getenv("HTTP_MAX_IN_FLIGHT", "16"))     # concurrent requests overall
+KEEPALIVE_SECS  = float(os.getenv("HTTP_KEEPALIVE_SECS", "30"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    # process-wide requests.Session (thread-safe enough for plain GETs)
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_CONNECTIONS, pool_maxsize=MAX_PER_HOST)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                _session = s
+    return _session
+
+
+class _LoopPool:
+
+    # httpx connections belong to the event loop that opened them,
+    # so every running loop gets its own client + semaphores.
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=10,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_SECS,
+            ),
+        )
+        self.in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self.per_host = {}
+
+    def host_semaphore(self, host):
+        sem = self.per_host.get(host)
+        if sem is None:
+            sem = self.per_host[host] = asyncio.Semaphore(MAX_PER_HOST)
+        return sem
+
+
+_pools = weakref.WeakKeyDictionary()   # event loop → _LoopPool
+
+
+def _pool():
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool.client.is_closed:
+        pool = _pools[loop] = _LoopPool()
+    return pool
+
+
+def get_async_client():
+    # shared httpx.AsyncClient for the running loop (also handed to AsyncGroq)
+    return _pool().client
+
+
+@asynccontextmanager
+async def limited(url):
+    # hold a global slot and a slot for the url's host while the block runs
+    pool = _pool()
+    host = urlsplit(url).hostname or ""
+    async with pool.in_flight:
+        async with pool.host_semaphore(host):
+            yield
+
+
+async def aget(url, **kwargs):
+    async with limited(url):
+        return await _pool().client.get(url, **kwargs)
+
+
+@asynccontextmanager
+async def astream(url, **kwargs):
+    # streaming GET: headers first, body read by the caller (resp.aiter_bytes()).
+    # resp.extensions["ttfb"] = seconds until the headers arrived (without the queueing)
+    async with limited(url):
+        start = time.perf_counter()
+        async with _pool().client.stream("GET", url, **kwargs) as resp:
+            resp.extensions["ttfb"] = time.perf_counter() - start
+            yield resp
+
+
+async def aclose():
+    # close the client of the running loop (call before the loop shuts down)
+    loop = asyncio.get_running_loop()
+    pool = _pools.pop(loop, None)
+    if pool is not None:
+        await pool.client.aclose()
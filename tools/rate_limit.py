@@ -0,0 +1,78 @@
+import os
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+load_dotenv()
+
+# Per-provider request rate limits (token bucket), shared by every thread /
+# event loop in the process. Limits are requests per minute, read from the env:
+#   SERPAPI_RPM, OPENAI_RPM, GROQ_RPM     (0 or unset = no limit)
+# A batch of claims then slows down to the provider quota instead of failing with 429s.
+
+class RateLimiter:
+
+    def __init__(self, per_minute, burst = None):
+        self.rate = per_minute / 60.0                  # tokens per second
+        self.capacity = float(burst or max(1, per_minute // 10))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # takes one token, returns how long the caller has to wait for it
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _NoLimit:
+    def acquire(self):
+        pass
+
+    async def aacquire(self):
+        pass
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(provider):
+    # limiter("serpapi") / limiter("openai") / limiter("groq")
+    lim = _limiters.get(provider)
+    if lim is None:
+        with _limiters_lock:
+            lim = _limiters.get(provider)
+            if lim is None:
+                rpm = int(os.getenv(f"{provider.upper()}_RPM", "0") or 0)
+                lim = _limiters[provider] = RateLimiter(rpm) if rpm > 0 else _NoLimit()
+    return lim
+
+
+class RateLimitCallback(BaseCallbackHandler):
+
+    # LangChain callback: waits for a token before every LLM call of the agent
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        limiter(self.provider).acquire()
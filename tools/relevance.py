@@ -0,0 +1,30 @@
+import os
+from collections import Counter
+from dotenv import load_dotenv
+
+from tools.text import content_words
+
+load_dotenv()
+
+# Offline relevance of a fetched article to the claim, before it costs an LLM call.
+# BM25 term weighting of the claim's content words in the article, normalized to 0..1:
+# 1.0 = every claim word shows up often, 0.0 = none of them does. There is no corpus to
+# take document frequencies from (one claim sees 3-8 articles), so all claim words
+# weigh the same. Articles below RELEVANCE_THRESHOLD are not summarized.
+
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.25"))
+K1 = 1.2
+B = 0.75
+AVG_DOC_WORDS = 400     # typical length of the extracted text, in content words
+
+
+def relevance(claim, text):
+    terms = set(content_words(claim))
+    if not terms or not text:
+        return 0.0
+    words = content_words(text)
+    tf = Counter(w for w in words if w in terms)
+    norm = K1 * (1 - B + B * len(words) / AVG_DOC_WORDS)
+    score = sum(tf[t] * (K1 + 1) / (tf[t] + norm) for t in terms if tf[t])
+    return round(score / ((K1 + 1) * len(terms)), 3)
+
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import argparse
+import threading
+from dotenv import load_dotenv
+
+from tools.cache import SQLiteCache
+from tools.urls import domain_of
+
+load_dotenv()
+
+# Per-domain source reliability, learned from the evidence graph.
+# After a claim gets its verdict, every document that run fetched is paired with the snippet
+# it was summarized into (Document --summarized_as--> Snippet) and its domain gets:
+#   docs      +1 for every fetched document
+#   useful    +1 if the document produced a supports / refutes snippet for the claim
+#   agree     +1 if that snippet points the same way as the verdict (Supported / Refuted)
+#   disagree  +1 if it points the other way
+# Smoothed rates (RELIABILITY_PRIOR pseudo-counts each way, so unknown domains sit at 0.5):
+#   usefulness  = useful / docs                  → worth fetching at all
+#   agreement   = agree / (agree + disagree)     → its classifications match the consensus
+#   reliability = usefulness * agreement         → ranks search results (tools/web_search.py)
+#   weight      = 0.5 + agreement                → weight of its snippets in the verdict, against
+#                                                  the evidence of both sides (ingest.py), 1.0 for
+#                                                  unknown domains
+# Counters live in the cache dir, so every process adds to and reads the same index; each
+# process reads them in one query at most every RELIABILITY_REFRESH seconds, after that a
+# lookup is a dict access. rebuild(gm) recomputes everything from a stored graph.
+# Agreement is measured against verdicts the index itself helped weigh; the prior keeps a
+# few early outcomes from locking a domain in. SOURCE_RELIABILITY=0 turns off ranking and
+# weighting (outcomes are still recorded).
+
+SOURCE_RELIABILITY = os.getenv("SOURCE_RELIABILITY", "1") != "0"
+RELIABILITY_REFRESH = float(os.getenv("RELIABILITY_REFRESH", "60"))
+PRIOR = float(os.getenv("RELIABILITY_PRIOR", "2"))
+FIELDS = ("docs", "useful", "agree", "disagree")
+PREFIX = "rel:"
+_DIRECTION = {"Supported": "supports", "Refuted": "refutes"}
+
+
+def _smoothed(hits, total):
+    return (hits + PRIOR) / (total + 2 * PRIOR)
+
+
+class ReliabilityIndex:
+
+    def __init__(self, store = None, refresh = RELIABILITY_REFRESH, enabled = SOURCE_RELIABILITY):
+        self._store = store or SQLiteCache("reliability", max_bytes=8 * 1024 * 1024, default_ttl=0)
+        self.refresh = refresh
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counts = {}       # domain → [docs, useful, agree, disagree]
+        self._loaded = None     # monotonic time of the last read from the store
+
+    def _snapshot(self):
+        if self._loaded is not None and time.monotonic() - self._loaded < self.refresh:
+            return self._counts
+        try:
+            rows = self._store.counters(PREFIX)
+        except Exception:
+            rows = None     # keep the old numbers; a locked cache must not block a claim
+        with self._lock:
+            if rows is not None:
+                counts = {}
+                for name, value in rows.items():
+                    domain, field = name[len(PREFIX):].rsplit(":", 1)
+                    if field in FIELDS:
+                        counts.setdefault(domain, [0, 0, 0, 0])[FIELDS.index(field)] = value
+                self._counts = counts
+            self._loaded = time.monotonic()
+        return self._counts
+
+    # ---- lookups ----------------------------------------------------------------------
+
+    def counts(self, domain):
+        return dict(zip(FIELDS, self._snapshot().get(domain, (0, 0, 0, 0))))
+
+    def usefulness(self, domain):
+        docs, useful, _agree, _disagree = self._snapshot().get(domain, (0, 0, 0, 0))
+        return _smoothed(useful, docs)
+
+    def agreement(self, domain):
+        _docs, _useful, agree, disagree = self._snapshot().get(domain, (0, 0, 0, 0))
+        return _smoothed(agree, agree + disagree)
+
+    def reliability(self, domain):
+        return self.usefulness(domain) * self.agreement(domain)
+
+    def weight(self, domain):
+        # multiplier for a snippet score from this domain; 1.0 = neutral
+        if not self.enabled:
+            return 1.0
+        return 0.5 + self.agreement(domain)
+
+    def rank(self, urls):
+        # most reliable domains first; stable, so search order breaks ties (e.g. unknown domains)
+        if not self.enabled or len(urls) < 2:
+            return list(urls)
+        return sorted(urls, key=lambda u: -self.reliability(domain_of(u)))
+
+    def top(self, n = 20, min_docs = 1):
+        # [(domain, stats)] of the most reliable domains with at least min_docs documents
+        rows = [(d, self.stats(d)) for d, c in self._snapshot().items() if c[0] >= min_docs]
+        rows.sort(key=lambda r: -r[1]["reliability"])
+        return rows[:n]
+
+    def stats(self, domain):
+        return {
+            **self.counts(domain),
+            "usefulness": round(self.usefulness(domain), 3),
+            "agreement": round(self.agreement(domain), 3),
+            "reliability": round(self.reliability(domain), 3),
+        }
+
+    # ---- updates ----------------------------------------------------------------------
+
+    def record(self, outcomes):
+        # outcomes: [(domain, useful, agreed)], agreed = True / False / None (no decided verdict)
+        delta = {}
+        for domain, useful, agreed in outcomes:
+            if not domain:
+                continue
+            row = delta.setdefault(domain, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += bool(useful)
+            if agreed is not None:
+                row[2 if agreed else 3] += 1
+        if not delta:
+            return
+        try:
+            self._store.incr_many({
+                f"{PREFIX}{domain}:{field}": n
+                for domain, row in delta.items() for field, n in zip(FIELDS, row) if n
+            })
+        except Exception:
+            return  # losing an update is fine, failing the claim is not
+        with self._lock:
+            for domain, row in delta.items():
+                counts = self._counts.setdefault(domain, [0, 0, 0, 0])
+                for i, n in enumerate(row):
+                    counts[i] += n
+
+    def record_run(self, sources, verdict):
+        # add the outcomes of one verification run: sources = [(url, [snippet labels])] of the
+        # documents this run fetched (not everything the claim ever cited: a re-checked claim
+        # keeps its id and edges in the SQLite graph, and those are counted already)
+        self.record(source_outcomes(sources, verdict))
+
+    def rebuild(self, gm):
+        # recompute the whole index from every verified claim of a stored graph
+        outcomes = []
+        for claim_id, props in gm.iter_claims():
+            if props.get("verdict"):
+                outcomes += claim_outcomes(gm, claim_id, props["verdict"])
+        self._store.reset_counters(PREFIX)
+        with self._lock:
+            self._counts, self._loaded = {}, None
+        self.record(outcomes)
+        return len(outcomes)
+
+
+def source_outcomes(sources, verdict):
+    # [(domain, useful, agreed)] from [(url, [snippet labels])]
+    direction = _DIRECTION.get(verdict)
+    outcomes = []
+    for url, labels in sources:
+        if not labels:
+            outcomes.append((domain_of(url), False, None))
+        for label in labels:
+            outcomes.append((domain_of(url), True, None if direction is None else label == direction))
+    return outcomes
+
+
+def claim_outcomes(gm, claim_id, verdict):
+    # [(domain, useful, agreed)] for every document the claim cites (rebuild from a stored graph)
+    snippets = {
+        n.id: rel for rel in ("supports", "refutes") for n in gm.neighbors(claim_id, rel)
+    }
+    sources = []
+    for doc in gm.neighbors(claim_id, "cites"):
+        # a document (deduplicated by url in the SQLite graph) may have snippets of other claims
+        labels = [snippets[s.id] for s in gm.neighbors(doc.id, "summarized_as") if s.id in snippets]
+        sources.append((doc.properties.get("url", ""), labels))
+    return source_outcomes(sources, verdict)
+
+
+reliability = ReliabilityIndex()
+
+
+def main():
+    from graph.sqlite_graph import open_graph
+
+    parser = argparse.ArgumentParser(description="Per-domain source reliability index")
+    parser.add_argument("--graph-db", metavar="PATH", help="Rebuild the index from this SQLite graph (default: $FACTCHECK_GRAPH_DB)")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the index from the stored graph first")
+    parser.add_argument("--top", type=int, default=20, help="Print the N most reliable domains")
+    parser.add_argument("--min-docs", type=int, default=3, help="Only list domains with at least this many documents")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        n = reliability.rebuild(open_graph(args.graph_db))
+        print(f"rebuilt from {n} document outcomes")
+    for domain, info in reliability.top(args.top, args.min_docs):
+        print(json.dumps({"domain": domain, **info}))
+
+
+if __name__ == "__main__":
+    main()
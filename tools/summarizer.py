@@ -1,13 +1,35 @@
 import os
 import json
+import asyncio
+import hashlib
+import threading
+import weakref
 from dotenv import load_dotenv
-from groq import Groq
-from langchain.tools import Tool
+from langchain_core.tools import Tool
+
+from tools.http_client import get_async_client, limited
+from tools.rate_limit import limiter
+from tools.cache import SQLiteCache
+from tools.tokens import count_tokens, fit, chunks
+from tools.tracing import span
 
 # using GROQ_API_KEY 
 
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+# the Groq clients are built on first use, not at import (keeps `import verify` / the app cheap)
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    # process-wide Groq client
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
 
 # # summarizer model
 # _summarizer = pipeline(
@@ -24,37 +46,344 @@ client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 #     tokenizer="facebook/bart-large-mnli"
 # )
 
-def summarize_and_classify(text):
+MODEL = "llama-3.3-70b-versatile"
+GROQ_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com")    # the Groq SDK reads the same variable
 
-    # Groq will summarise the text into 2-3 lines. It will then classify them into support/refure/neutral.
-   
-    system_prompt = (
-        "You are a fact-checking assistant. "
-        "Given a passage of text, output ONLY a JSON object with these fields:\n"
-        "- summary: a 2–3 sentence summary of the passage\n"
-        "- label: one of \"supports\", \"refutes\"\n"
-        "- score: a confidence between 0.0 and 1.0\n"
-        "Also use your own understanding before deciding if its a support or refute. \n"
-        "Do NOT output any additional text."
-    )
+# Groq will summarise the text into 2-3 lines. It will then classify them into support/refure/neutral.
+SYSTEM_PROMPT = (
+    "You are a fact-checking assistant. "
+    "Given a passage of text, output ONLY a JSON object with these fields:\n"
+    "- summary: a 2–3 sentence summary of the passage\n"
+    "- label: one of \"supports\", \"refutes\"\n"
+    "- score: a confidence between 0.0 and 1.0\n"
+    "Also use your own understanding before deciding if its a support or refute. \n"
+    "Do NOT output any additional text."
+)
+
+# Batched variant: one request for N passages of the same claim.
+BATCH_SYSTEM_PROMPT = (
+    "You are a fact-checking assistant. "
+    "You get a claim and N numbered passages. For EVERY passage, in order, produce:\n"
+    "- index: the passage number\n"
+    "- summary: a 2–3 sentence summary of the passage\n"
+    "- label: \"supports\" or \"refutes\" (does the passage support or refute the claim?)\n"
+    "- score: a confidence between 0.0 and 1.0\n"
+    "Also use your own understanding before deciding if its a support or refute. \n"
+    "Output ONLY a JSON object {\"results\": [ ... ]} with exactly N items. "
+    "Do NOT output any additional text."
+)
+
+# Memo of LLM outputs. The passage prompt doesnt contain the claim, so the same article
+# text always gives the same answer → key = hash(model, prompt version, passage).
+# (batched answers do depend on the claim, so their key also has the claim in it)
+# The prompt version is derived from the prompts themselves: editing either prompt changes it,
+# and entries written under an older version are purged on first use.
+PROMPT_VERSION = hashlib.sha256((SYSTEM_PROMPT + BATCH_SYSTEM_PROMPT).encode("utf-8")).hexdigest()[:12]
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(30 * 24 * 3600)))
+SUMMARY_CACHE_MAX_MB = float(os.getenv("SUMMARY_CACHE_MAX_MB", "50"))
+
+_memo = SQLiteCache("summaries", max_bytes=int(SUMMARY_CACHE_MAX_MB * 1024 * 1024), default_ttl=SUMMARY_CACHE_TTL)
+_memo_checked = False
+_memo_lock = threading.Lock()
+
+# token budget of one batched request (prompt + passages + expected answers).
+# batches that would go over it are split.
+BATCH_MAX_TOKENS = int(os.getenv("GROQ_BATCH_MAX_TOKENS", "6000"))
+ANSWER_TOKENS_PER_PASSAGE = 160
+LABELS = ("supports", "refutes", "neutral")
+
+# token budgets of the passages themselves (tools/tokens.py).
+#  - a single passage goes in one request up to MAP_REDUCE_TOKENS (by default the size of a
+#    fetched document, DOC_MAX_TOKENS, so a normal article costs one call). Above that it is
+#    summarized map-reduce: chunks of PASSAGE_MAX_TOKENS each on their own (at most
+#    MAP_MAX_CHUNKS), then the chunk summaries together
+#  - the passages of one claim share CLAIM_MAX_TOKENS; in batched calls each passage is
+#    cut to its share (at most PASSAGE_MAX_TOKENS), keeping the paragraphs about the claim
+PASSAGE_MAX_TOKENS = int(os.getenv("GROQ_PASSAGE_MAX_TOKENS", "1200"))
+MAP_REDUCE_TOKENS = int(os.getenv("GROQ_MAP_REDUCE_TOKENS", os.getenv("DOC_MAX_TOKENS", "2400")))
+CLAIM_MAX_TOKENS = int(os.getenv("GROQ_CLAIM_MAX_TOKENS", "4800"))
+MAP_MAX_CHUNKS = int(os.getenv("GROQ_MAP_MAX_CHUNKS", "4"))
+MIN_PASSAGE_TOKENS = 200
+
+def _messages(text):
 
     user_prompt = f"Passage:\n\"\"\"\n{text}\n\"\"\""
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system",  "content": system_prompt},
-            {"role": "user",    "content": user_prompt},
-        ],
-    )
+    return [
+        {"role": "system",  "content": SYSTEM_PROMPT},
+        {"role": "user",    "content": user_prompt},
+    ]
+
+def _memo_key(text, claim = None):
+    h = hashlib.sha256()
+    parts = (MODEL, PROMPT_VERSION, text) if claim is None else (MODEL, PROMPT_VERSION, "claim", claim, text)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def invalidate_summary_cache(all_versions = False):
+    # drops memo entries of older prompt versions (or everything); returns how many
+    return _memo.purge(keep_tag=None if all_versions else PROMPT_VERSION)
+
+def _memo_get(key):
+    global _memo_checked
+    if not _memo_checked:
+        with _memo_lock:
+            if not _memo_checked:
+                invalidate_summary_cache()
+                _memo_checked = True
+    entry = _memo.get(key)
+    return entry.value if entry is not None else None
+
+def _memo_put(key, output):
+    # only well-formed answers are kept, a broken one should be retried next time
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return
+    if isinstance(data, dict) and {"summary", "label", "score"} <= data.keys():
+        _memo.set(key, output, tag=PROMPT_VERSION)
+
+def _reduce_input(partials):
+    # chunk answers → the text of the reduce step (None if no chunk gave a usable answer)
+    summaries = []
+    for raw in partials:
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if isinstance(data, dict) and isinstance(data.get("summary"), str):
+            summaries.append(data["summary"].strip())
+    return "\n\n".join(summaries) or None
+
+def _usage(sp, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        sp.set(tokens_in=usage.prompt_tokens or 0, tokens_out=usage.completion_tokens or 0)
+
+def _create(**kwargs):
+    # one Groq request, traced as an "llm" span with the token usage Groq reports
+    limiter("groq").acquire()
+    with span("llm", provider="groq", model=MODEL) as sp:
+        response = get_client().chat.completions.create(model=MODEL, **kwargs)
+        _usage(sp, response)
+    return response
+
+def summarize_and_classify(text):
+    with span("summarize", provider="groq", chars=len(text)) as sp:
+        return _summarize(text, sp)
+
+def _summarize(text, sp):
+
+    key = _memo_key(text)
+    cached = _memo_get(key)
+    if cached is not None:
+        sp.set(cache="hit")
+        return cached
+    sp.set(cache="miss")
+
+    if count_tokens(text) > MAP_REDUCE_TOKENS:
+        # map: every chunk on its own, reduce: the chunk summaries as one passage
+        pieces = chunks(text, PASSAGE_MAX_TOKENS)[:MAP_MAX_CHUNKS]
+        sp.set(chunks=len(pieces))
+        partials = [summarize_and_classify(p) for p in pieces]
+        combined = _reduce_input(partials)
+        output = summarize_and_classify(combined) if combined else partials[0]
+        _memo_put(key, output)
+        return output
+
+    response = _create(messages=_messages(text))
     
-    return response.choices[0].message.content.strip()
+    output = response.choices[0].message.content.strip()
+    _memo_put(key, output)
+    return output
+
+_async_clients = weakref.WeakKeyDictionary()   # pooled httpx client → AsyncGroq
+
+def _async_client():
+    # AsyncGroq on top of the shared pooled httpx client of the running loop
+    http = get_async_client()
+    groq = _async_clients.get(http)
+    if groq is None:
+        from groq import AsyncGroq
+        groq = _async_clients[http] = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=http)
+    return groq
+
+async def _acreate(**kwargs):
+    await limiter("groq").aacquire()
+    async with limited(GROQ_URL):
+        with span("llm", provider="groq", model=MODEL) as sp:
+            response = await _async_client().chat.completions.create(model=MODEL, **kwargs)
+            _usage(sp, response)
+    return response
+
+async def asummarize_and_classify(text):
+    # async version of summarize_and_classify (counts against the shared concurrency limits)
+    with span("summarize", provider="groq", chars=len(text)) as sp:
+        return await _asummarize(text, sp)
+
+async def _asummarize(text, sp):
+
+    key = _memo_key(text)
+    cached = _memo_get(key)
+    if cached is not None:
+        sp.set(cache="hit")
+        return cached
+    sp.set(cache="miss")
+
+    if count_tokens(text) > MAP_REDUCE_TOKENS:
+        pieces = chunks(text, PASSAGE_MAX_TOKENS)[:MAP_MAX_CHUNKS]
+        sp.set(chunks=len(pieces))
+        partials = await asyncio.gather(*(asummarize_and_classify(p) for p in pieces))
+        combined = _reduce_input(partials)
+        output = await asummarize_and_classify(combined) if combined else partials[0]
+        _memo_put(key, output)
+        return output
+
+    response = await _acreate(messages=_messages(text))
+
+    output = response.choices[0].message.content.strip()
+    _memo_put(key, output)
+    return output
+
+# ---- batched: N passages of one claim in a single request ----------------------------------------------
+
+def fit_passages(claim, passages):
+    # every passage cut to its share of the claim budget, most claim-relevant paragraphs first
+    if not passages:
+        return []
+    share = max(MIN_PASSAGE_TOKENS, min(PASSAGE_MAX_TOKENS, CLAIM_MAX_TOKENS // len(passages)))
+    return [fit(p, share, claim) for p in passages]
+
+def _batch_messages(claim, passages):
+    parts = [f"Claim:\n\"\"\"\n{claim}\n\"\"\"", f"N = {len(passages)}"]
+    for i, p in enumerate(passages):
+        parts.append(f"Passage {i}:\n\"\"\"\n{p}\n\"\"\"")
+    return [
+        {"role": "system",  "content": BATCH_SYSTEM_PROMPT},
+        {"role": "user",    "content": "\n\n".join(parts)},
+    ]
+
+def plan_batches(claim, passages, max_tokens = None):
+    # groups of passage indices whose request fits the token budget.
+    # a passage that is too big on its own still gets a batch of one.
+    budget = max_tokens or BATCH_MAX_TOKENS
+    overhead = count_tokens(BATCH_SYSTEM_PROMPT) + count_tokens(claim) + 16
+    groups, cur, used = [], [], overhead
+    for i, p in enumerate(passages):
+        cost = count_tokens(p) + 8 + ANSWER_TOKENS_PER_PASSAGE
+        if cur and used + cost > budget:
+            groups.append(cur)
+            cur, used = [], overhead
+        cur.append(i)
+        used += cost
+    if cur:
+        groups.append(cur)
+    return groups
+
+def _record(item):
+    # one validated {summary, label, score} record as a JSON string (the tool output format)
+    if not isinstance(item, dict):
+        return None
+    summary, label, score = item.get("summary"), item.get("label"), item.get("score")
+    if not isinstance(summary, str) or not summary.strip():
+        return None
+    if not isinstance(label, str) or label.strip().lower() not in LABELS:
+        return None
+    try:
+        score = min(1.0, max(0.0, float(score)))
+    except (TypeError, ValueError):
+        return None
+    return json.dumps({"summary": summary.strip(), "label": label.strip().lower(), "score": score})
+
+def parse_batch(raw, n):
+    # LLM answer → list of n JSON records, or None if it doesnt match the schema
+    if not isinstance(raw, str):
+        return None     # e.g. no content at all (a tool call / refusal)
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.strip("`")
+        raw = raw[raw.find("{"):] if "{" in raw else raw
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    items = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(items, list) or len(items) != n:
+        return None
+    if all(isinstance(it, dict) and isinstance(it.get("index"), int) for it in items):
+        items = sorted(items, key=lambda it: it["index"])
+    records = [_record(it) for it in items]
+    return None if any(r is None for r in records) else records
+
+def _batch_call(claim, passages):
+    response = _create(
+        messages=_batch_messages(claim, passages),
+        response_format={"type": "json_object"},
+    )
+    return parse_batch(response.choices[0].message.content, len(passages))
+
+async def _abatch_call(claim, passages):
+    response = await _acreate(
+        messages=_batch_messages(claim, passages),
+        response_format={"type": "json_object"},
+    )
+    return parse_batch(response.choices[0].message.content, len(passages))
+
+def _batch_todo(claim, passages):
+    # memo lookups first; returns (results, keys, indices still to do)
+    keys = [_memo_key(p, claim) for p in passages]
+    results = [_memo_get(k) for k in keys]
+    return results, keys, [i for i, r in enumerate(results) if r is None]
+
+def summarize_and_classify_batch(claim, passages):
+    # -> one JSON string {summary,label,score} per passage, same order as passages.
+    # if a batch answer doesnt validate, that batch falls back to one call per passage.
+    with span("summarize_batch", provider="groq", passages=len(passages)) as sp:
+        passages = fit_passages(claim, passages)
+        results, keys, todo = _batch_todo(claim, passages)
+        groups = plan_batches(claim, [passages[i] for i in todo])
+        sp.set(cache="miss" if todo else "hit", cached=len(passages) - len(todo), batches=len(groups))
+        for group in groups:
+            idx = [todo[j] for j in group]
+            records = _batch_call(claim, [passages[i] for i in idx])
+            if records is None:
+                records = [summarize_and_classify(passages[i]) for i in idx]
+            else:
+                for i, r in zip(idx, records):
+                    _memo_put(keys[i], r)
+            for i, r in zip(idx, records):
+                results[i] = r
+        return results
+
+async def asummarize_and_classify_batch(claim, passages):
+    # async version; the batches of one call run concurrently
+    passages = fit_passages(claim, passages)
+    results, keys, todo = _batch_todo(claim, passages)
+
+    async def run(idx):
+        records = await _abatch_call(claim, [passages[i] for i in idx])
+        if records is None:
+            records = await asyncio.gather(*(asummarize_and_classify(passages[i]) for i in idx))
+        else:
+            for i, r in zip(idx, records):
+                _memo_put(keys[i], r)
+        for i, r in zip(idx, records):
+            results[i] = r
+
+    with span("summarize_batch", provider="groq", passages=len(passages)) as sp:
+        groups = plan_batches(claim, [passages[i] for i in todo])
+        sp.set(cache="miss" if todo else "hit", cached=len(passages) - len(todo), batches=len(groups))
+        await asyncio.gather(*(run([todo[j] for j in g]) for g in groups))
+    return results
 
 #---------------------------------------------------------------------------------------------------------
 
 summarizer_tool = Tool(
     name="summarize_and_classify",
     func=summarize_and_classify,
+    coroutine=asummarize_and_classify,
     description=(
         "Use Groq’s LLM to (1) summarize text in 2–3 sentences, "
         "(2) classify the summary as supports/refutes with a confidence score, "
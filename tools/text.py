@@ -0,0 +1,43 @@
+import re
+
+# Text normalization shared by the caches and the local scorers.
+
+# common English function words. negations ("not", "no", "never", ...) are kept
+# on purpose: "X is not Y" and "X is Y" are different claims.
+STOP_WORDS = frozenset("""
+a an the and or but if then so as of at by for from in into on onto to with
+about over under between through during before after above below up down out off
+is are was were be been being am do does did doing have has had having
+i me my we our you your he him his she her it its they them their this that these those
+what which who whom whose when where why how
+there here than too very can could will would shall should may might must
+just also only own same such both each few more most other some any all
+""".split())
+
+NEGATIONS = frozenset("""
+not no never none nobody nothing nowhere neither nor without cannot
+isn't aren't wasn't weren't don't doesn't didn't won't wouldn't can't couldn't shouldn't hasn't haven't hadn't
+""".split())
+
+# direction / order / quantity words. they are stop words for search queries, but two
+# claims that differ in one of them point different ways: "went up" vs "went down",
+# "before" vs "after", "most scientists" vs "few scientists".
+DIRECTIONS = frozenset("""
+up down before after above below over under more most less least few fewer many all some
+""".split())
+
+_WORD = re.compile(r"[^\W_]+(?:[.,'][^\W_]+)*")
+
+
+def tokenize(text):
+    # lowercase word tokens; keeps numbers like 0.74 and 1,000 in one piece
+    return _WORD.findall(text.casefold())
+
+
+def content_words(text):
+    return [t for t in tokenize(text) if t not in STOP_WORDS]
+
+
+def normalize_query(text):
+    # "The Eiffel Tower is painted every 7 years!" → "eiffel tower painted every 7 years"
+    return " ".join(content_words(text))
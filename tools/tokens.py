@@ -0,0 +1,106 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+from tools.text import content_words
+
+load_dotenv()
+
+# Token budgets for the text we send to the LLMs.
+#   - count_tokens(): a real tokenizer when TOKENIZER names one (a Hugging Face tokenizer
+#     name or local path, loaded lazily with transformers), else ~4 characters per token
+#   - fit(): trims a passage to a budget by whole paragraphs. With a claim, paragraphs that
+#     share words with it go first (kept in page order); without one, the lead wins.
+#   - chunks(): splits a long document into pieces of at most `budget` tokens for map-reduce
+# Paragraphs are separated by blank lines, like everything the document fetcher returns.
+
+TOKENIZER = os.getenv("TOKENIZER", "")
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+_tokenizer_failed = False
+
+
+def _load_tokenizer():
+    global _tokenizer, _tokenizer_failed
+    if _tokenizer is not None or _tokenizer_failed or not TOKENIZER:
+        return _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None and not _tokenizer_failed:
+            try:
+                from transformers import AutoTokenizer
+                _tokenizer = AutoTokenizer.from_pretrained(TOKENIZER)
+            except Exception:
+                _tokenizer_failed = True    # offline / not installed: use the estimate
+    return _tokenizer
+
+
+def count_tokens(text):
+    tok = _load_tokenizer()
+    if tok is not None:
+        return len(tok.encode(text, add_special_tokens=False))
+    # rough count (~4 characters per token for English)
+    return len(text) // 4 + 1
+
+
+def truncate_tokens(text, budget):
+    # cut a single paragraph down to about `budget` tokens, at a word boundary
+    if count_tokens(text) <= budget:
+        return text
+    tok = _load_tokenizer()
+    if tok is not None:
+        cut = tok.decode(tok.encode(text, add_special_tokens=False)[:budget])
+    else:
+        cut = text[:budget * 4]
+    return cut.rsplit(" ", 1)[0] if " " in cut else cut
+
+
+def paragraphs(text):
+    return [p.strip() for p in text.split("\n\n") if p.strip()]
+
+
+def relevance(para, terms):
+    # share of the claim's content words found in the paragraph
+    if not terms:
+        return 0.0
+    return len(terms & set(content_words(para))) / len(terms)
+
+
+def fit(text, budget, claim = None):
+    paras = paragraphs(text)
+    costs = [count_tokens(p) + 1 for p in paras]
+    if sum(costs) <= budget:
+        return "\n\n".join(paras)
+
+    order = list(range(len(paras)))
+    if claim:
+        terms = set(content_words(claim))
+        # stable sort: equally relevant paragraphs keep the lead-first order
+        order.sort(key=lambda i: -relevance(paras[i], terms))
+
+    keep, used = [], 0
+    for i in order:
+        if used + costs[i] <= budget:
+            keep.append(i)
+            used += costs[i]
+    if not keep and order:
+        # not even one paragraph fits: take the best one, cut down
+        return truncate_tokens(paras[order[0]], budget)
+    return "\n\n".join(paras[i] for i in sorted(keep))
+
+
+def chunks(text, budget):
+    # consecutive paragraphs grouped into pieces of at most `budget` tokens
+    out, cur, used = [], [], 0
+    for para in paragraphs(text):
+        cost = count_tokens(para) + 1
+        if cost > budget:
+            para, cost = truncate_tokens(para, budget), budget
+        if cur and used + cost > budget:
+            out.append("\n\n".join(cur))
+            cur, used = [], 0
+        cur.append(para)
+        used += cost
+    if cur:
+        out.append("\n\n".join(cur))
+    return out
@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+load_dotenv()
+
+# Structured spans for every claim and every stage under it
+# (claim → search / fetch → extract / summarize / llm / graph_ingest / verdict).
+#
+#   with span("fetch", domain=d) as s:
+#       ...
+#       s.set(cache="miss", bytes=n)        # free-form attributes
+#
+# Nesting follows contextvars, so it works across awaits and asyncio.to_thread; work
+# handed to a thread pool keeps its parent with bind(fn). Finished spans are
+#   - aggregated into process-wide metrics: duration histogram, errors by class,
+#     bytes, tokens and cache hits per span name → metrics_text() (Prometheus format)
+#   - appended as one JSON line each to FACTCHECK_TRACE_FILE, if set
+# Known attributes: cache ("hit" / "miss" / ...), bytes, tokens_in, tokens_out, provider.
+
+TRACE_FILE = os.getenv("FACTCHECK_TRACE_FILE", "")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current = contextvars.ContextVar("factcheck_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attrs", "error", "_t0", "_token")
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(8).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.duration = None
+        self.attrs = attrs
+        self.error = None
+        self._t0 = time.perf_counter()
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, exc):
+        # mark the span as failed without raising (for errors the caller swallows)
+        self.error = type(exc).__name__
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "error": self.error, "attrs": self.attrs,
+        }
+
+
+def current_span():
+    return _current.get()
+
+
+def start_span(name, activate = True, **attrs):
+    # activate=False: dont make it the parent of what runs next (callback-driven spans,
+    # whose start and end may not run in the same context)
+    s = Span(name, _current.get(), attrs)
+    if activate:
+        s._token = _current.set(s)
+    return s
+
+
+def end_span(s):
+    s.duration = time.perf_counter() - s._t0
+    if s._token is not None:
+        try:
+            _current.reset(s._token)
+        except ValueError:
+            pass    # ended in another context; nothing to restore there
+        s._token = None
+    metrics.observe(s)
+    _export(s)
+
+
+@contextmanager
+def span(name, **attrs):
+    s = start_span(name, **attrs)
+    try:
+        yield s
+    except BaseException as e:
+        if s.error is None:
+            s.error = type(e).__name__
+        raise
+    finally:
+        end_span(s)
+
+
+def bind(fn):
+    # run fn (later, in another thread) under the span that is current now
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+# ---- JSONL export ----------------------------------------------------------------------
+
+_trace_lock = threading.Lock()
+_trace_file = None
+
+
+def set_trace_file(path):
+    # switch the JSONL output (None / "" = off)
+    global TRACE_FILE, _trace_file
+    with _trace_lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        TRACE_FILE, _trace_file = path or "", None
+
+
+def _export(s):
+    global _trace_file
+    if not TRACE_FILE:
+        return
+    line = json.dumps(s.to_dict(), default=str) + "\n"
+    with _trace_lock:
+        try:
+            if _trace_file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+                _trace_file = open(TRACE_FILE, "a", encoding="utf-8", buffering=1)
+            _trace_file.write(line)
+        except OSError:
+            pass    # tracing must never break a claim
+
+
+# ---- metrics ---------------------------------------------------------------------------
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist = {}      # span → [bucket counts..., +Inf], sum, count
+        self._counters = {}  # (metric, labels) → value
+
+    def _add(self, metric, labels, n):
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + n
+
+    def observe(self, s):
+        a = s.attrs
+        with self._lock:
+            h = self._hist.get(s.name)
+            if h is None:
+                h = self._hist[s.name] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            for i, le in enumerate(BUCKETS):
+                if s.duration <= le:
+                    h[0][i] += 1
+            h[0][-1] += 1
+            h[1] += s.duration
+            h[2] += 1
+            if s.error:
+                self._add("factcheck_span_errors_total", (("span", s.name), ("error", s.error)), 1)
+            if a.get("cache"):
+                self._add("factcheck_cache_requests_total", (("span", s.name), ("result", str(a["cache"]))), 1)
+            if a.get("bytes"):
+                self._add("factcheck_span_bytes_total", (("span", s.name),), a["bytes"])
+            for kind in ("in", "out"):
+                if a.get(f"tokens_{kind}"):
+                    labels = (("span", s.name), ("provider", a.get("provider", "")), ("kind", kind))
+                    self._add("factcheck_span_tokens_total", labels, a[f"tokens_{kind}"])
+
+    def snapshot(self):
+        # {"spans": {name: {count, sum_s, p50_le_s}}, "counters": {"metric{labels}": value}}
+        with self._lock:
+            spans = {}
+            for name, (buckets, total, count) in self._hist.items():
+                half = next((le for le, c in zip(BUCKETS, buckets) if c * 2 >= count), None)
+                spans[name] = {"count": count, "sum_s": round(total, 4), "p50_le_s": half}
+            counters = {_series(m, labels): v for (m, labels), v in self._counters.items()}
+        return {"spans": spans, "counters": counters}
+
+    def text(self):
+        # Prometheus text exposition format
+        lines = []
+        with self._lock:
+            if self._hist:
+                lines.append("# HELP factcheck_span_seconds Duration of claims and pipeline stages.")
+                lines.append("# TYPE factcheck_span_seconds histogram")
+            for name, (buckets, total, count) in sorted(self._hist.items()):
+                for le, c in zip(BUCKETS, buckets):
+                    lines.append(f'factcheck_span_seconds_bucket{{span="{name}",le="{le}"}} {c}')
+                lines.append(f'factcheck_span_seconds_bucket{{span="{name}",le="+Inf"}} {buckets[-1]}')
+                lines.append(f'factcheck_span_seconds_sum{{span="{name}"}} {total:.6f}')
+                lines.append(f'factcheck_span_seconds_count{{span="{name}"}} {count}')
+            typed = set()
+            for (metric, labels), value in sorted(self._counters.items()):
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{_series(metric, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+
+
+def _series(metric, labels):
+    inner = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels)
+    return f"{metric}{{{inner}}}"
+
+
+metrics = Metrics()
+
+
+def metrics_text():
+    return metrics.text()
+
+
+# ---- LangChain LLM calls -------------------------------------------------------------
+
+class LLMSpans(BaseCallbackHandler):
+
+    # one "llm" span per call of a LangChain LLM (the ReAct agent's OpenAI calls),
+    # with the token usage the provider reports
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._open = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id = None, **kwargs):
+        self._open[run_id] = start_span("llm", activate=False, provider=self.provider)
+
+    def on_llm_end(self, response, *, run_id = None, **kwargs):
+        s = self._open.pop(run_id, None)
+        if s is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        s.set(tokens_in=usage.get("prompt_tokens", 0), tokens_out=usage.get("completion_tokens", 0))
+        end_span(s)
+
+    def on_llm_error(self, error, *, run_id = None, **kwargs):
+        s = self._open.pop(run_id, None)
+        if s is not None:
+            s.fail(error)
+            end_span(s)
@@ -0,0 +1,35 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# URL helpers shared by the caches and the graph.
+
+# query params that only track the click and never change the page
+_TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ocid", "cmpid", "ref", "ref_src"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    # same page → same string: lowercase scheme/host, no default port, no fragment,
+    # no tracking params, sorted query, no trailing slash on the path.
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_key(url):
+    # fixed-length cache key for a url
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def domain_of(url):
+    # "https://www.bbc.co.uk/news/x" → "bbc.co.uk"
+    host = (urlsplit(url.strip()).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
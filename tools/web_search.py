@@ -1,21 +1,96 @@
 import os
+import json
+import asyncio
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import Future
 from dotenv import load_dotenv
-import requests
-from langchain.tools import Tool
+from langchain_core.tools import Tool
+
+from tools.http_client import get_session, aget
+from tools.rate_limit import limiter
+from tools.tracing import span
+from tools.cache import SQLiteCache
+from tools.text import normalize_query
+from tools.reliability import reliability
 
 load_dotenv()
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")   # overridable for offline benchmarks
 
-def search_news(query , num_results = 4):
-    # will use google news api here to fetch articles
-    # num_results = number of articles scrapped.
+# Search result cache: SerpAPI is the slowest + most expensive step per claim, and the
+# same (or almost the same) claim gets checked again and again.
+# Queries are normalized (case, punctuation, whitespace, stop words) for the key only;
+# SerpAPI still gets the original text on a miss. Up to MAX_CACHED_URLS are stored so
+# callers asking for more or fewer results share the entry.
+# Identical misses arriving together wait for one upstream request (threads and event loops).
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600)))
+MAX_CACHED_URLS = 20
+NUM_RESULTS = int(os.getenv("SEARCH_NUM_RESULTS", "4"))   # urls handed to the agent by default
 
-    parameters = { "engine": "google_news", "q": query, "api_key": SERPAPI_API_KEY,}
+_search_cache = SQLiteCache("search", max_bytes=20 * 1024 * 1024, default_ttl=SEARCH_CACHE_TTL)
+_stats = Counter()                 # this process: hit / miss / coalesced
+_inflight = {}                     # cache key → Future of the upstream request
+_inflight_lock = threading.Lock()
+
+
+def _params(query):
+    return { "engine": "google_news", "q": query, "api_key": SERPAPI_API_KEY,}
+
+
+def query_key(query):
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+def _count(name):
+    _stats[name] += 1
+    _search_cache.incr(name)
 
-    resp = requests.get("https://serpapi.com/search", params=parameters, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
 
+def search_cache_stats():
+    # {"process": {...}, "entries": .., "bytes": .., "hit": .., "miss": .., "coalesced": ..}
+    return {"process": dict(_stats), **_search_cache.stats()}
+
+
+def _lookup(key):
+    entry = _search_cache.get(key)
+    if entry is None:
+        return None
+    _count("hit")
+    return json.loads(entry.value)
+
+
+def _join(key):
+    # -> (future, is_leader). the leader does the upstream request, the others wait on it.
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        if fut is not None:
+            return fut, False
+        fut = _inflight[key] = Future()
+        return fut, True
+
+
+def _done(key, fut, urls = None, exc = None):
+    # cache first, then wake the followers, then let the next request lead: a request that
+    # comes in between either finds the cache filled or joins this future, never a second
+    # upstream call. The future is always resolved, so no follower waits forever.
+    try:
+        if exc is None:
+            _search_cache.set(key, json.dumps(urls))
+    except BaseException as e:
+        exc = e
+        raise
+    finally:
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(urls)
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _parse_results(data, num_results):
     urls = []
     for section in ("news_results", "organic_results"):
         for item in data.get(section, []):
@@ -28,16 +103,102 @@ def search_news(query , num_results = 4):
             break
 
     # Ensure we never return more than num_results
-    urls = urls[:num_results]
-    return "\n".join(urls)
+    return urls[:num_results]
+
+
+def _search_upstream(query):
+    limiter("serpapi").acquire()
+    resp = get_session().get(SERPAPI_URL, params=_params(query), timeout=10)
+    resp.raise_for_status()
+    return _parse_results(resp.json(), MAX_CACHED_URLS)
+
+
+async def _asearch_upstream(query):
+    await limiter("serpapi").aacquire()
+    resp = await aget(SERPAPI_URL, params=_params(query), timeout=10)
+    resp.raise_for_status()
+    return _parse_results(resp.json(), MAX_CACHED_URLS)
+
+
+def search_news(query , num_results = NUM_RESULTS):
+    # will use google news api here to fetch articles
+    # num_results = number of articles scrapped.
+
+    with span("search", provider="serpapi") as sp:
+        key = query_key(query)
+        urls = _lookup(key)
+        sp.set(cache="hit")
+        if urls is None:
+            fut, leader = _join(key)
+            if not leader:
+                _count("coalesced")
+                sp.set(cache="coalesced")
+                urls = fut.result()
+            else:
+                # re-check: a request that just finished may have filled the cache
+                urls = _lookup(key)
+                try:
+                    if urls is None:
+                        _count("miss")
+                        sp.set(cache="miss")
+                        urls = _search_upstream(query)
+                except BaseException as e:
+                    _done(key, fut, exc=e)
+                    raise
+                _done(key, fut, urls)
+        sp.set(urls=len(urls))
+    # most reliable sources first (tools/reliability.py), so they are fetched first
+    return "\n".join(reliability.rank(urls)[:num_results])
+
+
+async def asearch_news(query, num_results = NUM_RESULTS):
+    # async version of search_news (shared pooled client, same cache)
+
+    with span("search", provider="serpapi") as sp:
+        key = query_key(query)
+        urls = _lookup(key)
+        sp.set(cache="hit")
+        if urls is None:
+            fut, leader = _join(key)
+            if not leader:
+                _count("coalesced")
+                sp.set(cache="coalesced")
+                urls = await asyncio.wrap_future(fut)
+            else:
+                # re-check: a request that just finished may have filled the cache
+                urls = _lookup(key)
+                try:
+                    if urls is None:
+                        _count("miss")
+                        sp.set(cache="miss")
+                        urls = await _asearch_upstream(query)
+                except BaseException as e:
+                    _done(key, fut, exc=e)
+                    raise
+                _done(key, fut, urls)
+        sp.set(urls=len(urls))
+    return "\n".join(reliability.rank(urls)[:num_results])
+
+
+def extract_urls(raw_text, max_urls = 4):
+
+    # parses the newline-separated output of search_news back into a list of urls
+
+    lines = [ln.strip() for ln in raw_text.splitlines()]
+    urls = [u for u in lines if u.startswith("http")]
+    return urls[:max_urls]
+
 
 web_search_tool = Tool(
     name="web_search",
     func=search_news,
+    coroutine=asearch_news,
     description=(
-        "Fetch up to 4 news-article URLs for a query using SerpAPI (Google News). "
-        "Input: a search string. Output: newline-separated valid URLs, max 4."
+        f"Fetch up to {NUM_RESULTS} news-article URLs for a query using SerpAPI (Google News). "
+        f"Input: a search string. Output: newline-separated valid URLs, max {NUM_RESULTS}."
     )
 )
 
-# we are using max 4 because my API context length is less and it will give errors if tokens exceed the api limit.
+# max SEARCH_NUM_RESULTS (default 4) urls. It used to be a hard 4 to stay under the context
+# length; the fetched text and the summarizer inputs now have token budgets
+# (DOC_MAX_TOKENS, GROQ_PASSAGE_MAX_TOKENS, GROQ_CLAIM_MAX_TOKENS), so more sources fit.
@@ -1,24 +1,37 @@
 import os
 import warnings
+# quiet transformers without importing it (it is only loaded if a tokenizer is configured)
 os.environ["TRANSFORMERS_NO_ADVISORY_WARNINGS"] = "1"
-from transformers import logging as hf_logging
-hf_logging.set_verbosity_error()
+os.environ.setdefault("TRANSFORMERS_VERBOSITY", "error")
 warnings.filterwarnings("ignore")
 from dotenv import load_dotenv
 import argparse
+import sys
 import json
-from langchain_community.llms import OpenAI
-from langchain.agents import initialize_agent, AgentType
 from tools.web_search import web_search_tool
 from tools.document_fetcher import document_fetcher_tool
 from tools.summarizer import summarizer_tool
-from graph.graph_manager import GraphManager
+from tools.rate_limit import RateLimitCallback
+from tools.tracing import LLMSpans, set_trace_file
+from graph.sqlite_graph import open_graph
+from graph.similarity import EvidenceReuse
+from pipeline import build_pipeline
+from ingest import verify_claim
+from batch import run_batch
 
 load_dotenv()
 
-def build_agent():
-    # OpenAI LLM
-    llm = OpenAI(temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+def build_agent(verbose=True):
+    # imported here: the LangChain agent stack is slow to import and --direct never needs it
+    from langchain_community.llms import OpenAI
+    from langchain.agents import initialize_agent, AgentType
+
+    # OpenAI LLM (waits on the OPENAI_RPM limiter before every call)
+    llm = OpenAI(
+        temperature=0,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        callbacks=[RateLimitCallback("openai"), LLMSpans("openai")],
+    )
 
     # my tools
     tools = [web_search_tool, document_fetcher_tool, summarizer_tool]
@@ -28,7 +41,7 @@ def build_agent():
         tools,
         llm,
         agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-        verbose=True,
+        verbose=verbose,
         return_intermediate_steps=True,
         agent_kwargs={
             "prefix": (
@@ -49,88 +62,77 @@ def build_agent():
     )
     return agent
 
+#-------------------------------------------------------------------------------------------
 
-def extract_urls(raw_text, max_urls = 4):
-
-    # uses serpAPI to find urls
-   
-    lines = [ln.strip() for ln in raw_text.splitlines()]
-    urls = [u for u in lines if u.startswith("http")]
-    return urls[:max_urls]
+def read_claims(path):
+    # one claim per line, "-" reads stdin. blank lines and "#" comments are ignored.
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [ln.strip() for ln in f if ln.strip() and not ln.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def batch_main(args, agent, gm, reuse):
+    claims = list(args.claims) + (read_claims(args.batch) if args.batch else [])
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for i, rec in run_batch(agent, claims, gm, workers=args.workers, mode=args.mode, ordered=args.ordered, reuse=reuse):
+            print(f"[{i + 1}/{len(claims)}] {rec['verdict']} ({rec['confidence']:.2f})  {rec['claim']}", flush=True)
+            if out:
+                out.write(json.dumps({"index": i, **rec}, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out:
+            out.close()
 
-#-------------------------------------------------------------------------------------------
 
 def main():
     parser = argparse.ArgumentParser(description="Autonomous Fact-Checking Agent")
 
-    parser.add_argument( "claims", nargs="+", help='One or more claims, e.g. "Area 51 has active UFO research"')
+    parser.add_argument( "claims", nargs="*", help='One or more claims, e.g. "Area 51 has active UFO research"')
+    parser.add_argument("--direct", action="store_true", help="Skip the ReAct agent and run search → fetch → summarize directly (parallel)")
+    parser.add_argument("--hedge", type=int, default=0, metavar="N", help="With --direct: fetch N extra candidate urls at once and keep the first articles that make it")
+    parser.add_argument("--batch", metavar="FILE", help="Verify every claim in FILE (one per line, '-' for stdin) without the interactive prompt")
+    parser.add_argument("--workers", type=int, default=4, help="Batch mode: claims verified at once (default 4)")
+    parser.add_argument("--mode", choices=("thread", "async"), default="thread", help="Batch mode: thread pool or asyncio (async needs --direct)")
+    parser.add_argument("--output", metavar="FILE", help="Batch mode: write one JSON result per line to FILE")
+    parser.add_argument("--ordered", action="store_true", help="Batch mode: emit results in input order instead of as they finish")
+    parser.add_argument("--graph-db", metavar="PATH", help="Keep the evidence graph in this SQLite file (default: $FACTCHECK_GRAPH_DB, else in memory)")
+    parser.add_argument("--no-reuse", action="store_true", help="Always run the agent, even for near-duplicates of already verified claims")
+    parser.add_argument("--trace", metavar="FILE", help="Append one JSON line per span (claim, search, fetch, llm, ...) to FILE (default: $FACTCHECK_TRACE_FILE)")
+    parser.add_argument("--no-interactive", action="store_true", help="Don't open the graph query prompt after each claim")
 
     args = parser.parse_args()
-    agent = build_agent()
-    gm = GraphManager()
+    if not args.claims and not args.batch:
+        parser.error("give at least one claim or --batch FILE")
+    if args.trace:
+        set_trace_file(args.trace)
+
+    gm = open_graph(args.graph_db)
+    reuse = None if args.no_reuse else EvidenceReuse(gm)
+
+    if args.batch:
+        if args.mode == "async" and not args.direct:
+            parser.error("--mode async needs --direct (the ReAct agent runs in thread mode)")
+        agent = build_pipeline(hedge=args.hedge) if args.direct else build_agent(verbose=False)
+        batch_main(args, agent, gm, reuse)
+        return
+
+    agent = build_pipeline(hedge=args.hedge) if args.direct else build_agent()
+    interactive = not args.no_interactive and sys.stdin.isatty()
 
     for claim in args.claims:
         print("\n Claim: ", claim)
-        claim_id = gm.add_claim(claim)
-
-        # Run the agent: returns final answer + tool steps
-
-        result = agent({"input": claim})
-        final_answer = result["output"]
-        steps = result["intermediate_steps"]
-
-        # keeping a list to track agent's findings.
-        support_scores, refute_scores = [], []
-        
-        # each step is provided by my agent. Iterating over it.
-        for action, observation in steps:
-            tool = action.tool
-            inp  = action.tool_input
-            obs  = observation
-
-            if tool == "web_search":
-                urls = extract_urls(obs)
-                print(f"Agent found {len(urls)} URLs:")
-                for u in urls:
-                    print("  ", u)
-
-            elif tool == "document_fetcher":
-                url  = inp
-                text = obs
-                if not text.strip():
-                    print(f"  → skipped {url} (empty or error)")
-                    continue
-                doc_id = gm.add_document(url, text)
-                gm.add_edge(claim_id, doc_id, "cites")
-                print(f"Fetched & ingested document: {url}")
-
-            elif tool == "summarize_and_classify":
-                data = json.loads(obs)
-                snippet_id = gm.add_snippet(
-                    summary=data["summary"],
-                    label=data["label"],
-                    score=data["score"]
-                )
-                rel = data["label"]
-                if rel in ("supports", "refutes"):
-                    gm.add_edge(claim_id, snippet_id, rel)
-                    if rel == "supports":
-                        support_scores.append(data["score"])
-                    else:
-                        refute_scores.append(data["score"])
-                    print(f"  → snippet {rel} ({data['score']:.2f})")
-                else:
-                    print("  → snippet neutral; no edge added")
-
-        # Verdict:
-        avg_sup = sum(support_scores)/len(support_scores) if support_scores else 0.0
-        avg_ref = sum(refute_scores)/len(refute_scores) if refute_scores else 0.0
-        if avg_sup > avg_ref:
-            verdict, confidence = "Supported", avg_sup
-        elif avg_ref > avg_sup:
-            verdict, confidence = "Refuted", avg_ref
-        else:
-            verdict, confidence = "Inconclusive", max(avg_sup, avg_ref)
+
+        # Run the agent: returns final answer + tool steps, ingests them into the graph
+        res = verify_claim(agent, claim, gm, reuse=reuse)
+        claim_id = res["claim_id"]
+        final_answer = res["final_answer"]
+        verdict, confidence = res["verdict"], res["confidence"]
+        if "reused_from" in res:
+            print(f"\n(answered from an already verified claim: \"{res['reused_from']}\", similarity {res['similarity']:.2f})")
 
         # Final Answer:
         print(f"\n>>> Agent’s Final Answer:\n{final_answer}\n")
@@ -144,6 +146,9 @@ def main():
         for summ, sc in gm.get_top_snippets(claim_id, "refutes"):
             print(f" • ({sc:.2f}) {summ}")
 
+        if not interactive:
+            continue
+
         # More options for the user: 
         print("\nYou can now query the graph for this claim.")
         print("Commands:")
@@ -158,19 +163,15 @@ def main():
                 break
 
             elif cmd in ("docs", "documents"):
-                doc_ids = [
-                    tgt for src, tgt, rel in gm.edges
-                    if src == claim_id and rel == "cites"
-                ]
-                if not doc_ids:
+                docs = gm.neighbors(claim_id, "cites")
+                if not docs:
                     print("  (no documents ingested)")
                 else:
-                    for did in doc_ids:
-                        url = gm.nodes[did]["properties"]["url"]
-                        print(f"  • {url}")
+                    for doc in docs:
+                        print(f"  • {doc.properties['url']}")
 
             elif cmd in ("supports", "support"):
-                snippets = gm.get_top_snippets(claim_id, "supports", k=len(gm.nodes))
+                snippets = gm.get_top_snippets(claim_id, "supports", k=None)
                 if not snippets:
                     print("  (no supporting snippets)")
                 else:
@@ -178,7 +179,7 @@ def main():
                         print(f"  • ({sc:.2f}) {summ}")
 
             elif cmd in ("refutes", "refute"):
-                snippets = gm.get_top_snippets(claim_id, "refutes", k=len(gm.nodes))
+                snippets = gm.get_top_snippets(claim_id, "refutes", k=None)
                 if not snippets:
                     print("  (no refuting snippets)")
                 else: